@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Compare gradient allreduce methods of MasterNNP.
+
+Usage:
+    $ for n in 1 2 4 8; do
+    >     mpirun -n $n python benchmarks/allreduce.py --elements Ga N
+    > done
+
+It reports mean time per iteration of gradient communication only, and
+of communication and parameter update of `MasterNNP` for each method
+with the number of MPI processes and nodes.
+"""
+
+import argparse
+import time
+
+import chainer
+import chainermn
+from mpi4py import MPI as MPI4PY
+import numpy as np
+
+from hdnnpy.model import MasterNNP
+from hdnnpy.training import (BucketedMultiNodeOptimizer, COMMUNICATOR)
+from hdnnpy.utils import MPI
+
+
+METHODS = ['chainermn', 'bucketed/flat', 'bucketed/hierarchical']
+
+
+def make_optimizer(method, master_nnp, comm, bucket_size):
+    """Make a multi-node optimizer of the given method."""
+    optimizer = chainer.optimizers.Adam(1.0e-3)
+    if method.startswith('bucketed'):
+        _, name = method.split('/')
+        communicator = COMMUNICATOR[name](comm.mpi_comm)
+        optimizer = BucketedMultiNodeOptimizer(
+            optimizer, communicator, bucket_size=bucket_size)
+    else:
+        optimizer = chainermn.create_multi_node_optimizer(optimizer, comm)
+    optimizer.setup(master_nnp)
+    return optimizer
+
+
+def measure(function, iterations, warmup):
+    """Measure mean time per call of a function."""
+    elapsed = 0.0
+    for i in range(warmup + iterations):
+        MPI.comm.Barrier()
+        start = time.perf_counter()
+        function()
+        MPI.comm.Barrier()
+        if i >= warmup:
+            elapsed += time.perf_counter() - start
+    return elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--elements', nargs='+', default=['Ga', 'N'],
+                        help='Elements of MasterNNP.')
+    parser.add_argument('--n_input', type=int, default=100,
+                        help='Number of nodes of input layer.')
+    parser.add_argument('--hidden', type=int, nargs='+', default=[90, 90],
+                        help='Number of nodes of each hidden layer.')
+    parser.add_argument('--bucket_size', type=int, default=4 * 1024 * 1024,
+                        help='Maximum size of a bucket in bytes.')
+    parser.add_argument('--iterations', type=int, default=100,
+                        help='Number of measured iterations.')
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='Number of iterations before measurement.')
+    args = parser.parse_args()
+
+    comm = chainermn.create_communicator('naive', MPI.comm)
+    hidden_layers = [(n, 'tanh') for n in args.hidden]
+    n_param = None
+    results = {}
+    for method in METHODS:
+        master_nnp = MasterNNP(
+            args.elements, args.n_input, hidden_layers, 1)
+        n_param = sum(param.size for param in master_nnp.params())
+        for param in master_nnp.params():
+            param.grad = np.random.standard_normal(
+                param.shape).astype(param.dtype)
+        optimizer = make_optimizer(
+            method, master_nnp, comm, args.bucket_size)
+        if method == 'chainermn':
+            communicate = lambda: comm.allreduce_grad(master_nnp)
+        else:
+            communicate = lambda: optimizer.allreduce_grad(master_nnp)
+        results[method] = (
+            measure(communicate, args.iterations, args.warmup),
+            measure(optimizer.update, args.iterations, args.warmup))
+
+    n_node = len(set(MPI.comm.allgather(MPI4PY.Get_processor_name())))
+    if MPI.rank == 0:
+        print(f'# {MPI.size} processes on {n_node} nodes,'
+              f' {n_param} parameters')
+        print('# time per iteration [msec] (communication, update)')
+        for method, (communication, update) in results.items():
+            print(f'{method:<22}: {communication * 1e3:.3f}'
+                  f' {update * 1e3:.3f}')
+
+
+if __name__ == '__main__':
+    main()
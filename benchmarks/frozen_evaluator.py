@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Compare frozen NumPy evaluator with chainer based prediction.
+
+Usage:
+    $ hdnnpy convert --load_dir=output --format=numpy
+    $ python benchmarks/frozen_evaluator.py output structures.xyz
+
+It reports startup time (including imports) in a fresh process,
+per-structure latency and maximum deviation of predicted properties.
+"""
+
+import argparse
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+import ase.io
+import numpy as np
+
+
+STARTUP = {
+    'chainer': (
+        'from pathlib import Path\n'
+        'from hdnnpy.inference import Predictor\n'
+        'Predictor(Path({load_dir!r}))\n'),
+    'numpy': (
+        'from hdnnpy.frozen import FrozenHDNNP\n'
+        'FrozenHDNNP({frozen_file!r})\n'),
+    }
+
+
+def measure_startup(code, repeat):
+    """Measure wall time to start a fresh interpreter and load HDNNP."""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed)
+
+
+def measure_latency(predict, structures, order):
+    """Predict structures one by one and measure mean latency."""
+    results = []
+    start = time.perf_counter()
+    for atoms in structures:
+        results.extend(predict([atoms], order))
+    return (time.perf_counter() - start) / len(structures), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('load_dir', type=Path,
+                        help='Path to directory of training output files.')
+    parser.add_argument('xyz_file', type=Path,
+                        help='File path of structures to predict.')
+    parser.add_argument('--order', type=int, default=1,
+                        help='Derivative order of prediction.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of repetition of startup measurement.')
+    args = parser.parse_args()
+
+    from hdnnpy.frozen import FrozenHDNNP
+    from hdnnpy.inference import Predictor
+
+    frozen_file = args.load_dir / 'frozen_nnp.npz'
+    structures = ase.io.read(str(args.xyz_file), index=':', format='xyz')
+
+    print('# startup time [sec] (interpreter + import + load)')
+    for name, code in STARTUP.items():
+        code = code.format(load_dir=str(args.load_dir),
+                           frozen_file=str(frozen_file))
+        print(f'{name:<8}: {measure_startup(code, args.repeat):.3f}')
+
+    print(f'# latency per structure [msec] ({len(structures)} structures)')
+    predictors = {
+        'chainer': Predictor(args.load_dir).predict,
+        'numpy': FrozenHDNNP(frozen_file).predict,
+        }
+    results = {}
+    for name, predict in predictors.items():
+        latency, results[name] = measure_latency(
+            predict, structures, args.order)
+        print(f'{name:<8}: {latency * 1e3:.3f}')
+
+    print('# maximum absolute deviation')
+    for key in results['chainer'][0]:
+        deviation = max(
+            np.max(np.abs(reference[key] - frozen[key]))
+            for reference, frozen
+            in zip(results['chainer'], results['numpy']))
+        print(f'{key:<8}: {deviation:.3e}')
+
+
+if __name__ == '__main__':
+    main()
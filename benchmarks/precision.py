@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Compare precision policies of descriptor datasets.
+
+Usage:
+    $ python benchmarks/precision.py structures.xyz \
+    >     --parameters '{"type1": [[5.0]], "type2": [[5.0, 0.01, 2.0]]}'
+
+It reports memory of descriptor datasets for each precision policy,
+and maximum absolute and relative deviations from "float64" policy.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from hdnnpy.dataset import AtomicStructure
+from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+from hdnnpy.utils import Precision
+
+
+def make_descriptors(xyz_file, descriptor, order, parameters):
+    """Calculate descriptor dataset under the current precision."""
+    structures = AtomicStructure.read_xyz(xyz_file)
+    dataset = DESCRIPTOR_DATASET[descriptor](order, structures, **parameters)
+    dataset.make(verbose=False)
+    stored = [dataset[key] for key in dataset.descriptors]
+    # arrays are fed to model in this precision
+    fed = [data.astype(Precision.model) for data in stored]
+    return fed, [data.nbytes for data in stored]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('xyz_file', type=Path,
+                        help='File path of structures.')
+    parser.add_argument('--descriptor', default='symmetry_function',
+                        help='Name of descriptor dataset.')
+    parser.add_argument('--order', type=int, default=1,
+                        help='Derivative order of descriptor dataset.')
+    parser.add_argument('--parameters', type=json.loads,
+                        default={'type1': [[5.0]],
+                                 'type2': [[5.0, 0.01, 2.0]],
+                                 'type4': [[5.0, 0.01, 1.0, 1.0]]},
+                        help='Parameters of descriptor as JSON.')
+    args = parser.parse_args()
+    parameters = {name: [tuple(params) for params in params_set]
+                  for name, params_set in args.parameters.items()}
+
+    results = {}
+    for name in ['float64', 'float32', 'mixed', 'mixed_half']:
+        Precision.set(name)
+        results[name] = make_descriptors(
+            args.xyz_file, args.descriptor, args.order, parameters)
+
+    reference, _ = results['float64']
+    print('# memory [MiB] and max abs / rel deviation from float64')
+    for name, (arrays, nbytes) in results.items():
+        for order, (array, expected, size) in enumerate(
+                zip(arrays, reference, nbytes)):
+            deviation = np.abs(array.astype(np.float64) - expected)
+            scale = np.max(np.abs(expected))
+            print(f'{name:<10} order {order}: {size / 2**20:10.3f}'
+                  f' {deviation.max():.3e}'
+                  f' {deviation.max() / scale:.3e}')
+
+
+if __name__ == '__main__':
+    main()
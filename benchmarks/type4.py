@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Measure symmetry function type4 calculation.
+
+Usage:
+    $ python benchmarks/type4.py structures.xyz --cutoffs 4.0 6.0 8.0
+
+It reports mean number of neighbors, time per structure of type4
+descriptors and their derivatives, memory of cached triplets of a
+structure for each cutoff distance, and maximum deviation of 0th order
+descriptors from a dense reference calculation with the full cosine
+matrix of neighbors.
+"""
+
+import argparse
+from itertools import combinations_with_replacement
+from pathlib import Path
+import time
+
+import numpy as np
+
+from hdnnpy.dataset import AtomicStructure
+from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+
+
+def dense_type4(structure, Rc, eta, lambda_, zeta):
+    """Reference type4 with the full cosine matrix of neighbors."""
+    n_element = len(structure.elements)
+    G = []
+    for r, R, fc, element_indices in structure.get_neighbor_info(
+            Rc, ['distance_vector', 'distance', 'cutoff_function',
+                 'element_indices']):
+        r, R, fc = r.data, R.data, fc.data
+        cos = (r / R[:, None]) @ (r / R[:, None]).T
+        radial = np.exp(-eta * R**2) * fc
+        g = (2.0 ** (1-zeta) * (1.0 + lambda_*cos) ** zeta
+             * radial[:, None] * radial[None, :])
+        g = np.triu(g, k=1)
+        bounds = list(element_indices) + [len(R)]
+        G.append([g[bounds[a]:bounds[a+1], bounds[b]:bounds[b+1]].sum()
+                  for a, b in combinations_with_replacement(
+                      range(n_element), 2)])
+    return np.array(G)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('xyz_file', type=Path,
+                        help='File path of structures.')
+    parser.add_argument('--cutoffs', type=float, nargs='+',
+                        default=[4.0, 6.0, 8.0],
+                        help='Cutoff distances to measure.')
+    parser.add_argument('--order', type=int, default=1,
+                        help='Derivative order of descriptor dataset.')
+    parser.add_argument('--n_structure', type=int, default=10,
+                        help='Number of structures to measure.')
+    args = parser.parse_args()
+
+    structures = AtomicStructure.read_xyz(args.xyz_file)[:args.n_structure]
+    print('# cutoff, neighbors per atom, time per structure [sec],'
+          ' triplet cache [MiB], max deviation from dense reference')
+    for Rc in args.cutoffs:
+        params = [(Rc, 0.01, lambda_, zeta)
+                  for lambda_ in [-1.0, 1.0] for zeta in [1.0, 4.0]]
+        dataset = DESCRIPTOR_DATASET['symmetry_function'](
+            args.order, structures, type4=params)
+        start = time.perf_counter()
+        for structure in structures:
+            sym_func, *_ = dataset.calculate_descriptors(structure)
+        elapsed = (time.perf_counter() - start) / len(structures)
+
+        structure = structures[-1]
+        n_neighbor = np.mean([len(R) for R, in structure.get_neighbor_info(
+            Rc, ['distance'])])
+        list(structure.get_neighbor_info(Rc, ['triplet_cos']))
+        triplet_nbytes = sum(
+            nbytes for key, nbytes in structure.cache_nbytes()[Rc].items()
+            if key.startswith('triplet_'))
+        reference = np.concatenate(
+            [dense_type4(structure, *param) for param in params], axis=1)
+        deviation = np.max(np.abs(sym_func - reference))
+        structure.clear_cache()
+        print(f'{Rc:6.2f} {n_neighbor:8.1f} {elapsed:10.4f}'
+              f' {triplet_nbytes / 2**20:10.3f} {deviation:.3e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,12 @@
 # PredictionConfig(Configurable) configuration
 #------------------------------------------------------------------------------
 
+## If positive, atomic structures are read, converted into descriptors and
+#  predicted by this number at a time, and the results are written
+#  incrementally. It keeps memory usage constant for arbitrarily long
+#  trajectories. If 0, all structures are processed at once.
+#c.PredictionConfig.chunk_size = 0
+
 ## Path to a data file used for HDNNP prediction. Only .xyz file format is
 #  supported.
 #c.PredictionConfig.data_file = '.'
@@ -33,9 +39,23 @@
 ## File format to output HDNNP predition result
 #c.PredictionConfig.dump_format = '.npz'
 
+## If True, pre-processing is folded into the first layer of neural network
+#  and descriptors are fed without it. Input dimension becomes that of raw
+#  descriptors.
+#c.PredictionConfig.fold_preprocesses = False
+
+## If True, predictions of all MPI processes are gathered and written into a
+#  file by the root process. Otherwise, each MPI process writes its own result
+#  file `prediction_result.<rank><dump_format>`.
+#c.PredictionConfig.gather = True
+
 ## Path to directory to load training output files
 #c.PredictionConfig.load_dir = 'output'
 
+## Maximum number of HDNNP models cached for each elemental composition. The
+#  least recently used model is discarded.
+#c.PredictionConfig.model_cache_size = 16
+
 ## Order of differentiation used for calculation of descriptor & property
 #  datasets and HDNNP prediction. ex.) 0: energy, 1: force, for interatomic
 #  potential
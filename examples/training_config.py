@@ -26,14 +26,52 @@
 # DatasetConfig(Configurable) configuration
 #------------------------------------------------------------------------------
 
+## Number of samples in a compressed block of descriptor dataset file. Used
+#  only if `cache_codec` is not "none".
+#c.DatasetConfig.cache_chunk_size = 64
+
+## Codec to compress descriptor dataset file in blocks of samples. "none":
+#  uncompressed .npz file. "blosc" and "zstd" fall back to "zlib" if not
+#  installed.
+#c.DatasetConfig.cache_codec = 'none'
+
+## Save each feature column of descriptor dataset file as a separate array, so
+#  that only the feature keys in use are read from a large precomputed
+#  descriptor dataset.
+#c.DatasetConfig.cache_columnar = False
+
+## Layout of descriptor and property dataset files. "npz": a single .npz file
+#  written by the root MPI process. "sharded": a directory of shards and a
+#  manifest, written and read by all MPI processes in parallel.
+#c.DatasetConfig.cache_layout = 'npz'
+
+## Maximum number of decompressed blocks of samples kept in memory for each
+#  descriptor of a compressed dataset file. A shuffled mini-batch touches almost
+#  every block, so that a small limit decompresses the whole file again and
+#  again. If None, every block is decompressed only once.
+#c.DatasetConfig.cache_max_chunks = None
+
 ## Name of descriptor dataset used for input of HDNNP
 #c.DatasetConfig.descriptor = 'symmetry_function'
 
+## Path to directory of a descriptor library shared across training runs. If
+#  specified, descriptor dataset is loaded from it instead of a file in each tag
+#  directory, and only parameter sets lacking in it are calculated and added.
+#  Precompute it by `hdnnpy library`.
+#c.DatasetConfig.library_dir = None
+
 ## Parameters used for the specified descriptor dataset. Set as Dict{key:
 #  List[Tuple(parameters)]}. This will be passed to descriptor dataset as keyword
 #  arguments. ex.) {"type2": [(5.0, 0.01, 2.0)]}
 #c.DatasetConfig.parameters = {}
 
+## Precision policy of datasets and model. "float32": all in float32.
+#  "float64": all in float64. "mixed": neighbor geometry, descriptor calculation
+#  and statistics of pre-processing in float64, stored datasets and model in
+#  float32. "mixed_half": the same as "mixed", but derivative descriptor
+#  datasets are stored in float16 and cast to float32 when fed to model.
+#c.DatasetConfig.precision = 'float32'
+
 ## Preprocess to be applied for input of HDNNP (=descriptor). Set as
 #  List[Tuple(Str(name), Tuple(args), Dict{kwargs})]. Each preprocess instance
 #  will be initialized with (*args, **kwargs). ex.) [("pca", (20,), {})]
@@ -58,6 +96,25 @@
 # TrainingConfig(Configurable) configuration
 #------------------------------------------------------------------------------
 
+## How to allreduce gradients of `MasterNNP` over MPI processes. "chainermn":
+#  allreduce each parameter by the optimizer of ChainerMN. "bucketed": pack
+#  gradients of each element into flat buffers and allreduce them with non-
+#  blocking communication of `communicator`.
+#c.TrainingConfig.allreduce = 'chainermn'
+
+## Maximum size of a buffer in bytes used for "bucketed" allreduce. Gradients
+#  of small elements are packed together.
+#c.TrainingConfig.allreduce_bucket_size = 4194304
+
+## How to make mini-batches from datasets of each tag. "tag": train with each
+#  tag in turn using its own trainer. "interleave": train with mini-batches of
+#  all tags in an interleaved order using a single trainer. Each mini-batch
+#  still consists of a single tag. "atom_list": train with mini-batches mixing
+#  structures of all tags as a flattened list of atoms using a single trainer.
+#  Loss function "potential" is not supported. NOTE: `ScatterPlot` is supported
+#  only in "tag" mode.
+#c.TrainingConfig.batch_mode = 'tag'
+
 ## Number of data within each batch
 #c.TrainingConfig.batch_size = 0
 
@@ -65,6 +122,14 @@
 #  supported.
 #c.TrainingConfig.data_file = '.'
 
+## Name of communicator for gradient allreduce. If `allreduce` is "chainermn",
+#  it is passed to `chainermn.create_communicator`, where "flat" and
+#  "hierarchical" require GPUs. If `allreduce` is "bucketed", it selects a CPU
+#  communicator. "naive" and "flat": allreduce over all processes at once.
+#  "hierarchical": reduce within each node, allreduce among nodes and broadcast
+#  within each node.
+#c.TrainingConfig.communicator = 'naive'
+
 ## Upper bound of the number of training loops
 #c.TrainingConfig.epoch = 0
 
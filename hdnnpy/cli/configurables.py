@@ -35,11 +35,55 @@ class DatasetConfig(Configurable):
         help='Total number of data counted internally')
 
     # configurable
+    cache_chunk_size = Integer(
+        default_value=64,
+        help='Number of samples in a compressed block of descriptor dataset '
+             'file. Used only if `cache_codec` is not "none".'
+        ).tag(config=True)
+    cache_codec = CaselessStrEnum(
+        ['none', 'blosc', 'zlib', 'zstd'],
+        default_value='none',
+        help='Codec to compress descriptor dataset file in blocks of '
+             'samples. "none": uncompressed .npz file. '
+             '"blosc" and "zstd" fall back to "zlib" if not installed.'
+        ).tag(config=True)
+    cache_columnar = Bool(
+        default_value=False,
+        help='Save each feature column of descriptor dataset file as a '
+             'separate array, so that only the feature keys in use are read '
+             'from a large precomputed descriptor dataset.'
+        ).tag(config=True)
+    cache_layout = CaselessStrEnum(
+        ['npz', 'sharded'],
+        default_value='npz',
+        help='Layout of descriptor and property dataset files. '
+             '"npz": a single .npz file written by the root MPI process. '
+             '"sharded": a directory of shards and a manifest, written and '
+             'read by all MPI processes in parallel.'
+        ).tag(config=True)
+    cache_max_chunks = Integer(
+        default_value=None,
+        allow_none=True,
+        help='Maximum number of decompressed blocks of samples kept in '
+             'memory for each descriptor of a compressed dataset file. '
+             'A shuffled mini-batch touches almost every block, so that a '
+             'small limit decompresses the whole file again and again. '
+             'If None, every block is decompressed only once.'
+        ).tag(config=True)
     descriptor = CaselessStrEnum(
         ['symmetry_function', 'weighted_symmetry_function'],
         default_value='symmetry_function',
         help='Name of descriptor dataset used for input of HDNNP'
         ).tag(config=True)
+    library_dir = Path(
+        None,
+        allow_none=True,
+        help='Path to directory of a descriptor library shared across '
+             'training runs. If specified, descriptor dataset is loaded from '
+             'it instead of a file in each tag directory, and only parameter '
+             'sets lacking in it are calculated and added. '
+             'Precompute it by `hdnnpy library`.'
+        ).tag(config=True)
     parameters = Dict(
         trait=List,
         help='Parameters used for the specified descriptor dataset. '
@@ -52,6 +96,19 @@ class DatasetConfig(Configurable):
         default_value='interatomic_potential',
         help='Name of property dataset to be optimized by HDNNP'
         ).tag(config=True)
+    precision = CaselessStrEnum(
+        ['float32', 'float64', 'mixed', 'mixed_half'],
+        default_value='float32',
+        help='Precision policy of datasets and model. '
+             '"float32": all in float32. '
+             '"float64": all in float64. '
+             '"mixed": neighbor geometry, descriptor calculation and '
+             'statistics of pre-processing in float64, stored datasets and '
+             'model in float32. '
+             '"mixed_half": the same as "mixed", but derivative descriptor '
+             'datasets are stored in float16 and cast to float32 when fed '
+             'to model.'
+        ).tag(config=True)
     preprocesses = List(
         trait=Tuple(
             CaselessStrEnum(['pca', 'scaling', 'standardization']),
@@ -147,12 +204,52 @@ class TrainingConfig(Configurable):
         help='Counts to let `chainer.training.triggers.EarlyStoppingTrigger`'
              ' be patient'
         ).tag(config=True)
+    communicator = CaselessStrEnum(
+        ['naive', 'flat', 'hierarchical'],
+        default_value='naive',
+        help='Name of communicator for gradient allreduce. '
+             'If `allreduce` is "chainermn", it is passed to '
+             '`chainermn.create_communicator`, where "flat" and '
+             '"hierarchical" require GPUs. '
+             'If `allreduce` is "bucketed", it selects a CPU communicator. '
+             '"naive" and "flat": allreduce over all processes at once. '
+             '"hierarchical": reduce within each node, allreduce among '
+             'nodes and broadcast within each node.'
+        ).tag(config=True)
     epoch = Integer(
         help='Upper bound of the number of training loops'
         ).tag(config=True)
     batch_size = Integer(
         help='Number of data within each batch'
         ).tag(config=True)
+    allreduce = CaselessStrEnum(
+        ['chainermn', 'bucketed'],
+        default_value='chainermn',
+        help='How to allreduce gradients of `MasterNNP` over MPI processes. '
+             '"chainermn": allreduce each parameter by the optimizer of '
+             'ChainerMN. '
+             '"bucketed": pack gradients of each element into flat buffers '
+             'and allreduce them with non-blocking communication of '
+             '`communicator`.'
+        ).tag(config=True)
+    allreduce_bucket_size = Integer(
+        default_value=4 * 1024 * 1024,
+        help='Maximum size of a buffer in bytes used for "bucketed" '
+             'allreduce. Gradients of small elements are packed together.'
+        ).tag(config=True)
+    batch_mode = CaselessStrEnum(
+        ['tag', 'interleave', 'atom_list'],
+        default_value='tag',
+        help='How to make mini-batches from datasets of each tag. '
+             '"tag": train with each tag in turn using its own trainer. '
+             '"interleave": train with mini-batches of all tags in an '
+             'interleaved order using a single trainer. '
+             'Each mini-batch still consists of a single tag. '
+             '"atom_list": train with mini-batches mixing structures of '
+             'all tags as a flattened list of atoms using a single '
+             'trainer. Loss function "potential" is not supported. '
+             'NOTE: `ScatterPlot` is supported only in "tag" mode.'
+        ).tag(config=True)
     # chainer extension flags
     scatter_plot = Bool(
         False,
@@ -204,3 +301,28 @@ class PredictionConfig(Configurable):
         default_value='.npz',
         help='File format to output HDNNP predition result'
         ).tag(config=True)
+    gather = Bool(
+        True,
+        help='If True, predictions of all MPI processes are gathered and '
+             'written into a file by the root process. Otherwise, each MPI '
+             'process writes its own result file '
+             '`prediction_result.<rank><dump_format>`.'
+        ).tag(config=True)
+    fold_preprocesses = Bool(
+        False,
+        help='If True, pre-processing is folded into the first layer of '
+             'neural network and descriptors are fed without it. Input '
+             'dimension becomes that of raw descriptors.'
+        ).tag(config=True)
+    model_cache_size = Integer(
+        16,
+        help='Maximum number of HDNNP models cached for each elemental '
+             'composition. The least recently used model is discarded.'
+        ).tag(config=True)
+    chunk_size = Integer(
+        help='If positive, atomic structures are read, converted into '
+             'descriptors and predicted by this number at a time, and the '
+             'results are written incrementally. It keeps memory usage '
+             'constant for arbitrarily long trajectories. '
+             'If 0, all structures are processed at once.'
+        ).tag(config=True)
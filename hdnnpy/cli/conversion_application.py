@@ -1,19 +1,24 @@
 # coding=utf-8
 
 import datetime
+import functools
 import socket
 import textwrap
 
 import chainer
-from traitlets import (CaselessStrEnum, Dict, Unicode)
+import numpy as np
+from traitlets import (Bool, CaselessStrEnum, Dict, Unicode)
 from traitlets.config import Application
 import yaml
 
 from hdnnpy import __version__
 from hdnnpy.cli.configurables import (DatasetConfig, ModelConfig, Path)
+from hdnnpy.dataset.property import PROPERTY_DATASET
+from hdnnpy.format import write_binary_potential
+from hdnnpy.frozen.evaluator import (ACTIVATIONS, FORMAT_VERSION)
 from hdnnpy.model import MasterNNP
 from hdnnpy.preprocess import PREPROCESS
-from hdnnpy.utils import (pprint, pyyaml_path_constructor)
+from hdnnpy.utils import (Precision, pprint, pyyaml_path_constructor)
 
 
 class ConversionApplication(Application):
@@ -21,7 +26,7 @@ class ConversionApplication(Application):
     description = 'Convert output files of training to required format.'
 
     format = CaselessStrEnum(
-        ['lammps'],
+        ['lammps', 'lammps_binary', 'numpy'],
         default_value='lammps',
         help='Name of the destination format.',
         ).tag(config=True)
@@ -29,10 +34,32 @@ class ConversionApplication(Application):
         default_value='output',
         help='Path to directory to load training output files.',
         ).tag(config=True)
+    precision = CaselessStrEnum(
+        ['float32', 'float64'],
+        default_value=None,
+        allow_none=True,
+        help='Floating point type of parameters in binary format. '
+             'If not specified, parameters are written in the type they have'
+             ' without downcast.',
+        ).tag(config=True)
+    fold_preprocesses = Bool(
+        False,
+        help='Fold pre-processing into the first layer of neural network'
+             ' and dump no pre-processing parameters.',
+        ).tag(config=True)
 
     aliases = Dict({
         'format': 'ConversionApplication.format',
         'load_dir': 'ConversionApplication.load_dir',
+        'precision': 'ConversionApplication.precision',
+        })
+
+    flags = Dict({
+        'fold_preprocesses': ({
+            'ConversionApplication': {
+                'fold_preprocesses': True,
+                },
+            }, 'Fold pre-processing into the first layer'),
         })
 
     def __init__(self, **kwargs):
@@ -48,6 +75,7 @@ class ConversionApplication(Application):
         self.training_result = yaml.load(
             (self.load_dir / 'training_result.yaml').open())
         self.dataset_config = DatasetConfig(**self.training_result['dataset'])
+        Precision.set(self.dataset_config.precision)
         self.model_config = ModelConfig(**self.training_result['model'])
 
     def start(self):
@@ -69,9 +97,16 @@ class ConversionApplication(Application):
                                tr['model']['n_output'])
         chainer.serializers.load_npz(
             self.load_dir / 'master_nnp.npz', master_nnp)
+        if self.fold_preprocesses:
+            master_nnp = master_nnp.fold_preprocesses(preprocesses)
+            preprocesses = []
 
         if self.format == 'lammps':
             self.dump_for_lammps(preprocesses, master_nnp)
+        elif self.format == 'lammps_binary':
+            self.dump_for_lammps_binary(preprocesses, master_nnp)
+        elif self.format == 'numpy':
+            self.dump_for_numpy(preprocesses, master_nnp)
 
     def dump_for_lammps(self, preprocesses, master_nnp):
         dc = self.dataset_config
@@ -120,3 +155,67 @@ class ConversionApplication(Application):
             {textwrap.indent(
                 textwrap.dedent(master_nnp.dump_params()), ' '*12)}
             ''', stream=f)
+
+    def dump_for_lammps_binary(self, preprocesses, master_nnp):
+        tr = self.training_result
+        dc = self.dataset_config
+        potential_file = self.load_dir / 'lammps.nnp.bin'
+        layers = {
+            nnp.element: [
+                (getattr(nnp, f'fc_layer{i}').W.data,
+                 getattr(nnp, f'fc_layer{i}').b.data,
+                 getattr(nnp, f'activation_function{i}').__name__)
+                for i in range(len(nnp))]
+            for nnp in master_nnp}
+        preprocess_arrays = [(preprocess.name, preprocess.dump_arrays())
+                             for preprocess in preprocesses]
+        dtype = self.precision
+        if dtype is None:
+            # the widest floating point type of all parameters
+            dtypes = [array.dtype for layer in layers.values()
+                      for weight, bias, _ in layer
+                      for array in [weight, bias]]
+            dtypes.extend(array.dtype for _, arrays in preprocess_arrays
+                          for array in arrays.values()
+                          if np.issubdtype(array.dtype, np.floating))
+            dtype = functools.reduce(np.promote_types, dtypes, np.float32)
+        write_binary_potential(
+            potential_file, tr['training']['elements'], dc.descriptor,
+            dc.parameters, preprocess_arrays, layers, dtype=dtype)
+        pprint(f'Saved binary potential to {potential_file}.')
+
+    def dump_for_numpy(self, preprocesses, master_nnp):
+        tr = self.training_result
+        dc = self.dataset_config
+        property_ = PROPERTY_DATASET[dc.property_]
+        bundle = {
+            'version': np.array(FORMAT_VERSION),
+            'descriptor': np.array(dc.descriptor),
+            'elements': np.array(tr['training']['elements']),
+            'properties': np.array(property_.PROPERTIES[:2]),
+            'coefficients': np.array(property_.COEFFICIENTS[:2]),
+            'function_names': np.array(list(dc.parameters)),
+            }
+        for name, params in dc.parameters.items():
+            bundle[f'parameters/{name}'] = np.array(params, dtype=np.float64)
+
+        master_nnp = master_nnp.fold_preprocesses(preprocesses)
+        for nnp in master_nnp:
+            element = nnp.element
+            activations = []
+            for i in range(len(nnp)):
+                weight = getattr(nnp, f'fc_layer{i}').W.data
+                bias = getattr(nnp, f'fc_layer{i}').b.data
+                activation = getattr(nnp, f'activation_function{i}').__name__
+                if activation not in ACTIVATIONS:
+                    raise ValueError(
+                        f'Activation function {activation} is not supported'
+                        ' by frozen HDNNP.')
+                bundle[f'{element}/W{i}'] = weight
+                bundle[f'{element}/b{i}'] = bias
+                activations.append(activation)
+            bundle[f'{element}/activations'] = np.array(activations)
+
+        potential_file = self.load_dir / 'frozen_nnp.npz'
+        np.savez(potential_file, **bundle)
+        pprint(f'Saved frozen HDNNP to {potential_file}.')
@@ -0,0 +1,180 @@
+# coding=utf-8
+
+import itertools
+import json
+
+import numpy as np
+from traitlets import (
+    Bool, CaselessStrEnum, Dict, Float, Integer, List, Unicode)
+from traitlets.config import Application
+
+from hdnnpy.cli.configurables import Path
+from hdnnpy.dataset import AtomicStructure
+from hdnnpy.dataset.descriptor import (
+    DESCRIPTOR_DATASET, DescriptorLibrary, select_parameters)
+from hdnnpy.format import parse_xyz
+from hdnnpy.utils import (MPI, Precision, pprint)
+
+
+class LibraryApplication(Application):
+    name = Unicode(u'hdnnpy library')
+    description = ('Precompute a grid of descriptor parameters into a'
+                   ' descriptor library shared across training runs.')
+
+    data_file = Path(
+        help='Path to a data file used for HDNNP training. '
+             'Only .xyz file format is supported.'
+        ).tag(config=True)
+    library_dir = Path(
+        default_value='descriptor_library',
+        help='Path to directory of the descriptor library.'
+        ).tag(config=True)
+    descriptor = CaselessStrEnum(
+        ['symmetry_function', 'weighted_symmetry_function'],
+        default_value='symmetry_function',
+        help='Name of descriptor dataset to precompute.'
+        ).tag(config=True)
+    order = Integer(
+        default_value=1,
+        help='Derivative order of descriptor dataset to precompute. It has '
+             'to be at least that of loss function used for training.'
+        ).tag(config=True)
+    grid = Dict(
+        trait=List,
+        help='Grid of parameters for each type of function. '
+             'Set as Dict{key: List[List(values of each parameter)]}. '
+             'Every combination of the values is precomputed. '
+             'ex.) {"type2": [[5.0], [0.01, 0.1, 1.0], [0.0, 2.0]]}'
+        ).tag(config=True)
+    precision = CaselessStrEnum(
+        ['float32', 'float64', 'mixed', 'mixed_half'],
+        default_value='float32',
+        help='Precision policy. It has to be the same as that of training.'
+        ).tag(config=True)
+    select = Bool(
+        False,
+        help='After precomputation, select informative parameter sets from '
+             'the grid and print a reduced parameter map with its savings.'
+        ).tag(config=True)
+    n_select = Integer(
+        None,
+        allow_none=True,
+        help='Maximum number of parameter sets to select.'
+        ).tag(config=True)
+    select_threshold = Float(
+        0.99,
+        help='Feature columns correlated with the selected ones more than '
+             'this are regarded as redundant.'
+        ).tag(config=True)
+    verbose = Bool(
+        False,
+        help='Set verbose mode'
+        ).tag(config=True)
+
+    aliases = Dict({
+        'data_file': 'LibraryApplication.data_file',
+        'library_dir': 'LibraryApplication.library_dir',
+        'descriptor': 'LibraryApplication.descriptor',
+        'order': 'LibraryApplication.order',
+        'grid': 'LibraryApplication.grid',
+        'precision': 'LibraryApplication.precision',
+        'n_select': 'LibraryApplication.n_select',
+        'select_threshold': 'LibraryApplication.select_threshold',
+        })
+
+    flags = Dict({
+        'select': ({
+            'LibraryApplication': {
+                'select': True,
+                },
+            }, 'Select informative parameter sets'),
+        'verbose': ({
+            'LibraryApplication': {
+                'verbose': True,
+                },
+            }, 'Set verbose mode'),
+        'v': ({
+            'LibraryApplication': {
+                'verbose': True,
+                },
+            }, 'Set verbose mode'),
+        })
+
+    def initialize(self, argv=None):
+        self.parse_command_line(argv)
+        Precision.set(self.precision)
+
+    def start(self):
+        func_param_map = {
+            name: list(itertools.product(*values))
+            for name, values in self.grid.items()}
+        library = DescriptorLibrary(self.library_dir)
+        tag_xyz_map, elements = parse_xyz(self.data_file, verbose=self.verbose)
+        n_calculated = 0
+        for tag, tagged_xyz in tag_xyz_map.items():
+            if self.verbose:
+                pprint(f'Precompute descriptors of "{tag}"')
+            structures = AtomicStructure.read_xyz(tagged_xyz)
+            descriptor = DESCRIPTOR_DATASET[self.descriptor](
+                self.order, structures, **func_param_map)
+            n_calculated += library.update(
+                descriptor, structures, verbose=self.verbose)
+        pprint(f'Calculated {n_calculated} parameter sets of'
+               f' {len(tag_xyz_map)} tags into {self.library_dir}.')
+
+        if self.select:
+            self.select_parameters(
+                library, tag_xyz_map, sorted(elements), func_param_map)
+
+    def select_parameters(self, library, tag_xyz_map, all_elements,
+                          func_param_map):
+        descriptors = []
+        n_neighbors = []
+        for tagged_xyz in tag_xyz_map.values():
+            structures = AtomicStructure.read_xyz(tagged_xyz)
+            descriptor = DESCRIPTOR_DATASET[self.descriptor](
+                0, structures, **func_param_map)
+            library.load(descriptor, structures, verbose=self.verbose)
+            descriptors.append(descriptor)
+            if 'type4' in func_param_map:
+                Rc = max(params[0] for params in func_param_map['type4'])
+                n_neighbors.extend(
+                    len(R) for R, in structures[0].get_neighbor_info(
+                        Rc, ['distance']))
+                structures[0].clear_cache()
+        if MPI.rank != 0:
+            return
+
+        # an angular parameter set is calculated over pairs of
+        # neighbors, while a radial one is over neighbors
+        costs = {}
+        if n_neighbors:
+            n_neighbors = np.array(n_neighbors)
+            costs['type4'] = max(
+                np.mean(n_neighbors * (n_neighbors-1) / 2)
+                / max(np.mean(n_neighbors), 1.0), 1.0)
+
+        selected, report = select_parameters(
+            descriptors, all_elements, n_select=self.n_select,
+            threshold=self.select_threshold, order=self.order, costs=costs)
+        (n_set, n_set_selected) = report['n_parameter_set']
+        (n_feature, n_feature_selected) = report['n_feature']
+        (cost, cost_selected) = report['cost']
+        (memory, memory_selected) = report['memory']
+        per_function = ', '.join(
+            f'{name}: {n} -> {n_selected}'
+            for name, (n, n_selected) in report['per_function'].items())
+        pprint(f'''
+        Selected {n_set_selected} of {n_set} parameter sets.
+            {per_function}
+        Number of features: {n_feature} -> {n_feature_selected}
+        Calculation cost (a radial parameter set = 1.0,
+            an angular one = {costs.get('type4', 1.0):.1f}):
+            {cost:.1f} -> {cost_selected:.1f}
+        Memory of descriptors up to order {self.order} [MiB]:
+            {memory / 2**20:.3f} -> {memory_selected / 2**20:.3f}
+        c.DatasetConfig.parameters = {selected}
+        ''')
+        selected_file = self.library_dir / 'selected_parameters.json'
+        selected_file.write_text(json.dumps(selected, indent=2))
+        pprint(f'Saved selected parameters to {selected_file}.')
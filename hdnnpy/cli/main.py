@@ -8,7 +8,9 @@ from traitlets import Unicode
 from traitlets.config import Application
 
 from hdnnpy.cli.conversion_application import ConversionApplication
+from hdnnpy.cli.library_application import LibraryApplication
 from hdnnpy.cli.prediction_application import PredictionApplication
+from hdnnpy.cli.serving_application import ServingApplication
 from hdnnpy.cli.training_application import TrainingApplication
 from hdnnpy.utils import MPI
 
@@ -18,13 +20,17 @@ class HDNNPApplication(Application):
 
     classes = [
         ConversionApplication,
+        LibraryApplication,
         PredictionApplication,
+        ServingApplication,
         TrainingApplication,
         ]
 
     subcommands = {
         'convert': (ConversionApplication, ConversionApplication.description),
+        'library': (LibraryApplication, LibraryApplication.description),
         'predict': (PredictionApplication, PredictionApplication.description),
+        'serve': (ServingApplication, ServingApplication.description),
         'train': (TrainingApplication, TrainingApplication.description),
         }
 
@@ -32,8 +38,8 @@ class HDNNPApplication(Application):
         if MPI.rank != 0:
             sys.stdout = Path(os.devnull).open('w')
         assert sys.argv[1] in self.subcommands, \
-            'Only `hdnnpy train` and `hdnnpy predict` `hdnnpy convert` are' \
-            ' available.'
+            'Only `hdnnpy train`, `hdnnpy predict`, `hdnnpy convert`,' \
+            ' `hdnnpy serve` and `hdnnpy library` are available.'
         super().initialize(argv)
 
 
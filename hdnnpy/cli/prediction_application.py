@@ -1,7 +1,10 @@
 # coding=utf-8
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 import fnmatch
 import shutil
+import time
 
 import chainer
 import numpy as np
@@ -15,10 +18,12 @@ from hdnnpy.cli.configurables import (
 from hdnnpy.dataset import (AtomicStructure, DatasetGenerator, HDNNPDataset)
 from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
 from hdnnpy.dataset.property import PROPERTY_DATASET
-from hdnnpy.format import parse_xyz
-from hdnnpy.model import (HighDimensionalNNP, MasterNNP)
+from hdnnpy.format import (NpzStreamWriter, parse_xyz)
+from hdnnpy.model import (MasterNNP, ModelCache)
 from hdnnpy.preprocess import PREPROCESS
-from hdnnpy.utils import (MPI, pprint, pyyaml_path_constructor)
+from hdnnpy.utils import (
+    MPI, Precision, pprint, pyyaml_path_constructor, recv_chunk, send_chunk,
+    )
 
 
 class PredictionApplication(Application):
@@ -61,9 +66,16 @@ class PredictionApplication(Application):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.training_result = None
         self.dataset_config = None
         self.model_config = None
         self.prediction_config = None
+        self.model_cache = None
+        self.elapsed_time = {
+            'model construction': 0.0,
+            'batch conversion': 0.0,
+            'feed forward': 0.0,
+            }
 
     def initialize(self, argv=None):
         self.parse_command_line(argv)
@@ -71,34 +83,39 @@ class PredictionApplication(Application):
         self.prediction_config = PredictionConfig(config=self.config)
 
         yaml.add_constructor('Path', pyyaml_path_constructor)
-        training_result = yaml.load(
+        self.training_result = yaml.load(
             (self.prediction_config.load_dir / 'training_result.yaml').open())
-        self.dataset_config = DatasetConfig(**training_result['dataset'])
-        self.model_config = ModelConfig(**training_result['model'])
+        self.dataset_config = DatasetConfig(**self.training_result['dataset'])
+        Precision.set(self.dataset_config.precision)
+        self.model_config = ModelConfig(**self.training_result['model'])
 
     def start(self):
         pc = self.prediction_config
         shutil.copy(self.config_file, pc.load_dir / self.config_file.name)
         tag_xyz_map, pc.elements = parse_xyz(
             pc.data_file, save=False, verbose=self.verbose)
+        if pc.chunk_size > 0:
+            self.stream(tag_xyz_map)
+            if self.verbose:
+                self.report_elapsed_time()
+            return
         datasets = self.construct_datasets(tag_xyz_map)
         datasets = DatasetGenerator(*datasets).all()
-        if MPI.rank == 0:
-            results = self.predict(datasets)
+        results = self.predict(datasets)
+        if pc.gather:
+            results = self.gather_results(results)
+            if MPI.rank == 0:
+                self.dump_result(results)
+        else:
             self.dump_result(results)
+        if self.verbose:
+            self.report_elapsed_time()
 
     def construct_datasets(self, tag_xyz_map):
-        dc = self.dataset_config
-        mc = self.model_config
         pc = self.prediction_config
 
-        preprocesses = []
-        for (name, args, kwargs) in dc.preprocesses:
-            preprocess = PREPROCESS[name](*args, **kwargs)
-            preprocess.load(
-                pc.load_dir / 'preprocess' / f'{name}.npz',
-                verbose=self.verbose)
-            preprocesses.append(preprocess)
+        preprocesses = ([] if pc.fold_preprocesses
+                        else self.load_preprocesses())
 
         datasets = []
         for pattern in pc.tags:
@@ -107,51 +124,99 @@ class PredictionApplication(Application):
                     pprint(f'Construct sub dataset tagged as "{tag}"')
                 tagged_xyz = tag_xyz_map.pop(tag)
                 structures = AtomicStructure.read_xyz(tagged_xyz)
+                dataset = self.construct_dataset(structures, preprocesses)
+                datasets.append(dataset)
 
-                # prepare descriptor dataset
-                descriptor = DESCRIPTOR_DATASET[dc.descriptor](
-                    pc.order, structures, **dc.parameters)
-                descriptor.make(verbose=self.verbose)
+        return datasets
 
-                # prepare empty property dataset
-                property_ = PROPERTY_DATASET[dc.property_](
-                    pc.order, structures)
+    def construct_dataset(self, structures, preprocesses):
+        dc = self.dataset_config
+        mc = self.model_config
+        pc = self.prediction_config
 
-                # construct test dataset from descriptor & property datasets
-                dataset = HDNNPDataset(descriptor, property_)
-                dataset.construct(
-                    all_elements=pc.elements, preprocesses=preprocesses,
-                    shuffle=False, verbose=self.verbose)
-                datasets.append(dataset)
-                dc.n_sample += dataset.total_size
-                mc.n_input = dataset.n_input
-                mc.n_output = dataset.n_label
+        # prepare descriptor dataset
+        descriptor = DESCRIPTOR_DATASET[dc.descriptor](
+            pc.order, structures, **dc.parameters)
+        descriptor.make(verbose=self.verbose)
 
-        return datasets
+        # prepare empty property dataset
+        property_ = PROPERTY_DATASET[dc.property_](pc.order, structures)
 
-    def predict(self, datasets):
+        # construct test dataset from descriptor & property datasets
+        dataset = HDNNPDataset(descriptor, property_)
+        dataset.construct(
+            all_elements=pc.elements, preprocesses=preprocesses,
+            shuffle=False, verbose=self.verbose)
+        dataset.scatter(duplicate=False)
+        dc.n_sample += dataset.total_size
+        mc.n_input = dataset.n_input
+        mc.n_output = dataset.n_label
+
+        return dataset
+
+    def load_master_nnp(self):
+        tr = self.training_result
         mc = self.model_config
         pc = self.prediction_config
-        results = []
 
-        # master model
-        master_nnp = MasterNNP(
-            pc.elements, mc.n_input, mc.hidden_layers, mc.n_output)
+        master_nnp = MasterNNP(pc.elements, tr['model']['n_input'],
+                               mc.hidden_layers, tr['model']['n_output'])
         chainer.serializers.load_npz(
             pc.load_dir / 'master_nnp.npz', master_nnp)
+        if pc.fold_preprocesses:
+            # parameters of pre-processing are loaded only by root process
+            preprocesses = self.load_preprocesses()
+            if MPI.rank == 0:
+                master_nnp = master_nnp.fold_preprocesses(preprocesses)
+            master_nnp = MPI.comm.bcast(master_nnp, root=0)
+        return master_nnp
+
+    def load_preprocesses(self):
+        dc = self.dataset_config
+        pc = self.prediction_config
+
+        preprocesses = []
+        for (name, args, kwargs) in dc.preprocesses:
+            preprocess = PREPROCESS[name](*args, **kwargs)
+            preprocess.load(
+                pc.load_dir / 'preprocess' / f'{name}.npz',
+                verbose=self.verbose)
+            preprocesses.append(preprocess)
+        return preprocesses
+
+    def predict(self, datasets):
+        mc = self.model_config
+        pc = self.prediction_config
+        results = []
+
+        # master model and cache of hdnnp models built from it
+        if self.model_cache is None:
+            self.model_cache = ModelCache(
+                self.load_master_nnp(),
+                mc.n_input, mc.hidden_layers, mc.n_output,
+                max_size=pc.model_cache_size)
 
         for dataset in datasets:
+            if len(dataset) == 0:
+                continue
+
             # hdnnp model
-            hdnnp = HighDimensionalNNP(
-                dataset.elemental_composition,
-                mc.n_input, mc.hidden_layers, mc.n_output)
-            hdnnp.sync_param_with(master_nnp)
+            start = time.perf_counter()
+            hdnnp = self.model_cache.get(dataset.elemental_composition)
+            self.elapsed_time['model construction'] += (
+                time.perf_counter() - start)
 
-            batch = chainer.dataset.concat_examples(dataset)
+            start = time.perf_counter()
+            batch = dataset.get_batch(slice(None))
             inputs = [batch[f'inputs/{i}'] for i in range(pc.order + 1)]
+            self.elapsed_time['batch conversion'] += (
+                time.perf_counter() - start)
+
+            start = time.perf_counter()
             with chainer.using_config('train', False), \
                  chainer.using_config('enable_backprop', False):
                 predictions = hdnnp.predict(inputs, pc.order)
+            self.elapsed_time['feed forward'] += time.perf_counter() - start
 
             result = {
                 **{'tag': dataset.tag},
@@ -164,16 +229,122 @@ class PredictionApplication(Application):
             results.append(result)
         return results
 
+    def stream(self, tag_xyz_map):
+        pc = self.prediction_config
+        is_writer = MPI.rank == 0 or not pc.gather
+
+        preprocesses = ([] if pc.fold_preprocesses
+                        else self.load_preprocesses())
+
+        # the writer is aborted if an exception is raised
+        with ExitStack() as stack:
+            writer = (stack.enter_context(NpzStreamWriter(self.result_file))
+                      if is_writer else None)
+            reader = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+            # descriptor calculation and prediction stay in the main
+            # thread, since both of them use MPI communication
+            appender = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+            appended = None
+            for pattern in pc.tags:
+                for tag in fnmatch.filter(tag_xyz_map, pattern):
+                    if self.verbose:
+                        pprint(f'Stream sub dataset tagged as "{tag}"')
+                    chunks = AtomicStructure.iread_xyz(
+                        tag_xyz_map.pop(tag), pc.chunk_size)
+                    # read the next chunk while processing the current one
+                    future = reader.submit(next, chunks, None)
+                    while True:
+                        structures = future.result()
+                        if structures is None:
+                            break
+                        future = reader.submit(next, chunks, None)
+                        dataset = self.construct_dataset(
+                            structures, preprocesses)
+                        results = self.predict([dataset])
+                        if pc.gather:
+                            results = self.gather_results(results)
+                        if not results:
+                            continue
+                        # write results of the previous chunk while
+                        # processing the next one, keeping at most one
+                        # chunk pending
+                        if appended is not None:
+                            appended.result()
+                        appended = appender.submit(
+                            self._append_results, writer, results)
+            if appended is not None:
+                appended.result()
+
+    def report_elapsed_time(self):
+        """Print time breakdown of prediction."""
+        cache = self.model_cache
+        breakdown = ('\n'+' '*8).join(
+            f'{key:<20}: {value:.3f} sec'
+            for key, value in self.elapsed_time.items())
+        pprint(f'''
+        Elapsed time of prediction on process #{MPI.rank}
+        {breakdown}
+        ''')
+        # model cache is not made if no tag matches
+        if cache is not None:
+            pprint(f'Model cache: {cache.hits} hits, {cache.misses} misses')
+
+    @property
+    def result_file(self):
+        """~pathlib.Path: File path to output prediction result.
+
+        If results are not gathered, each MPI process has its own file.
+        """
+        pc = self.prediction_config
+        if pc.gather:
+            return pc.load_dir / f'prediction_result{pc.dump_format}'
+        else:
+            return (pc.load_dir
+                    / f'prediction_result.{MPI.rank}{pc.dump_format}')
+
     def dump_result(self, results):
         pc = self.prediction_config
-        result_file = pc.load_dir / f'prediction_result{pc.dump_format}'
         if pc.dump_format == '.npz':
-            kv_result = {}
-            for result in results:
-                tag = result.pop('tag')
-                kv_result.update({tag + '/' + key: value
-                                  for key, value in result.items()})
-            np.savez(result_file, **kv_result)
+            np.savez(self.result_file, **dict(self._flatten(results)))
+
+    @staticmethod
+    def gather_results(results):
+        """Gather results predicted by each MPI process to root process
+        and concatenate them in the original order of data."""
+        if MPI.rank != 0:
+            send_chunk(results, dest=0)
+            return []
+
+        tagged_results = {result['tag']: [result] for result in results}
+        for i in range(1, MPI.size):
+            for result in recv_chunk(source=i):
+                tagged_results[result['tag']].append(result)
+
+        gathered = []
+        for tag, partial_results in tagged_results.items():
+            result = {'tag': tag}
+            for key in partial_results[0]:
+                if key != 'tag':
+                    result[key] = np.concatenate(
+                        [partial[key] for partial in partial_results])
+            gathered.append(result)
+        return gathered
+
+    @classmethod
+    def _append_results(cls, writer, results):
+        """Append predicted values to a stream writer."""
+        for key, value in cls._flatten(results):
+            writer.append(key, value)
+
+    @staticmethod
+    def _flatten(results):
+        """Yield each predicted value with a key in a format like
+        ``<tag>/<property>``."""
+        for result in results:
+            tag = result['tag']
+            for key, value in result.items():
+                if key != 'tag':
+                    yield f'{tag}/{key}', value
 
 
 def generate_config_file():
@@ -0,0 +1,63 @@
+# coding=utf-8
+
+from traitlets import (Bool, Dict, Unicode)
+from traitlets.config import Application
+
+from hdnnpy.cli.configurables import Path
+from hdnnpy.inference import (PredictionServer, Predictor)
+from hdnnpy.utils import pprint
+
+
+class ServingApplication(Application):
+    name = Unicode(u'hdnnpy serve')
+    description = ('Serve trained HDNNP as a long-lived prediction server.')
+
+    load_dir = Path(
+        default_value='output',
+        help='Path to directory to load training output files.',
+        ).tag(config=True)
+    address = Unicode(
+        'hdnnpy.sock',
+        help='Address to listen on. Set as "<host>:<port>" for TCP socket,'
+             ' otherwise it is regarded as a file path of Unix domain'
+             ' socket.',
+        ).tag(config=True)
+    verbose = Bool(
+        False,
+        help='Set verbose mode'
+        ).tag(config=True)
+
+    aliases = Dict({
+        'load_dir': 'ServingApplication.load_dir',
+        'address': 'ServingApplication.address',
+        })
+
+    flags = Dict({
+        'verbose': ({
+            'ServingApplication': {
+                'verbose': True,
+                },
+            }, 'Set verbose mode'),
+        'v': ({
+            'ServingApplication': {
+                'verbose': True,
+                },
+            }, 'Set verbose mode'),
+        })
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.predictor = None
+
+    def initialize(self, argv=None):
+        self.parse_command_line(argv)
+        self.predictor = Predictor(self.load_dir, verbose=self.verbose)
+
+    def start(self):
+        with PredictionServer(self.predictor, self.address,
+                              verbose=self.verbose) as server:
+            pprint(f'Start serving HDNNP at {self.address}.')
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pprint('Stop serving HDNNP.')
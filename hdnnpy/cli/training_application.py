@@ -15,17 +15,25 @@ import yaml
 from hdnnpy.cli.configurables import (
     DatasetConfig, ModelConfig, Path, TrainingConfig,
     )
-from hdnnpy.dataset import (AtomicStructure, DatasetGenerator, HDNNPDataset)
-from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+from hdnnpy.dataset import (
+    AtomicStructure, AtomListDataset, DatasetGenerator, HDNNPDataset,
+    )
+from hdnnpy.dataset.descriptor import (DESCRIPTOR_DATASET, DescriptorLibrary)
 from hdnnpy.dataset.property import PROPERTY_DATASET
 from hdnnpy.format import parse_xyz
-from hdnnpy.model import (HighDimensionalNNP, MasterNNP)
+from hdnnpy.model import (
+    AtomListNNP, HighDimensionalNNP, MasterNNP, MultiCompositionNNP,
+    )
 from hdnnpy.preprocess import PREPROCESS
 from hdnnpy.training import (
-    Manager, Updater, ScatterPlot, set_log_scale,
+    COMMUNICATOR, BatchIterator, BucketedMultiNodeOptimizer, FlatCommunicator,
+    InterleavedIterator, Manager, Updater, ScatterPlot, convert_batch,
+    set_log_scale,
     )
 from hdnnpy.training.loss_function import LOSS_FUNCTION
-from hdnnpy.utils import (MPI, pprint, pyyaml_path_representer)
+from hdnnpy.utils import (
+    MPI, Precision, pprint, pyyaml_path_representer,
+    )
 
 
 class TrainingApplication(Application):
@@ -91,6 +99,7 @@ class TrainingApplication(Application):
         self.load_config_file(self.config_file)
 
         self.dataset_config = DatasetConfig(config=self.config)
+        Precision.set(self.dataset_config.precision)
         self.model_config = ModelConfig(config=self.config)
         self.training_config = TrainingConfig(config=self.config)
         if self.is_resume:
@@ -127,6 +136,10 @@ class TrainingApplication(Application):
                     preprocess_dir / f'{name}.npz', verbose=self.verbose)
             preprocesses.append(preprocess)
 
+        library = (DescriptorLibrary(dc.library_dir)
+                   if dc.library_dir is not None else None)
+        sharded = dc.cache_layout == 'sharded'
+        suffix = '.shards' if sharded else '.npz'
         datasets = []
         for pattern in tc.tags:
             for tag in fnmatch.filter(tag_xyz_map, pattern):
@@ -139,24 +152,37 @@ class TrainingApplication(Application):
                 descriptor = DESCRIPTOR_DATASET[dc.descriptor](
                     self.loss_function.order['descriptor'],
                     structures, **dc.parameters)
-                descriptor_npz = tagged_xyz.with_name(f'{dc.descriptor}.npz')
-                if descriptor_npz.exists():
+                descriptor_npz = tagged_xyz.with_name(
+                    f'{dc.descriptor}{suffix}')
+                if library is not None:
+                    library.load(descriptor, structures, verbose=self.verbose)
+                elif descriptor_npz.exists():
                     descriptor.load(
-                        descriptor_npz, verbose=self.verbose, remake=dc.remake)
+                        descriptor_npz, verbose=self.verbose, remake=dc.remake,
+                        chunk_size=dc.cache_chunk_size,
+                        max_cached=dc.cache_max_chunks)
                 else:
-                    descriptor.make(verbose=self.verbose)
-                    descriptor.save(descriptor_npz, verbose=self.verbose)
+                    descriptor.make(
+                        verbose=self.verbose, keep_partial=sharded)
+                    descriptor.save(
+                        descriptor_npz, verbose=self.verbose,
+                        codec=(None if dc.cache_codec == 'none'
+                               else dc.cache_codec),
+                        chunk_size=dc.cache_chunk_size, sharded=sharded,
+                        columnar=dc.cache_columnar)
 
                 # prepare property dataset
                 property_ = PROPERTY_DATASET[dc.property_](
                     self.loss_function.order['property'], structures)
-                property_npz = tagged_xyz.with_name(f'{dc.property_}.npz')
+                property_npz = tagged_xyz.with_name(f'{dc.property_}{suffix}')
                 if property_npz.exists():
                     property_.load(
                         property_npz, verbose=self.verbose, remake=dc.remake)
                 else:
-                    property_.make(verbose=self.verbose)
-                    property_.save(property_npz, verbose=self.verbose)
+                    property_.make(
+                        verbose=self.verbose, keep_partial=sharded)
+                    property_.save(
+                        property_npz, verbose=self.verbose, sharded=sharded)
 
                 # construct HDNNP dataset from descriptor & property datasets
                 dataset = HDNNPDataset(descriptor, property_)
@@ -180,92 +206,129 @@ class TrainingApplication(Application):
         mc = self.model_config
         tc = self.training_config
         if comm is None:
-            comm = chainermn.create_communicator('naive', MPI.comm)
+            if tc.allreduce == 'chainermn':
+                comm = chainermn.create_communicator(
+                    tc.communicator, MPI.comm)
+            else:
+                comm = chainermn.create_communicator('naive', MPI.comm)
         result = {'training_time': 0.0, 'observation': []}
 
         # model and optimizer
         master_nnp = MasterNNP(
             tc.elements, mc.n_input, mc.hidden_layers, mc.n_output)
         master_opt = chainer.optimizers.Adam(tc.init_lr)
-        master_opt = chainermn.create_multi_node_optimizer(master_opt, comm)
+        if tc.allreduce == 'bucketed':
+            communicator = COMMUNICATOR.get(
+                tc.communicator, FlatCommunicator)(comm.mpi_comm)
+            master_opt = BucketedMultiNodeOptimizer(
+                master_opt, communicator,
+                bucket_size=tc.allreduce_bucket_size)
+        else:
+            master_opt = chainermn.create_multi_node_optimizer(
+                master_opt, comm)
         master_opt.setup(master_nnp)
         master_opt.add_hook(chainer.optimizer_hooks.Lasso(tc.l1_norm))
         master_opt.add_hook(chainer.optimizer_hooks.WeightDecay(tc.l2_norm))
 
-        for training, test in dataset:
-            tag = training.tag
-            properties = training.property.properties
+        _, kwargs = tc.loss_function
+        if tc.scatter_plot and tc.batch_mode != 'tag':
+            raise ValueError(
+                f'Scatter plot is not supported in "{tc.batch_mode}"'
+                f' batch mode.')
+        if tc.batch_mode == 'tag':
+            for training, test in dataset:
+                # iterators
+                train_iter = BatchIterator(
+                    training, tc.batch_size // MPI.size,
+                    repeat=True, shuffle=True)
+                test_iter = BatchIterator(
+                    test, tc.batch_size // MPI.size,
+                    repeat=False, shuffle=False)
+
+                # model
+                hdnnp = HighDimensionalNNP(
+                    training.elemental_composition,
+                    mc.n_input, mc.hidden_layers, mc.n_output)
+                hdnnp.sync_param_with(master_nnp)
+
+                # loss function
+                loss_function = self.loss_function(
+                    hdnnp, training.property.properties, **kwargs)
+
+                self.run_trainer(
+                    training.tag, train_iter, test_iter, hdnnp,
+                    loss_function.eval, loss_function.observation_keys,
+                    master_opt, comm, result,
+                    scatter_plot=(ScatterPlot(test, hdnnp, comm)
+                                  if tc.scatter_plot else None))
+
+        elif tc.batch_mode == 'interleave':
+            training_list, test_list = zip(*dataset)
+            compositions = {training.tag: training.elemental_composition
+                            for training in training_list}
 
             # iterators
-            train_iter = chainer.iterators.SerialIterator(
-                training, tc.batch_size // MPI.size, repeat=True, shuffle=True)
-            test_iter = chainer.iterators.SerialIterator(
-                test, tc.batch_size // MPI.size, repeat=False, shuffle=False)
+            train_iter = InterleavedIterator(
+                [BatchIterator(training, tc.batch_size // MPI.size,
+                               repeat=True, shuffle=True)
+                 for training in training_list],
+                repeat=True, shuffle=True)
+            test_iter = InterleavedIterator(
+                [BatchIterator(test, tc.batch_size // MPI.size,
+                               repeat=False, shuffle=False)
+                 for test in test_list],
+                repeat=False, shuffle=False)
 
             # model
-            hdnnp = HighDimensionalNNP(
-                training.elemental_composition,
-                mc.n_input, mc.hidden_layers, mc.n_output)
-            hdnnp.sync_param_with(master_nnp)
-            main_opt = chainer.Optimizer()
-            main_opt = chainermn.create_multi_node_optimizer(main_opt, comm)
-            main_opt.setup(hdnnp)
+            model = MultiCompositionNNP(
+                master_nnp, mc.n_input, mc.hidden_layers, mc.n_output)
 
             # loss function
-            _, kwargs = tc.loss_function
-            loss_function = self.loss_function(hdnnp, properties, **kwargs)
-            observation_keys = loss_function.observation_keys
-
-            # triggers
-            interval = (tc.interval, 'epoch')
-            stop_trigger = EarlyStoppingTrigger(
-                check_trigger=interval,
-                monitor=f'val/main/{observation_keys[-1]}',
-                patients=tc.patients, mode='min',
-                verbose=self.verbose, max_trigger=(tc.epoch, 'epoch'))
-
-            # updater and trainer
-            updater = Updater(train_iter,
-                              {'main': main_opt, 'master': master_opt},
-                              loss_func=loss_function.eval)
-            out_dir = tc.out_dir / tag
-            trainer = chainer.training.Trainer(updater, stop_trigger, out_dir)
-
-            # extensions
-            trainer.extend(ext.ExponentialShift('alpha', 1 - tc.lr_decay,
-                                                target=tc.final_lr,
-                                                optimizer=master_opt))
-            evaluator = chainermn.create_multi_node_evaluator(
-                ext.Evaluator(test_iter, hdnnp, eval_func=loss_function.eval),
-                comm)
-            trainer.extend(evaluator, name='val')
-            if tc.scatter_plot:
-                trainer.extend(ScatterPlot(test, hdnnp, comm),
-                               trigger=interval)
-            if MPI.rank == 0:
-                if tc.log_report:
-                    trainer.extend(ext.LogReport(log_name='training.log'))
-                if tc.print_report:
-                    trainer.extend(ext.PrintReport(
-                        ['epoch', 'iteration']
-                        + [f'main/{key}' for key in observation_keys]
-                        + [f'val/main/{key}' for key in observation_keys]))
-                if tc.plot_report:
-                    trainer.extend(ext.PlotReport(
-                        [f'main/{key}' for key in observation_keys],
-                        x_key='epoch', postprocess=set_log_scale,
-                        file_name='training_set.png', marker=None))
-                    trainer.extend(ext.PlotReport(
-                        [f'val/main/{key}' for key in observation_keys],
-                        x_key='epoch', postprocess=set_log_scale,
-                        file_name='validation_set.png', marker=None))
-
-            manager = Manager(tag, trainer, result, is_snapshot=True)
-            if self.is_resume:
-                manager.check_to_resume(self.resume_dir.name)
-            if manager.allow_to_run:
-                with manager:
-                    trainer.run()
+            loss_function = self.loss_function(
+                model, training_list[0].property.properties, **kwargs)
+
+            def loss_func(tag, **batch):
+                model.select(compositions[tag])
+                return loss_function.eval(**batch)
+
+            self.run_trainer(
+                'interleave', train_iter, test_iter, model,
+                loss_func, loss_function.observation_keys,
+                master_opt, comm, result)
+
+        elif tc.batch_mode == 'atom_list':
+            if self.loss_function.order['descriptor'] > 1:
+                raise ValueError(
+                    f'Loss function "{self.loss_function.name}" is not'
+                    f' supported in "atom_list" batch mode.')
+            training_list, test_list = zip(*dataset)
+
+            # iterators
+            train_iter = BatchIterator(
+                AtomListDataset(training_list, tc.elements),
+                tc.batch_size // MPI.size, repeat=True, shuffle=True)
+            test_iter = BatchIterator(
+                AtomListDataset(test_list, tc.elements),
+                tc.batch_size // MPI.size, repeat=False, shuffle=False)
+
+            # model
+            model = AtomListNNP(
+                tc.elements, mc.n_input, mc.hidden_layers, mc.n_output)
+            model.sync_param_with(master_nnp)
+
+            # loss function
+            loss_function = self.loss_function(
+                model, training_list[0].property.properties, **kwargs)
+
+            def loss_func(**batch):
+                model.set_atoms(batch.pop('atoms/element'),
+                                batch.pop('atoms/structure'))
+                return loss_function.eval(**batch)
+
+            self.run_trainer(
+                'atom_list', train_iter, test_iter, model,
+                loss_func, loss_function.observation_keys,
+                master_opt, comm, result)
 
         if MPI.rank == 0:
             chainer.serializers.save_npz(
@@ -273,6 +336,67 @@ class TrainingApplication(Application):
 
         return result
 
+    def run_trainer(self, tag, train_iter, test_iter, model, loss_func,
+                    observation_keys, master_opt, comm, result,
+                    scatter_plot=None):
+        tc = self.training_config
+
+        main_opt = chainer.Optimizer()
+        main_opt = chainermn.create_multi_node_optimizer(main_opt, comm)
+        main_opt.setup(model)
+
+        # triggers
+        interval = (tc.interval, 'epoch')
+        stop_trigger = EarlyStoppingTrigger(
+            check_trigger=interval,
+            monitor=f'val/main/{observation_keys[-1]}',
+            patients=tc.patients, mode='min',
+            verbose=self.verbose, max_trigger=(tc.epoch, 'epoch'))
+
+        # updater and trainer
+        updater = Updater(train_iter,
+                          {'main': main_opt, 'master': master_opt},
+                          converter=convert_batch,
+                          loss_func=loss_func)
+        out_dir = tc.out_dir / tag
+        trainer = chainer.training.Trainer(updater, stop_trigger, out_dir)
+
+        # extensions
+        trainer.extend(ext.ExponentialShift('alpha', 1 - tc.lr_decay,
+                                            target=tc.final_lr,
+                                            optimizer=master_opt))
+        evaluator = chainermn.create_multi_node_evaluator(
+            ext.Evaluator(test_iter, model, converter=convert_batch,
+                          eval_func=loss_func),
+            comm)
+        trainer.extend(evaluator, name='val')
+        if scatter_plot is not None:
+            trainer.extend(scatter_plot, trigger=interval)
+        if MPI.rank == 0:
+            if tc.log_report:
+                trainer.extend(ext.LogReport(log_name='training.log'))
+            if tc.print_report:
+                trainer.extend(ext.PrintReport(
+                    ['epoch', 'iteration']
+                    + [f'main/{key}' for key in observation_keys]
+                    + [f'val/main/{key}' for key in observation_keys]))
+            if tc.plot_report:
+                trainer.extend(ext.PlotReport(
+                    [f'main/{key}' for key in observation_keys],
+                    x_key='epoch', postprocess=set_log_scale,
+                    file_name='training_set.png', marker=None))
+                trainer.extend(ext.PlotReport(
+                    [f'val/main/{key}' for key in observation_keys],
+                    x_key='epoch', postprocess=set_log_scale,
+                    file_name='validation_set.png', marker=None))
+
+        manager = Manager(tag, trainer, result, is_snapshot=True)
+        if self.is_resume:
+            manager.check_to_resume(self.resume_dir.name)
+        if manager.allow_to_run:
+            with manager:
+                trainer.run()
+
     def dump_result(self, result):
         yaml.add_representer(pathlib.PosixPath, pyyaml_path_representer)
         result_file = self.training_config.out_dir / 'training_result.yaml'
@@ -3,11 +3,13 @@
 """Dataset tools subpackage for HDNNP."""
 
 __all__ = [
+    'AtomListDataset',
     'AtomicStructure',
     'DatasetGenerator',
     'HDNNPDataset',
     ]
 
+from hdnnpy.dataset.atom_list_dataset import AtomListDataset
 from hdnnpy.dataset.atomic_structure import AtomicStructure
 from hdnnpy.dataset.dataset_generator import DatasetGenerator
 from hdnnpy.dataset.hdnnp_dataset import HDNNPDataset
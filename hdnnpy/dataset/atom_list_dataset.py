@@ -0,0 +1,123 @@
+# coding: utf-8
+
+"""Concatenate HDNNP datasets of different elemental compositions
+into flattened atom lists."""
+
+import numpy as np
+
+
+class AtomListDataset(object):
+    """Concatenate HDNNP datasets of different elemental compositions
+    into flattened atom lists."""
+    def __init__(self, datasets, all_elements):
+        """
+        | It concatenates the data of ``datasets`` and makes a
+          mini-batch in which structures of different numbers of atoms
+          and elements are mixed.
+        | Atoms of all structures in a mini-batch are flattened into an
+          atom list and sorted by element, so that atoms of the same
+          element are contiguous. Each atom keeps the index of its
+          element in ``all_elements`` and the index of its structure in
+          the mini-batch.
+        | Derivative axes, whose sizes differ between structures, are
+          padded with zeros to the largest one in a mini-batch, and a
+          mask of valid elements is attached.
+
+        Notes:
+            Only 0th and 1st order datasets are supported.
+
+        Args:
+            datasets (list [HDNNPDataset]): Datasets to concatenate.
+            all_elements (list [str]):
+                All elements contained in ``datasets``. The order is
+                the same as that of `MasterNNP`.
+        """
+        assert len({dataset.n_input for dataset in datasets}) == 1
+        assert len({dataset.n_label for dataset in datasets}) == 1
+        self._datasets = list(datasets)
+        self._element_indices = [
+            np.array([all_elements.index(element)
+                      for element in dataset.elemental_composition])
+            for dataset in self._datasets]
+        self._offsets = np.cumsum([0] + [len(dataset)
+                                         for dataset in self._datasets])
+
+    def __len__(self):
+        """Total number of data of all datasets."""
+        return int(self._offsets[-1])
+
+    @property
+    def datasets(self):
+        """list [HDNNPDataset]: Concatenated datasets."""
+        return self._datasets
+
+    def get_batch(self, index):
+        """Return an atom list mini-batch.
+
+        Args:
+            index (~numpy.ndarray or slice):
+                Indices of data in concatenated order.
+
+        Returns:
+            dict [~numpy.ndarray]:
+            Mini-batch of the following items. ``N``, ``S`` and ``D``
+            are the numbers of atoms, structures and padded derivative
+            dimensions in the mini-batch.
+
+            * ``inputs/0``: ``(N, n_input)``
+            * ``inputs/1``: ``(N, n_input, D)``
+            * ``labels/0``: ``(S, n_label)``
+            * ``labels/1``: ``(S, n_label, D)``
+            * ``masks/1``: ``(S, D)``, 1 for valid derivatives
+            * ``atoms/element``: ``(N,)``, element index of each atom
+            * ``atoms/structure``: ``(N,)``, structure index of each atom
+        """
+        index = np.arange(len(self))[index]
+        which = np.searchsorted(self._offsets, index, side='right') - 1
+
+        batches = []
+        for i, dataset in enumerate(self._datasets):
+            local_index = index[which == i] - self._offsets[i]
+            if len(local_index) > 0:
+                batches.append((i, dataset.get_batch(local_index)))
+        order = max(int(key.split('/')[1]) for key in batches[0][1]
+                    if key.startswith('inputs/'))
+        assert order <= 1
+        n_deriv = max(len(self._element_indices[i]) * 3
+                      for i, _ in batches)
+
+        items = {key: [] for key in ['inputs/0', 'inputs/1', 'labels/0',
+                                     'labels/1', 'masks/1', 'atoms/element',
+                                     'atoms/structure']}
+        n_structure = 0
+        for i, batch in batches:
+            element_indices = self._element_indices[i]
+            n_sample, n_atom = batch['inputs/0'].shape[:2]
+            items['inputs/0'].append(batch['inputs/0'].reshape(
+                n_sample * n_atom, -1))
+            items['labels/0'].append(batch['labels/0'])
+            items['atoms/element'].append(np.tile(element_indices, n_sample))
+            items['atoms/structure'].append(
+                n_structure + np.repeat(np.arange(n_sample), n_atom))
+            if order >= 1:
+                pad = [(0, 0), (0, 0), (0, 0), (0, n_deriv - n_atom * 3)]
+                items['inputs/1'].append(np.pad(
+                    batch['inputs/1'], pad, 'constant').reshape(
+                        n_sample * n_atom, -1, n_deriv))
+                items['labels/1'].append(
+                    np.pad(batch['labels/1'], pad[1:], 'constant'))
+                mask = np.zeros((n_sample, n_deriv),
+                                dtype=batch['labels/1'].dtype)
+                mask[:, :n_atom * 3] = 1.0
+                items['masks/1'].append(mask)
+            n_structure += n_sample
+
+        items = {key: np.concatenate(value)
+                 for key, value in items.items() if value}
+        # sort atoms by element keeping the order of structures
+        sort_indices = np.argsort(items['atoms/element'], kind='mergesort')
+        for key in ['inputs/0', 'inputs/1', 'atoms/element',
+                    'atoms/structure']:
+            if key in items:
+                items[key] = items[key][sort_indices]
+        return items
@@ -2,6 +2,8 @@
 
 """Wrapper class of ase.Atoms."""
 
+import functools
+
 from ase.calculators.singlepoint import SinglePointCalculator
 import ase.io
 import ase.neighborlist
@@ -9,19 +11,39 @@ import chainer
 import chainer.functions as F
 import numpy as np
 
+from hdnnpy.utils import Precision
+
+
+TRIPLET_KEYS = [
+    'triplet_j', 'triplet_k', 'triplet_element_pair', 'triplet_pair_sum',
+    'triplet_cos', 'triplet_distance_ij', 'triplet_distance_ik',
+    'triplet_distance_jk',
+    ]
+"""list [str]: Geometry keys of pairs of neighbors ``j < k`` of each
+atom ``i`` used for angular descriptors."""
+
 
 class AtomicStructure(object):
     """Wrapper class of ase.Atoms."""
-    def __init__(self, atoms):
+    def __init__(self, atoms, skin=0.0):
         """
         | It wraps :obj:`ase.Atoms` object to define additional methods
           and attributes.
         | Before wrapping, it sorts atoms by element alphabetically.
         | It stores calculated neighbor information such as distance,
           indices.
+        | If ``skin`` is positive, neighbor lists are built with a
+          margin of ``skin`` and reused while positions of atoms are
+          updated slightly, e.g. between MD steps.
+        | Geometry of pairs of neighbors (triplets ``i, j, k``) for
+          angular descriptors is built once per cutoff distance when it
+          is first required, and shared by all parameter sets. See
+          :obj:`TRIPLET_KEYS` and :meth:`cache_nbytes`.
 
         Args:
             atoms (~ase.Atoms): an object to wrap.
+            skin (float, optional):
+                Margin of cutoff distance of reusable neighbor lists.
         """
         tags = atoms.get_chemical_symbols()
         deco = sorted([(tag, i) for i, tag in enumerate(tags)])
@@ -39,7 +61,9 @@ class AtomicStructure(object):
         self._atoms.set_calculator(
             SinglePointCalculator(self._atoms, **results))
 
+        self._skin = skin
         self._cache = {}
+        self._neighbor_lists = {}
 
     def __getattr__(self, item):
         return getattr(self._atoms, item)
@@ -52,13 +76,34 @@ class AtomicStructure(object):
 
     def __setstate__(self, state):
         self._atoms = state
+        self._skin = 0.0
         self._cache = {}
+        self._neighbor_lists = {}
 
     @property
     def elements(self):
         """list [str]: Elements included in a cell."""
         return sorted(set(self._atoms.get_chemical_symbols()))
 
+    def cache_nbytes(self):
+        """Return memory used by cached neighbor information.
+
+        Only arrays of cached data are counted, not computational
+        graphs retained for differentiation.
+
+        Returns:
+            dict [dict [int]]: Number of bytes for each cutoff distance
+            and geometry key.
+        """
+        def nbytes(value):
+            if isinstance(value, chainer.Variable):
+                return value.data.nbytes
+            return np.asarray(value).nbytes
+
+        return {cutoff_distance: {key: sum(nbytes(value) for value in values)
+                                  for key, values in cache.items()}
+                for cutoff_distance, cache in self._cache.items()}
+
     def clear_cache(self, cutoff_distance=None):
         """Clear up cached neighbor information in this instance.
 
@@ -93,8 +138,12 @@ class AtomicStructure(object):
         """
         ret = []
         for key in geometry_keys:
-            if (cutoff_distance not in self._cache
-                    or key not in self._cache[cutoff_distance]):
+            cache = self._cache.get(cutoff_distance, {})
+            if key in TRIPLET_KEYS and key not in cache:
+                if 'distance' not in cache:
+                    self._calculate_neighbors(cutoff_distance)
+                self._calculate_triplets(cutoff_distance)
+            elif key not in cache:
                 self._calculate_neighbors(cutoff_distance)
             ret.append(self._cache[cutoff_distance][key])
         for neighbor_info in zip(*ret):
@@ -117,6 +166,32 @@ class AtomicStructure(object):
         return [cls(atoms) for atoms
                 in ase.io.iread(str(file_path), index=':', format='xyz')]
 
+    @classmethod
+    def iread_xyz(cls, file_path, chunk_size):
+        """Read .xyz format file lazily and yield chunks of instances.
+
+        Unlike :meth:`read_xyz`, it holds at most ``chunk_size`` atomic
+        structures at once, so that it can handle arbitrarily long
+        trajectories with constant memory.
+
+        Args:
+            file_path (~pathlib.Path):
+                File path to read atomic structures.
+            chunk_size (int): Maximum number of instances in a chunk.
+
+        Returns:
+            Iterator [list [AtomicStructure]]:
+            Initialized instances bunched by ``chunk_size``.
+        """
+        chunk = []
+        for atoms in ase.io.iread(str(file_path), index=':', format='xyz'):
+            chunk.append(cls(atoms))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
     def _calculate_neighbors(self, cutoff_distance):
         """Calculate distance to one neighboring atom and store indices
         of neighboring atoms."""
@@ -125,8 +200,7 @@ class AtomicStructure(object):
         atomic_numbers = self._atoms.get_atomic_numbers()
         index_element_map = [elements.index(element) for element in symbols]
 
-        i_list, j_list, D_list = ase.neighborlist.neighbor_list(
-            'ijD', self._atoms, cutoff_distance)
+        i_list, j_list, D_list = self._get_neighbor_list(cutoff_distance)
 
         sort_indices = np.lexsort((j_list, i_list))
         i_list = i_list[sort_indices]
@@ -136,7 +210,7 @@ class AtomicStructure(object):
 
         i_indices = np.unique(i_list, return_index=True)[1]
         j_list = np.split(j_list, i_indices[1:])
-        distance_vector = [chainer.Variable(r.astype(np.float32))
+        distance_vector = [chainer.Variable(r.astype(Precision.compute))
                            for r in np.split(D_list, i_indices[1:])]
         distance = [F.sqrt(F.sum(r**2, axis=1)) for r in distance_vector]
         cutoff_function = [F.tanh(1.0 - R/cutoff_distance)**3
@@ -155,3 +229,97 @@ class AtomicStructure(object):
                 np.apply_along_axis(lambda x: atomic_numbers[x], 0, j)
                 for j in j_list],
             }
+
+    def _calculate_triplets(self, cutoff_distance):
+        """Calculate geometry of pairs of neighbors ``j < k`` of each
+        atom, and add it to cached neighbor information."""
+        cache = self._cache[cutoff_distance]
+        triplets = {key: [] for key in TRIPLET_KEYS}
+        for r, R, element_indices in zip(cache['distance_vector'],
+                                          cache['distance'],
+                                          cache['element_indices']):
+            j, k, element_pair, pair_sum = neighbor_triplets(
+                len(R), tuple(element_indices.tolist()), R.dtype)
+            triplets['triplet_j'].append(j)
+            triplets['triplet_k'].append(k)
+            triplets['triplet_element_pair'].append(element_pair)
+            triplets['triplet_pair_sum'].append(pair_sum)
+            triplets['triplet_cos'].append(
+                F.sum(r[j] * r[k], axis=1) / (R[j] * R[k]))
+            triplets['triplet_distance_ij'].append(R[j])
+            triplets['triplet_distance_ik'].append(R[k])
+            triplets['triplet_distance_jk'].append(
+                F.sqrt(F.sum((r[k] - r[j])**2, axis=1)))
+        cache.update(triplets)
+
+    def _get_neighbor_list(self, cutoff_distance):
+        """Return indices of atom pairs and distance vectors between
+        them, reusing cached neighbor list with skin if possible."""
+        if self._skin <= 0.0:
+            return ase.neighborlist.neighbor_list(
+                'ijD', self._atoms, cutoff_distance)
+
+        positions = self._atoms.get_positions()
+        cell = np.array(self._atoms.get_cell())
+        cached = self._neighbor_lists.get(cutoff_distance)
+        if (cached is None
+                or cached['positions'].shape != positions.shape
+                or not np.array_equal(cached['cell'], cell)
+                or np.max(np.linalg.norm(positions - cached['positions'],
+                                         axis=1)) > self._skin / 2):
+            i_list, j_list, S_list = ase.neighborlist.neighbor_list(
+                'ijS', self._atoms, cutoff_distance + self._skin)
+            cached = {
+                'positions': positions,
+                'cell': cell,
+                'i': i_list,
+                'j': j_list,
+                'S': S_list,
+                }
+            self._neighbor_lists[cutoff_distance] = cached
+
+        i_list, j_list = cached['i'], cached['j']
+        D_list = positions[j_list] - positions[i_list] + cached['S'] @ cell
+        mask = np.linalg.norm(D_list, axis=1) < cutoff_distance
+        return i_list[mask], j_list[mask], D_list[mask]
+
+
+@functools.lru_cache(maxsize=256)
+def neighbor_triplets(n_neighbor, element_indices, dtype):
+    """Index pairs of neighbors of an atom for angular descriptors.
+
+    | Neighbors are sorted by element, and ``element_indices`` are the
+      first indices of each element, as cached in
+      :class:`AtomicStructure`.
+    | The result depends only on the arguments, so that it is shared
+      between atoms and structures.
+
+    Args:
+        n_neighbor (int): Number of neighbors of an atom.
+        element_indices (tuple [int]):
+            First index of neighbors of each element.
+        dtype (~numpy.dtype): Data type of the summation matrix.
+
+    Returns:
+        tuple: 4-element tuple containing:
+
+        - j (~numpy.ndarray): Indices of the first neighbors.
+        - k (~numpy.ndarray): Indices of the second neighbors,
+          satisfying ``j < k``.
+        - element_pair (~numpy.ndarray):
+          Index of element pair of each pair of neighbors, ordered
+          like :func:`itertools.combinations_with_replacement`.
+        - pair_sum (~numpy.ndarray):
+          Matrix which sums up terms of all pairs of neighbors for each
+          element pair.
+    """
+    n_element = len(element_indices)
+    j, k = np.triu_indices(n_neighbor, k=1)
+    element = np.searchsorted(
+        element_indices, np.arange(n_neighbor), side='right') - 1
+    a = element[j]
+    b = element[k]
+    element_pair = a*n_element - a*(a-1)//2 + (b-a)
+    pair_sum = np.zeros((len(j), n_element*(n_element+1)//2), dtype=dtype)
+    pair_sum[np.arange(len(j)), element_pair] = 1.0
+    return j, k, element_pair, pair_sum
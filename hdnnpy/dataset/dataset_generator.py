@@ -48,7 +48,8 @@ class DatasetGenerator(object):
         Returns:
             list [tuple [HDNNPDataset, HDNNPDataset]]:
             All stored dataset split by specified ratio into training
-            and test data.
+            and test data. They are views which share arrays with the
+            stored dataset.
         """
         split = []
         for dataset in self._datasets:
@@ -4,8 +4,12 @@
 
 __all__ = [
     'DESCRIPTOR_DATASET',
+    'DescriptorLibrary',
+    'select_parameters',
     ]
 
+from hdnnpy.dataset.descriptor.descriptor_library import DescriptorLibrary
+from hdnnpy.dataset.descriptor.parameter_selection import select_parameters
 from hdnnpy.dataset.descriptor.symmetry_function_dataset import (
     SymmetryFunctionDataset)
 from hdnnpy.dataset.descriptor.weighted_symmetry_function_dataset import (
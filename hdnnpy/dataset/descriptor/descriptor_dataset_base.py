@@ -11,7 +11,10 @@ from abc import (ABC, abstractmethod)
 import numpy as np
 from tqdm import tqdm
 
-from hdnnpy.utils import (MPI, pprint, recv_chunk, send_chunk)
+from hdnnpy.format.chunked import (ChunkedArray, is_chunked, load_chunked,
+                                   save_chunked)
+from hdnnpy.format.sharded import (ShardedStore, is_sharded, save_sharded)
+from hdnnpy.utils import (MPI, Precision, pprint, recv_chunk, send_chunk)
 
 
 class DescriptorDatasetBase(ABC):
@@ -36,12 +39,13 @@ class DescriptorDatasetBase(ABC):
         self._elemental_composition = structures[0].get_chemical_symbols()
         self._elements = sorted(set(self._elemental_composition))
         self._length = len(structures)
-        self._slices = [slice(i[0], i[-1]+1)
+        self._slices = [slice(i[0], i[-1]+1) if len(i) else slice(0, 0)
                         for i in np.array_split(range(self._length), MPI.size)]
         self._structures = structures[self._slices[MPI.rank]]
         self._tag = structures[0].info['tag']
         self._dataset = []
         self._feature_keys = []
+        self._partial = None
 
     def __getitem__(self, item):
         """Return descriptor data this instance has.
@@ -115,11 +119,27 @@ class DescriptorDatasetBase(ABC):
         """Clear up instance variables to initial state."""
         self._dataset.clear()
         self._feature_keys.clear()
+        self._partial = None
 
-    def load(self, file_path, verbose=True, remake=False):
-        """Load dataset from .npz format file.
+    def load(self, file_path, verbose=True, remake=False,
+             chunk_size=64, max_cached=None):
+        """Load dataset from .npz format file or sharded store.
 
-        Only root MPI process load dataset.
+        | Only root MPI process load dataset from .npz format file.
+        | From a sharded store, each MPI process reads its own block of
+          samples in parallel, and they are gathered into root MPI
+          process.
+
+        If dataset is saved with ``columnar=True``, only the feature
+        columns in use are read.
+
+        A chunked compressed file written with ``codec`` is also
+        loaded. If no feature key is dropped and the stored precision
+        is kept, its descriptors are not decompressed at once, but
+        sample blocks are read on demand.
+        However, if any pre-processing is applied in
+        :meth:`HDNNPDataset.construct`, the whole descriptors are
+        decompressed there, and the compression only saves disk space.
 
         It validates following compatibility between loaded dataset and
         atomic structures given at initialization.
@@ -135,12 +155,21 @@ class DescriptorDatasetBase(ABC):
             * order
 
         Args:
-            file_path (~pathlib.Path): File path to load dataset.
+            file_path (~pathlib.Path):
+                File path or directory path of sharded store to load
+                dataset.
             verbose (bool, optional): Print log to stdout.
             remake (bool, optional): If loaded dataset is lacking in
                 any feature key or any descriptor, recalculate dataset
                 from scratch and overwrite it to ``file_path``.
                 Otherwise, it raises ValueError.
+            chunk_size (int, optional):
+                Number of samples in a compressed block, used if the
+                recalculated dataset is saved with a codec.
+            max_cached (int, optional):
+                Maximum number of decompressed blocks cached for each
+                descriptor of a chunked compressed file. See
+                :class:`~hdnnpy.format.chunked.ChunkedArray`.
 
         Raises:
             AssertionError: If loaded dataset is incompatible with
@@ -149,17 +178,35 @@ class DescriptorDatasetBase(ABC):
                 or any descriptor and ``remake=False``.
         """
         # validate compatibility between my structures and loaded dataset
-        ndarray = np.load(file_path)
-        assert list(ndarray['elemental_composition']) \
+        sharded = is_sharded(file_path)
+        if sharded:
+            ndarray = ShardedStore(file_path)
+            info = ndarray.info
+            codec = ndarray.codec
+        elif is_chunked(file_path):
+            ndarray = info = load_chunked(file_path, max_cached=max_cached)
+            codec = ndarray.codec
+        else:
+            ndarray = info = np.load(file_path)
+            codec = None
+        columnar = 'columnar' in info and bool(info['columnar'])
+        if sharded:
+            length = len(ndarray)
+        elif columnar:
+            length = len(ndarray[f'{self._descriptors[0]}/0'])
+        else:
+            length = len(ndarray[self._descriptors[0]])
+        assert list(info['elemental_composition']) \
                == self._elemental_composition
-        assert list(ndarray['elements']) == self._elements
-        assert ndarray['tag'].item() == self._tag
-        assert len(ndarray[self._descriptors[0]]) == len(self)
+        assert list(info['elements']) == self._elements
+        assert str(info['tag']) == self._tag
+        assert length == len(self)
 
         # validate lacking feature keys
-        loaded_keys = list(ndarray['feature_keys'])
+        loaded_keys = list(info['feature_keys'])
         lacking_keys = set(self._feature_keys) - set(loaded_keys)
-        lacking_descriptors = set(self._descriptors) - set(ndarray)
+        lacking_descriptors = (set(self._descriptors)
+                               - {key.split('/')[0] for key in ndarray})
         if lacking_keys or lacking_descriptors:
             if verbose and lacking_keys:
                 lacking = ('\n'+' '*20).join(sorted(lacking_keys))
@@ -176,33 +223,63 @@ class DescriptorDatasetBase(ABC):
             if remake:
                 if verbose:
                     pprint('Start to recalculate dataset from scratch.')
-                self.make(verbose=verbose)
-                self.save(file_path, verbose=verbose)
+                self.make(verbose=verbose, keep_partial=sharded)
+                self.save(file_path, verbose=verbose, codec=codec,
+                          chunk_size=chunk_size, sharded=sharded,
+                          columnar=columnar)
                 return
             else:
                 raise ValueError('Please recalculate dataset from scratch.')
 
         # load dataset as much as needed
-        if MPI.rank == 0:
+        indices = np.array([loaded_keys.index(key)
+                            for key in self._feature_keys])
+        if sharded:
+            # each MPI process reads its own block of samples
+            partial = []
+            block = self._slices[MPI.rank]
+            if block.stop > block.start:
+                for i in range(self._order + 1):
+                    data = self._select_features(
+                        lambda keys: ndarray.read(
+                            keys, block.start, block.stop),
+                        self._descriptors[i], indices, columnar)
+                    partial.append(data.astype(
+                        Precision.storage_dtype(i), copy=False))
+            self._gather(partial)
+        elif MPI.rank == 0:
             for i in range(self._order + 1):
-                indices = np.array([loaded_keys.index(key)
-                                    for key in self._feature_keys])
-                data = np.take(ndarray[self._descriptors[i]], indices, axis=2)
-                self._dataset.append(data)
+                dtype = Precision.storage_dtype(i)
+                if not columnar:
+                    data = ndarray[self._descriptors[i]]
+                    if (isinstance(data, ChunkedArray) and data.dtype == dtype
+                            and np.array_equal(
+                                indices, range(data.shape[2]))):
+                        self._dataset.append(data)
+                        continue
+                data = self._select_features(
+                    lambda keys: [ndarray[key] for key in keys],
+                    self._descriptors[i], indices, columnar)
+                self._dataset.append(data.astype(dtype, copy=False))
 
         if verbose:
             pprint(f'Successfully loaded & made needed {self.name} dataset'
                    f' from {file_path}')
 
-    def make(self, verbose=True):
+    def make(self, verbose=True, keep_partial=False):
         """Calculate & retain descriptor dataset
 
         | It calculates descriptor dataset by data-parallel using MPI
           communication.
         | The calculated dataset is retained in only root MPI process.
+          If ``keep_partial=True``, each MPI process also keeps its own
+          block of samples until it is saved to a sharded store.
 
         Args:
             verbose (bool, optional): Print log to stdout.
+            keep_partial (bool, optional):
+                If True, keep the block of samples each MPI process
+                calculated for :meth:`save` with ``sharded=True``.
         """
         dataset = []
         for structure in tqdm(self._structures,
@@ -210,32 +287,46 @@ class DescriptorDatasetBase(ABC):
                               leave=False, position=MPI.rank):
             dataset.append(self.calculate_descriptors(structure))
 
-        for data_list in zip(*dataset):
-            shape = data_list[0].shape
-            send_data = np.stack(data_list)
-            del data_list
+        partial = []
+        for order, data_list in enumerate(zip(*dataset)):
+            partial.append(np.stack(data_list)
+                           .astype(Precision.storage_dtype(order)))
+        del dataset
+        self._gather(partial)
+        if keep_partial:
             if MPI.rank == 0:
-                recv_data = np.empty((self._length, *shape), dtype=np.float32)
-                recv_data[self._slices[0]] = send_data
-                del send_data
-                for i in range(1, MPI.size):
-                    recv_data[self._slices[i]] = recv_chunk(source=i)
-                self._dataset.append(recv_data)
-            else:
-                send_chunk(send_data, dest=0)
-                del send_data
+                partial = [data[self._slices[0]] for data in self._dataset]
+            self._partial = partial
 
         if verbose:
             pprint(f'Calculated {self.name} dataset.')
 
-    def save(self, file_path, verbose=True):
-        """Save dataset to .npz format file.
+    def save(self, file_path, verbose=True, codec=None, chunk_size=64,
+             sharded=False, columnar=False):
+        """Save dataset to .npz format file or sharded store.
 
-        Only root MPI process save dataset.
+        | Only root MPI process save dataset to .npz format file.
+        | If ``sharded=True``, each MPI process saves the block of
+          samples it calculated by :meth:`make` with
+          ``keep_partial=True`` to its own shard in parallel. Otherwise,
+          root MPI process saves the whole dataset as a single shard.
 
         Args:
             file_path (~pathlib.Path): File path to save dataset.
             verbose (bool, optional): Print log to stdout.
+            codec (str, optional):
+                If specified, each descriptor is split into blocks of
+                ``chunk_size`` samples and compressed with this codec.
+                See :obj:`~hdnnpy.format.chunked.CODECS`.
+            chunk_size (int, optional):
+                Number of samples in a compressed block.
+            sharded (bool, optional):
+                If True, ``file_path`` is a directory of sharded store.
+                See :mod:`hdnnpy.format.sharded`.
+            columnar (bool, optional):
+                If True, each feature column of descriptors is saved as
+                a separate array, so that a subset of feature keys can
+                be loaded without reading the others.
 
         Raises:
             RuntimeError: If this instance do not have any data.
@@ -245,19 +336,88 @@ class DescriptorDatasetBase(ABC):
             Cannot save dataset, since this dataset does not have any data.
             ''')
 
-        if MPI.rank == 0:
-            data = {descriptor: data for descriptor, data
-                    in zip(self._descriptors, self._dataset)}
-            info = {
-                'elemental_composition': self._elemental_composition,
-                'elements': self._elements,
-                'feature_keys': self._feature_keys,
-                'tag': self._tag,
-                }
-            np.savez(file_path, **data, **info)
+        info = {
+            'elemental_composition': self._elemental_composition,
+            'elements': self._elements,
+            'feature_keys': self._feature_keys,
+            'tag': self._tag,
+            }
+        if columnar:
+            info['columnar'] = True
+        if sharded:
+            if self._partial is not None:
+                partial = self._partial
+                start = self._slices[MPI.rank].start
+            else:
+                partial = self._dataset
+                start = 0
+            save_sharded(file_path, self._split_features(partial, columnar),
+                         start, MPI.comm, info=info,
+                         codec=codec, chunk_size=chunk_size)
+        elif MPI.rank == 0:
+            data = self._split_features(self._dataset, columnar)
+            if codec is None:
+                np.savez(file_path, **data, **info)
+            else:
+                save_chunked(file_path, data, info=info,
+                             codec=codec, chunk_size=chunk_size)
+        self._partial = None
         if verbose:
             pprint(f'Successfully saved {self.name} dataset to {file_path}.')
 
+    def set_dataset(self, dataset):
+        """Set descriptor dataset calculated or loaded outside of this
+        instance, e.g. by
+        :class:`~hdnnpy.dataset.descriptor.descriptor_library.DescriptorLibrary`.
+
+        Only root MPI process retains dataset.
+
+        Args:
+            dataset (list [~numpy.ndarray]):
+                Descriptors for each derivative order. Their feature
+                dimension has to be in the order of ``feature_keys``.
+        """
+        if MPI.rank == 0:
+            assert len(dataset) == self._order + 1
+            assert all(len(data) == self._length for data in dataset)
+            self._dataset = [data.astype(Precision.storage_dtype(i),
+                                         copy=False)
+                             for i, data in enumerate(dataset)]
+
+    def _gather(self, partial):
+        """Gather blocks of samples which each MPI process has into
+        root MPI process."""
+        for data in partial:
+            if MPI.rank == 0:
+                recv_data = np.empty((self._length, *data.shape[1:]),
+                                     dtype=data.dtype)
+                recv_data[self._slices[0]] = data
+                for i in range(1, MPI.size):
+                    # processes which have no structure send nothing
+                    if self._slices[i].stop > self._slices[i].start:
+                        recv_data[self._slices[i]] = recv_chunk(source=i)
+                self._dataset.append(recv_data)
+            else:
+                send_chunk(data, dest=0)
+
+    @staticmethod
+    def _select_features(read, descriptor, indices, columnar):
+        """Read a descriptor with feature columns of ``indices`` by
+        a function which reads arrays of given keys."""
+        if columnar:
+            columns = read([f'{descriptor}/{k}' for k in indices])
+            return np.stack(columns, axis=2)
+        return np.take(read([descriptor])[0], indices, axis=2)
+
+    def _split_features(self, dataset, columnar):
+        """Make a dict of arrays to save, splitting each descriptor
+        into feature columns if ``columnar=True``."""
+        if not columnar:
+            return dict(zip(self._descriptors, dataset))
+        return {f'{descriptor}/{k}': data[:, :, k]
+                for descriptor, data in zip(self._descriptors, dataset)
+                for k in range(data.shape[2])}
+
     @abstractmethod
     def calculate_descriptors(self, structure):
         """Calculate required descriptors for a structure data.
@@ -0,0 +1,187 @@
+# coding: utf-8
+
+"""Library of precomputed descriptor datasets shared across training
+runs."""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from hdnnpy.utils import (MPI, Precision, pprint)
+
+
+class DescriptorLibrary(object):
+    """Library of precomputed descriptor datasets shared across training
+    runs."""
+    def __init__(self, root):
+        """
+        | Descriptors are stored per set of atomic structures and per
+          parameter set of each function, i.e. the feature columns of
+          all element combinations which share the same parameters.
+        | The layout is
+          ``<root>/<descriptor name>/<structures hash>/<storage dtypes>/<function>_<parameters>.npz``,
+          and each file has the descriptors of every derivative order it
+          was calculated with, and their feature keys.
+        | ``<storage dtypes>`` is like ``float32_float16``, the dtypes of
+          0th order and derivative descriptors of the precision policy,
+          so that descriptors stored in lower precision are not reused
+          by a training run of higher precision.
+        | A training run whose parameters overlap with those already in
+          the library calculates only the lacking parameter sets.
+
+        Args:
+            root (~pathlib.Path): Directory path of the library.
+        """
+        self._root = Path(root)
+
+    def load(self, descriptor, structures, verbose=True):
+        """Load descriptor dataset from the library.
+
+        Lacking parameter sets are calculated and added to the library
+        by :meth:`update` beforehand.
+        Only root MPI process load dataset.
+
+        Args:
+            descriptor (DescriptorDatasetBase):
+                Descriptor dataset to load. It has to have ``params``
+                attribute like
+                :class:`~hdnnpy.dataset.descriptor.symmetry_function_dataset.SymmetryFunctionDataset`.
+            structures (list [AtomicStructure]):
+                Atomic structures given to ``descriptor`` at
+                initialization.
+            verbose (bool, optional): Print log to stdout.
+        """
+        self.update(descriptor, structures, verbose=verbose)
+
+        if MPI.rank == 0:
+            directory = self._directory(descriptor, structures)
+            feature_keys = []
+            columns = [[] for _ in range(descriptor.order + 1)]
+            for name, params in self._parameter_sets(descriptor):
+                with np.load(str(directory / self._file_name(name, params))
+                             ) as ndarray:
+                    feature_keys.extend(ndarray['feature_keys'])
+                    for i, key in enumerate(descriptor.descriptors):
+                        columns[i].append(ndarray[key])
+            # parameters in feature keys may be formatted differently
+            # from those of the run which calculated them
+            assert ([key.split(':')[-1] for key in feature_keys]
+                    == [key.split(':')[-1] for key in descriptor.feature_keys])
+            descriptor.set_dataset(
+                [np.concatenate(data, axis=2) for data in columns])
+
+        if verbose:
+            pprint(f'Successfully loaded {descriptor.name} dataset'
+                   f' from library {self._root}.')
+
+    def update(self, descriptor, structures, verbose=True):
+        """Calculate parameter sets lacking in the library and add them.
+
+        Lacking parameter sets are calculated together by data-parallel
+        using MPI communication, and root MPI process saves them.
+
+        Args:
+            descriptor (DescriptorDatasetBase):
+                Descriptor dataset whose parameter sets are added.
+            structures (list [AtomicStructure]):
+                Atomic structures given to ``descriptor`` at
+                initialization.
+            verbose (bool, optional): Print log to stdout.
+
+        Returns:
+            int: Number of calculated parameter sets.
+        """
+        directory = self._directory(descriptor, structures)
+        lacking = None
+        if MPI.rank == 0:
+            lacking = [(name, params) for name, params
+                       in self._parameter_sets(descriptor)
+                       if not self._exists(directory / self._file_name(
+                           name, params), descriptor.descriptors)]
+        lacking = MPI.comm.bcast(lacking, root=0)
+        if not lacking:
+            return 0
+
+        if verbose:
+            pprint(f'Calculate {len(lacking)} parameter sets of'
+                   f' {descriptor.name} lacking in library {self._root}.')
+        func_param_map = {}
+        for name, params in lacking:
+            func_param_map.setdefault(name, []).append(params)
+        calculator = descriptor.__class__(
+            descriptor.order, structures, **func_param_map)
+        calculator.make(verbose=verbose)
+
+        if MPI.rank == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+            calculated_keys = calculator.feature_keys
+            for name, params in lacking:
+                feature_keys = descriptor.__class__(
+                    descriptor.order, structures[:1],
+                    **{name: [params]}).feature_keys
+                indices = [calculated_keys.index(key) for key in feature_keys]
+                data = {key: np.take(calculator[key], indices, axis=2)
+                        for key in calculator.descriptors}
+                # write to a temporary file first not to expose
+                # incomplete file to other training runs
+                file_path = directory / self._file_name(name, params)
+                temporary = directory / f'.{os.getpid()}.{file_path.name}'
+                np.savez(str(temporary), feature_keys=feature_keys, **data)
+                temporary.replace(file_path)
+        calculator.clear()
+        MPI.comm.Barrier()
+        return len(lacking)
+
+    def _directory(self, descriptor, structures):
+        """Directory path for a set of atomic structures and the
+        current precision policy."""
+        dtypes = '_'.join(np.dtype(Precision.storage_dtype(order)).name
+                          for order in [0, 1])
+        return (self._root / descriptor.name
+                / self.structures_hash(structures) / dtypes)
+
+    @staticmethod
+    def _exists(file_path, descriptors):
+        """Check if a file has all of the descriptors."""
+        if not file_path.exists():
+            return False
+        with np.load(str(file_path)) as ndarray:
+            return set(descriptors) <= set(ndarray.files)
+
+    @staticmethod
+    def _file_name(name, params):
+        """File name of a parameter set of a function. Parameters are
+        normalized to float, so that e.g. ``5`` and ``5.0`` share the
+        same file."""
+        return '_'.join([name, *[str(float(p)) for p in params]]) + '.npz'
+
+    @staticmethod
+    def _parameter_sets(descriptor):
+        """Parameter sets of each function in the order of feature
+        keys."""
+        return [(name, tuple(params))
+                for name, params_set in descriptor.params.items()
+                for params in params_set]
+
+    @staticmethod
+    def structures_hash(structures):
+        """Hash of a set of atomic structures.
+
+        Args:
+            structures (list [AtomicStructure]): Atomic structures.
+
+        Returns:
+            str: Hash determined by tag, elemental composition,
+            positions, cell and periodic boundary condition of all
+            structures in the given order.
+        """
+        sha1 = hashlib.sha1()
+        sha1.update(structures[0].info['tag'].encode())
+        for structure in structures:
+            sha1.update(' '.join(structure.get_chemical_symbols()).encode())
+            sha1.update(np.ascontiguousarray(structure.positions).tobytes())
+            sha1.update(np.ascontiguousarray(structure.cell).tobytes())
+            sha1.update(np.ascontiguousarray(structure.pbc).tobytes())
+        return sha1.hexdigest()[:16]
@@ -0,0 +1,148 @@
+# coding: utf-8
+
+"""Select informative parameter sets of descriptor dataset."""
+
+import numpy as np
+
+from hdnnpy.utils import Precision
+
+
+def select_parameters(descriptors, all_elements, n_select=None,
+                      threshold=0.99, max_rows=20000, seed=0,
+                      order=0, costs=None):
+    """Select informative parameter sets from calculated descriptors.
+
+    | Feature columns of all atoms are standardized, and parameter sets
+      are selected greedily like pivoted QR decomposition (farthest
+      point sampling over feature columns): a parameter set which has
+      the column least explained by those already selected is selected
+      next, and all of its columns are projected out of the others.
+    | Near-constant columns are never selected, and selection stops
+      when every column is correlated with the selected ones more than
+      ``threshold`` (multiple correlation coefficient) or ``n_select``
+      parameter sets are selected.
+
+    Args:
+        descriptors (list [DescriptorDatasetBase]):
+            Descriptor datasets which have data, calculated with the
+            same class and parameters for each tag. Only ``0``-th order
+            descriptors are used.
+        all_elements (list [str]): All elements of the datasets.
+        n_select (int, optional):
+            Maximum number of parameter sets to select.
+        threshold (float, optional):
+            Columns correlated with the selected ones more than this are
+            regarded as redundant.
+        max_rows (int, optional):
+            Maximum number of atoms sampled randomly to calculate
+            correlation.
+        seed (int, optional): Seed of random sampling of atoms.
+        order (int, optional):
+            Derivative order of descriptors used for training. Memory
+            of descriptors up to this order is reported.
+        costs (dict [float], optional):
+            Relative calculation cost of a parameter set for each type
+            of function. Unspecified ones are regarded as ``1.0``.
+
+    Returns:
+        tuple: 2-element tuple containing:
+
+        - func_param_map (dict [list [tuple]]):
+            Selected parameter sets for each type of function in the
+            original order.
+        - report (dict):
+            Number of parameter sets and features, calculation cost
+            weighted by ``costs`` and memory of descriptors up to
+            ``order`` before and after selection, and number of
+            parameter sets for each type of function.
+    """
+    descriptor = descriptors[0]
+    parameter_sets = [(name, tuple(params))
+                      for name, params_set in descriptor.params.items()
+                      for params in params_set]
+    group_keys = [':'.join([name, '/'.join(map(str, params))])
+                  for name, params in parameter_sets]
+    feature_keys = descriptor.generate_feature_keys(all_elements)
+    groups = np.array([group_keys.index(':'.join(key.split(':')[:2]))
+                       for key in feature_keys])
+
+    # sample atoms of all datasets before expanding feature dimension
+    shapes = [dataset[dataset.descriptors[0]].shape for dataset in descriptors]
+    offsets = np.cumsum([0] + [n_sample * n_atom
+                               for n_sample, n_atom, _ in shapes])
+    rows = np.arange(offsets[-1])
+    if len(rows) > max_rows:
+        rows = np.sort(np.random.RandomState(seed).choice(
+            len(rows), max_rows, replace=False))
+
+    # stack feature columns of sampled atoms in expanded feature dimension
+    X = np.zeros((len(rows), len(feature_keys)))
+    for dataset, (_, n_atom, _), start, stop in zip(
+            descriptors, shapes, offsets[:-1], offsets[1:]):
+        indices = np.flatnonzero((start <= rows) & (rows < stop))
+        samples, atoms = np.divmod(rows[indices] - start, n_atom)
+        columns = [feature_keys.index(key) for key in dataset.feature_keys]
+        data = dataset[dataset.descriptors[0]]
+        # read a limited number of samples at once
+        for i in range(0, len(indices), 256):
+            block = slice(i, i+256)
+            X[np.ix_(indices[block], columns)] = data[samples[block]][
+                np.arange(len(samples[block])), atoms[block]]
+
+    # standardize columns, and exclude near-constant ones
+    X -= X.mean(axis=0)
+    norm = np.linalg.norm(X, axis=0)
+    valid = norm > 1e-8 * max(norm.max(), 1.0)
+    X[:, valid] /= norm[valid]
+    X[:, ~valid] = 0.0
+
+    # greedy selection of parameter sets by residual norm of columns
+    min_residual = np.sqrt(1.0 - threshold**2)
+    if n_select is None:
+        n_select = len(parameter_sets)
+    selected = []
+    residual = np.where(valid, 1.0, 0.0)
+    while len(selected) < n_select:
+        pivot = np.argmax(residual)
+        if residual[pivot] <= min_residual:
+            break
+        group = groups[pivot]
+        selected.append(group)
+        for j in np.flatnonzero(groups == group):
+            norm = np.linalg.norm(X[:, j])
+            if norm <= min_residual:
+                continue
+            q = X[:, j] / norm
+            X -= np.outer(q, q @ X)
+        residual = np.linalg.norm(X, axis=0)
+
+    func_param_map = {}
+    for name, params in [parameter_sets[i] for i in sorted(selected)]:
+        func_param_map.setdefault(name, []).append(params)
+
+    is_selected = np.isin(groups, selected)
+    memory = [0, 0]
+    for dataset, (n_sample, n_atom, n_feature) in zip(descriptors, shapes):
+        n_kept = sum(is_selected[feature_keys.index(key)]
+                     for key in dataset.feature_keys)
+        # derivatives have an axis of 3 * n_atom for each order
+        for i in range(order + 1):
+            nbytes = (n_sample * n_atom * (3*n_atom)**i
+                      * np.dtype(Precision.storage_dtype(i)).itemsize)
+            memory[0] += nbytes * n_feature
+            memory[1] += nbytes * n_kept
+    if costs is None:
+        costs = {}
+    cost = [sum(costs.get(name, 1.0) for name, _ in parameter_sets),
+            sum(costs.get(parameter_sets[i][0], 1.0) for i in selected)]
+    n_parameter_set = {
+        name: (len(params_set), len(func_param_map.get(name, [])))
+        for name, params_set in descriptor.params.items()}
+    report = {
+        'n_parameter_set': (len(parameter_sets), len(selected)),
+        'n_feature': (len(feature_keys), int(is_selected.sum())),
+        'cost': tuple(cost),
+        'memory': tuple(memory),
+        'per_function': n_parameter_set,
+        }
+    return func_param_map, report
@@ -199,27 +199,22 @@ class SymmetryFunctionDataset(DescriptorDatasetBase):
 
     @differentiate
     def _symmetry_function_type4(self, structure, Rc, eta, lambda_, zeta):
-        """Symmetry function type4 for specific parameters."""
+        """Symmetry function type4 for specific parameters.
+
+        Angular terms are calculated only for pairs of neighbors
+        ``j < k`` cached in ``structure``, and summed up for each
+        element pair at once.
+        """
         G = []
-        for r, R, fc, element_indices in structure.get_neighbor_info(
-                Rc, ['distance_vector', 'distance', 'cutoff_function',
-                     'element_indices']):
-            cos = (r/F.expand_dims(R, axis=1)) @ (r.T/R)
+        for R, fc, j, k, cos, pair_sum in structure.get_neighbor_info(
+                Rc, ['distance', 'cutoff_function', 'triplet_j',
+                     'triplet_k', 'triplet_cos', 'triplet_pair_sum']):
             if zeta == 1:
                 ang = (1.0 + lambda_*cos)
             else:
                 ang = (1.0 + lambda_*cos) ** zeta
-            g = (2.0 ** (1-zeta)
-                 * ang
-                 * F.expand_dims(F.exp(-eta*R**2) * fc, axis=1)
-                 * F.expand_dims(F.exp(-eta*R**2) * fc, axis=0))
-            triu = np.triu(np.ones_like(cos.data), k=1)
-            g = F.where(triu.astype(np.bool), g, triu)
-            g = [F.sum(g__)
-                 for j, g_
-                 in enumerate(F.split_axis(g, element_indices[1:], axis=0))
-                 for k, g__
-                 in enumerate(F.split_axis(g_, element_indices[1:], axis=1))
-                 if j <= k]
-            G.append(g)
+            radial = F.exp(-eta*R**2) * fc
+            g = 2.0 ** (1-zeta) * ang * radial[j] * radial[k]
+            g = F.matmul(F.expand_dims(g, axis=0), pair_sum)
+            G.append(F.separate(g[0]))
         return list(zip(*G))
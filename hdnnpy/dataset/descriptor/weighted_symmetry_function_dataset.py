@@ -176,22 +176,23 @@ class WeightedSymmetryFunctionDataset(DescriptorDatasetBase):
     @differentiate
     def _weighted_symmetry_function_type4(
             self, structure, Rc, eta, lambda_, zeta):
-        """Weighted symmetry function type4 for specific parameters."""
+        """Weighted symmetry function type4 for specific parameters.
+
+        Angular terms are calculated only for pairs of neighbors
+        ``j < k`` cached in ``structure``.
+        """
         G = []
-        for z, r, R, fc in structure.get_neighbor_info(
-                Rc, ['atomic_number', 'distance_vector', 'distance',
-                     'cutoff_function']):
-            cos = (r/F.expand_dims(R, axis=1)) @ (r.T/R)
+        for z, R, fc, j, k, cos in structure.get_neighbor_info(
+                Rc, ['atomic_number', 'distance', 'cutoff_function',
+                     'triplet_j', 'triplet_k', 'triplet_cos']):
             if zeta == 1:
                 ang = (1.0 + lambda_*cos)
             else:
                 ang = (1.0 + lambda_*cos) ** zeta
+            radial = F.exp(-eta*R**2) * fc
             g = (2.0 ** (1-zeta)
-                 * z[:, None] * z[None, :]
+                 * (z[j] * z[k]).astype(R.dtype)
                  * ang
-                 * F.expand_dims(F.exp(-eta*R**2) * fc, axis=1)
-                 * F.expand_dims(F.exp(-eta*R**2) * fc, axis=0))
-            triu = np.triu(np.ones_like(cos.data), k=1)
-            g = F.where(triu.astype(np.bool), g, triu)
+                 * radial[j] * radial[k])
             G.append(F.sum(g))
         return G
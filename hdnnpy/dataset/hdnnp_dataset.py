@@ -4,7 +4,7 @@
 
 import numpy as np
 
-from hdnnpy.utils import (MPI, recv_chunk, send_chunk)
+from hdnnpy.utils import (MPI, Precision, recv_chunk, send_chunk)
 
 
 RANDOMSTATE = np.random.get_state()
@@ -33,12 +33,16 @@ class HDNNPDataset(object):
         self._descriptor = descriptor
         self._property = property_
         self._dataset = dataset.copy()
+        self._order = None
+        self._set_columns(None)
 
     def __getitem__(self, item):
         """Return indexed or sliced dataset as dict data."""
-        batches = {key: data[item]
+        is_slice = isinstance(item, slice)
+        item = self._indices(item)
+        batches = {key: self._fetch(key, data, item)
                    for key, data in self._dataset.items()}
-        if isinstance(item, slice):
+        if is_slice:
             length = len(list(batches.values())[0])
             return [{key: batch[i] for key, batch in batches.items()}
                     for i in range(length)]
@@ -67,7 +71,9 @@ class HDNNPDataset(object):
     @property
     def n_input(self):
         """int: Number of dimensions of input data."""
-        if 'inputs/0' in self._dataset:
+        if self._columns is not None:
+            return len(self._columns)
+        elif 'inputs/0' in self._dataset:
             return self._dataset['inputs/0'].shape[-1]
         else:
             return self._descriptor.n_feature
@@ -83,6 +89,8 @@ class HDNNPDataset(object):
     @property
     def partial_size(self):
         """int: Number of data after scattered by MPI communication."""
+        if self._order is not None:
+            return len(self._order)
         return len(list(self._dataset.values())[0])
 
     @property
@@ -113,7 +121,9 @@ class HDNNPDataset(object):
         * Check compatibility between descriptor and property datasets.
         * Expand feature dimension of descriptor dataset according to
           ``all_elements`` and pre-process descriptor dataset in a
-          given order and add to its own dataset.
+          given order and add to its own dataset. If no pre-processing
+          is given, expansion is not performed here, but a column map
+          is kept and applied when data is fetched.
         * Add property dataset to its own dataset.
         * Clear up the original data in descriptor and property dataset.
         * Shuffle the order of the data.
@@ -148,19 +158,26 @@ class HDNNPDataset(object):
         if self._descriptor.has_data:
             inputs = [self._descriptor[key]
                       for key in self._descriptor.descriptors]
+            inputs = {f'inputs/{i}': data for i, data in enumerate(inputs)}
             # expand along to feature dimension
             if all_elements != self._descriptor.elements:
-                old_feature_keys = self._descriptor.feature_keys
-                new_feature_keys = (
-                    self._descriptor.generate_feature_keys(all_elements))
-                inputs = self._expand_feature_dims(
-                    inputs, old_feature_keys, new_feature_keys)
+                self._set_columns(self._column_map(
+                    self._descriptor.feature_keys,
+                    self._descriptor.generate_feature_keys(all_elements)))
             # pre-process descriptor dataset
-            for preprocess in preprocesses:
-                inputs = preprocess.apply(
-                    inputs, self.elemental_composition, verbose=verbose)
-            self._dataset.update(
-                {f'inputs/{i}': data for i, data in enumerate(inputs)})
+            if preprocesses:
+                inputs = [self._expand_columns(key, np.asarray(data))
+                          for key, data in inputs.items()]
+                self._set_columns(None)
+                # statistics are calculated in compute precision
+                inputs[0] = inputs[0].astype(Precision.compute)
+                for preprocess in preprocesses:
+                    inputs = preprocess.apply(
+                        inputs, self.elemental_composition, verbose=verbose)
+                inputs = {f'inputs/{i}': data.astype(
+                              Precision.storage_dtype(i), copy=False)
+                          for i, data in enumerate(inputs)}
+            self._dataset.update(inputs)
             self._descriptor.clear()
 
         # add property dataset and delete original data
@@ -174,7 +191,23 @@ class HDNNPDataset(object):
         if shuffle:
             self._shuffle()
 
-    def scatter(self, max_buf_len=256 * 1024 * 1024):
+    def get_batch(self, index):
+        """Return indexed or sliced dataset as stacked arrays.
+
+        Unlike :meth:`__getitem__`, it does not make a :obj:`dict` for
+        each data.
+
+        Args:
+            index (~numpy.ndarray or slice): Indices of data to return.
+
+        Returns:
+            dict [~numpy.ndarray]: Stacked arrays of each key.
+        """
+        index = self._indices(index)
+        return {key: self._fetch(key, data, index)
+                for key, data in self._dataset.items()}
+
+    def scatter(self, max_buf_len=256 * 1024 * 1024, duplicate=True):
         """Scatter dataset by MPI communication.
 
         Each instance is re-initialized with received dataset.
@@ -183,22 +216,39 @@ class HDNNPDataset(object):
             max_buf_len (int, optional):
                 Each data is divided into chunks of this size at
                 maximum.
+            duplicate (bool, optional):
+                If True, each MPI process receives the same number of
+                data, some of which are duplicated between neighboring
+                processes. Otherwise, dataset is split without
+                duplication, which is required to predict each data
+                exactly once.
         """
+        if MPI.size == 1:
+            # nothing to send, and stored arrays (possibly compressed
+            # on disk) are kept as they are
+            return
+
         if MPI.rank == 0:
             new_dataset = {}
             MPI.comm.bcast(len(self._dataset), root=0)
+            n_total = self.total_size
+            if duplicate:
+                n_sub = -(-n_total // MPI.size)
+                bounds = [(n_total*i//MPI.size, n_total*i//MPI.size + n_sub)
+                          for i in range(MPI.size)]
+            else:
+                q, r = divmod(n_total, MPI.size)
+                bounds = [(q*i + min(i, r), q*(i+1) + min(i+1, r))
+                          for i in range(MPI.size)]
             while self._dataset:
                 key, data = self._dataset.popitem()
-                n_total = self.total_size
-                n_sub = -(-n_total // MPI.size)
-                for i in range(MPI.size):
-                    s = n_total*i//MPI.size
-                    e = n_total*i//MPI.size + n_sub
+                for i, (s, e) in enumerate(bounds):
+                    sub_data = data[self._indices(slice(s, e))]
                     if i == 0:
-                        new_dataset[key] = data[s:e]
+                        new_dataset[key] = sub_data
                     else:
                         MPI.comm.send(key, dest=i)
-                        send_chunk(data[s:e], dest=i, max_buf_len=max_buf_len)
+                        send_chunk(sub_data, dest=i, max_buf_len=max_buf_len)
             self._dataset.update(new_dataset)
 
         else:
@@ -208,42 +258,80 @@ class HDNNPDataset(object):
                 key = MPI.comm.recv(source=0)
                 recv_data = recv_chunk(source=0, max_buf_len=max_buf_len)
                 self._dataset[key] = recv_data
+        # scattered data is already in shuffled order
+        self._order = None
+        self._set_columns(MPI.comm.bcast(self._columns, root=0))
 
     def take(self, index):
-        """Return copied object that has sliced dataset.
+        """Return a view of sliced dataset.
+
+        The returned object shares arrays with this instance, and only
+        keeps indices of the data.
 
         Args:
-            index (int or slice):
-                Copied object has dataset indexed or sliced by this.
+            index (~numpy.ndarray or slice):
+                Returned object has dataset indexed or sliced by this.
         """
-        dataset = {key: data[index] for key, data in self._dataset.items()}
-        new_dataset = self.__class__(self._descriptor, self._property, dataset)
+        if self._order is None:
+            order = np.arange(self.partial_size)[index]
+        else:
+            order = self._order[index]
+        new_dataset = self.__class__(
+            self._descriptor, self._property, self._dataset)
+        new_dataset._order = order
+        new_dataset._set_columns(self._columns)
         return new_dataset
 
     @staticmethod
-    def _expand_feature_dims(inputs, old_feature_keys, new_feature_keys):
-        """Expand feature dimension of input dataset according to
-        ``all_elements``."""
-        n_pad = len(new_feature_keys) - len(old_feature_keys)
-        idx_pad = len(old_feature_keys)
-        sort_indices = []
-        for key in new_feature_keys:
-            if key in old_feature_keys:
-                sort_indices.append(old_feature_keys.index(key))
-            else:
-                sort_indices.append(idx_pad)
-                idx_pad += 1
-        sort_indices = np.array(sort_indices)
-
-        for i, data in enumerate(inputs):
-            pad_width = [(0, n_pad) if i == 2 else (0, 0)
-                         for i in range(data.ndim)]
-            data = np.pad(data, pad_width, 'constant')
-            inputs[i] = data[:, :, sort_indices]
-        return inputs
+    def _column_map(old_feature_keys, new_feature_keys):
+        """Make a map from expanded feature dimension to the original
+        one, where ``-1`` means a zero-filled feature."""
+        return np.array([old_feature_keys.index(key)
+                         if key in old_feature_keys else -1
+                         for key in new_feature_keys])
+
+    def _expand_columns(self, key, data):
+        """Expand feature dimension of input data according to the
+        column map."""
+        if self._columns is None or not key.startswith('inputs/'):
+            return data
+        order = int(key.split('/')[1])
+        axis = data.ndim - order - 1
+        expanded = np.take(data, self._column_indices, axis=axis)
+        if len(self._zero_columns) > 0:
+            expanded[(slice(None),) * axis + (self._zero_columns,)] = 0
+        return expanded
+
+    def _fetch(self, key, data, index):
+        """Index data, expand its feature dimension and cast it to the
+        precision of model."""
+        data = self._expand_columns(key, data[index])
+        return data.astype(Precision.model, copy=False)
+
+    def _indices(self, item):
+        """Convert indices in shuffled order into those of stored
+        arrays."""
+        if self._order is None:
+            return item
+        return self._order[item]
+
+    def _set_columns(self, columns):
+        """Set the column map, and indices used to expand feature
+        dimension by it."""
+        self._columns = columns
+        if columns is None:
+            self._column_indices = self._zero_columns = None
+        else:
+            self._column_indices = np.maximum(columns, 0)
+            self._zero_columns = np.flatnonzero(columns < 0)
 
     def _shuffle(self):
-        """Shuffle the order of the data."""
-        for data in self._dataset.values():
-            np.random.set_state(RANDOMSTATE)
-            np.random.shuffle(data)
+        """Shuffle the order of the data.
+
+        | Stored arrays are not moved, but a permutation index is kept
+          and applied when data is fetched.
+        | The permutation is the same as that of shuffling each array
+          with :obj:`RANDOMSTATE`.
+        """
+        np.random.set_state(RANDOMSTATE)
+        self._order = self._indices(np.random.permutation(self.partial_size))
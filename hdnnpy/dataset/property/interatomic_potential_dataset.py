@@ -2,9 +2,8 @@
 
 """Interatomic potential dataset for property of HDNNP. """
 
-import numpy as np
-
 from hdnnpy.dataset.property.property_dataset_base import PropertyDatasetBase
+from hdnnpy.utils import Precision
 
 
 class InteratomicPotentialDataset(PropertyDatasetBase):
@@ -50,22 +49,22 @@ class InteratomicPotentialDataset(PropertyDatasetBase):
         dataset = []
         if self._order >= 0:
             energy = (self._calculate_energy(structure)
-                      .astype(np.float32)
+                      .astype(Precision.storage)
                       .reshape(self.n_property))
             dataset.append(energy)
         if self._order >= 1:
             force = (self._calculate_force(structure)
-                     .astype(np.float32)
+                     .astype(Precision.storage)
                      .reshape(self.n_property, n_deriv))
             dataset.append(force)
         if self._order >= 2:
             harmonic = (self._calculate_harmonic(structure)
-                        .astype(np.float32)
+                        .astype(Precision.storage)
                         .reshape(self.n_property, n_deriv, n_deriv))
             dataset.append(harmonic)
         if self._order >= 3:
             third_order = (self._calculate_third_order(structure)
-                           .astype(np.float32)
+                           .astype(Precision.storage)
                            .reshape(self.n_property, n_deriv,
                                     n_deriv, n_deriv))
             dataset.append(third_order)
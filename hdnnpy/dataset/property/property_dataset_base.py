@@ -11,7 +11,8 @@ from abc import (ABC, abstractmethod)
 import numpy as np
 from tqdm import tqdm
 
-from hdnnpy.utils import (MPI, pprint, recv_chunk, send_chunk)
+from hdnnpy.format.sharded import (ShardedStore, is_sharded, save_sharded)
+from hdnnpy.utils import (MPI, Precision, pprint, recv_chunk, send_chunk)
 
 
 class PropertyDatasetBase(ABC):
@@ -41,13 +42,14 @@ class PropertyDatasetBase(ABC):
         self._elemental_composition = structures[0].get_chemical_symbols()
         self._elements = sorted(set(self._elemental_composition))
         self._length = len(structures)
-        self._slices = [slice(i[0], i[-1]+1)
+        self._slices = [slice(i[0], i[-1]+1) if len(i) else slice(0, 0)
                         for i in np.array_split(range(self._length), MPI.size)]
         self._structures = structures[self._slices[MPI.rank]]
         self._tag = structures[0].info['tag']
         self._coefficients = self.COEFFICIENTS[: order+1]
         self._units = self.UNITS[: order+1]
         self._dataset = []
+        self._partial = None
 
     def __getitem__(self, item):
         """Return property data this instance has.
@@ -120,11 +122,15 @@ class PropertyDatasetBase(ABC):
     def clear(self):
         """Clear up instance variables to initial state."""
         self._dataset.clear()
+        self._partial = None
 
     def load(self, file_path, verbose=True, remake=False):
-        """Load dataset from .npz format file.
+        """Load dataset from .npz format file or sharded store.
 
-        Only root MPI process load dataset.
+        | Only root MPI process load dataset from .npz format file.
+        | From a sharded store, each MPI process reads its own block of
+          samples in parallel, and they are gathered into root MPI
+          process.
 
         It validates following compatibility between loaded dataset and
         atomic structures given at initialization.
@@ -139,7 +145,9 @@ class PropertyDatasetBase(ABC):
             * order
 
         Args:
-            file_path (~pathlib.Path): File path to load dataset.
+            file_path (~pathlib.Path):
+                File path or directory path of sharded store to load
+                dataset.
             verbose (bool, optional): Print log to stdout.
             remake (bool, optional): If loaded dataset is lacking in
                 any property, recalculate dataset from scratch and
@@ -153,12 +161,20 @@ class PropertyDatasetBase(ABC):
                 ``remake=False``.
         """
         # validate compatibility between my structures and loaded dataset
-        ndarray = np.load(file_path)
-        assert list(ndarray['elemental_composition']) \
+        sharded = is_sharded(file_path)
+        if sharded:
+            ndarray = ShardedStore(file_path)
+            info = ndarray.info
+            length = len(ndarray)
+        else:
+            ndarray = np.load(file_path)
+            info = ndarray
+            length = len(ndarray[self._properties[0]])
+        assert list(info['elemental_composition']) \
                == self._elemental_composition
-        assert list(ndarray['elements']) == self._elements
-        assert ndarray['tag'].item() == self._tag
-        assert len(ndarray[self._properties[0]]) == len(self)
+        assert list(info['elements']) == self._elements
+        assert str(info['tag']) == self._tag
+        assert length == len(self)
 
         # validate lacking properties
         lacking_properties = set(self._properties) - set(ndarray)
@@ -172,33 +188,48 @@ class PropertyDatasetBase(ABC):
             if remake:
                 if verbose:
                     pprint('Start to recalculate dataset from scratch.')
-                self.make(verbose=verbose)
-                self.save(file_path, verbose=verbose)
+                self.make(verbose=verbose, keep_partial=sharded)
+                self.save(file_path, verbose=verbose, sharded=sharded)
                 return
             else:
                 raise ValueError('Please recalculate dataset from scratch.')
 
         # load dataset as much as needed
-        if MPI.rank == 0:
+        if sharded:
+            # each MPI process reads its own block of samples
+            partial = []
+            block = self._slices[MPI.rank]
+            if block.stop > block.start:
+                partial = [data.astype(Precision.storage, copy=False)
+                           for data in ndarray.read(
+                               self._properties, block.start, block.stop)]
+            self._gather(partial)
+        elif MPI.rank == 0:
             for i in range(self._order + 1):
-                self._dataset.append(ndarray[self._properties[i]])
+                self._dataset.append(ndarray[self._properties[i]]
+                                     .astype(Precision.storage, copy=False))
 
         if verbose:
             pprint(f'Successfully loaded & made needed {self.name} dataset'
                    f' from {file_path}')
 
-    def make(self, verbose=True):
+    def make(self, verbose=True, keep_partial=False):
         """Calculate & retain property dataset
 
         | It calculates property dataset by data-parallel using MPI
           communication.
         | The calculated dataset is retained in only root MPI process.
+          If ``keep_partial=True``, each MPI process also keeps its own
+          block of samples until it is saved to a sharded store.
 
         Each property values are divided by ``COEFFICIENTS`` which is
         unique to each property dataset class.
 
         Args:
             verbose (bool, optional): Print log to stdout.
+            keep_partial (bool, optional):
+                If True, keep the block of samples each MPI process
+                calculated for :meth:`save` with ``sharded=True``.
         """
         dataset = []
         for structure in tqdm(self._structures,
@@ -206,32 +237,35 @@ class PropertyDatasetBase(ABC):
                               leave=False, position=MPI.rank):
             dataset.append(self.calculate_properties(structure))
 
+        partial = []
         for data_list, coefficient in zip(zip(*dataset), self._coefficients):
-            shape = data_list[0].shape
-            send_data = np.stack(data_list) / coefficient
-            del data_list
+            partial.append((np.stack(data_list) / coefficient)
+                           .astype(Precision.storage))
+        del dataset
+        self._gather(partial)
+        if keep_partial:
             if MPI.rank == 0:
-                recv_data = np.empty((self._length, *shape), dtype=np.float32)
-                recv_data[self._slices[0]] = send_data
-                del send_data
-                for i in range(1, MPI.size):
-                    recv_data[self._slices[i]] = recv_chunk(source=i)
-                self._dataset.append(recv_data)
-            else:
-                send_chunk(send_data, dest=0)
-                del send_data
+                partial = [data[self._slices[0]] for data in self._dataset]
+            self._partial = partial
 
         if verbose:
             pprint(f'Calculated {self.name} dataset.')
 
-    def save(self, file_path, verbose=True):
-        """Save dataset to .npz format file.
+    def save(self, file_path, verbose=True, sharded=False):
+        """Save dataset to .npz format file or sharded store.
 
-        Only root MPI process save dataset.
+        | Only root MPI process save dataset to .npz format file.
+        | If ``sharded=True``, each MPI process saves the block of
+          samples it calculated by :meth:`make` with
+          ``keep_partial=True`` to its own shard in parallel. Otherwise,
+          root MPI process saves the whole dataset as a single shard.
 
         Args:
             file_path (~pathlib.Path): File path to save dataset.
             verbose (bool, optional): Print log to stdout.
+            sharded (bool, optional):
+                If True, ``file_path`` is a directory of sharded store.
+                See :mod:`hdnnpy.format.sharded`.
 
         Raises:
             RuntimeError: If this instance do not have any data.
@@ -241,18 +275,44 @@ class PropertyDatasetBase(ABC):
             Cannot save dataset, since this dataset does not have any data.
             ''')
 
-        if MPI.rank == 0:
+        info = {
+            'elemental_composition': self._elemental_composition,
+            'elements': self._elements,
+            'tag': self._tag,
+            }
+        if sharded:
+            if self._partial is not None:
+                partial = self._partial
+                start = self._slices[MPI.rank].start
+            else:
+                partial = self._dataset
+                start = 0
+            save_sharded(file_path, dict(zip(self._properties, partial)),
+                         start, MPI.comm, info=info)
+        elif MPI.rank == 0:
             data = {property_: data for property_, data
                     in zip(self._properties, self._dataset)}
-            info = {
-                'elemental_composition': self._elemental_composition,
-                'elements': self._elements,
-                'tag': self._tag,
-                }
             np.savez(file_path, **data, **info)
+        self._partial = None
         if verbose:
             pprint(f'Successfully saved {self.name} dataset to {file_path}.')
 
+    def _gather(self, partial):
+        """Gather blocks of samples which each MPI process has into
+        root MPI process."""
+        for data in partial:
+            if MPI.rank == 0:
+                recv_data = np.empty((self._length, *data.shape[1:]),
+                                     dtype=data.dtype)
+                recv_data[self._slices[0]] = data
+                for i in range(1, MPI.size):
+                    # processes which have no structure send nothing
+                    if self._slices[i].stop > self._slices[i].start:
+                        recv_data[self._slices[i]] = recv_chunk(source=i)
+                self._dataset.append(recv_data)
+            else:
+                send_chunk(data, dest=0)
+
     @abstractmethod
     def calculate_properties(self, structure):
         """Calculate required properties for a structure data.
@@ -3,7 +3,22 @@
 """File format support subpackage."""
 
 __all__ = [
+    'CODECS',
+    'ChunkedNpzFile',
+    'NpzStreamWriter',
+    'ShardedStore',
+    'load_chunked',
     'parse_xyz',
+    'read_binary_potential',
+    'save_chunked',
+    'save_sharded',
+    'write_binary_potential',
     ]
 
+from hdnnpy.format.chunked import (
+    CODECS, ChunkedNpzFile, load_chunked, save_chunked)
+from hdnnpy.format.lammps import (
+    read_binary_potential, write_binary_potential)
+from hdnnpy.format.npz import NpzStreamWriter
+from hdnnpy.format.sharded import (ShardedStore, save_sharded)
 from hdnnpy.format.xyz import parse_xyz
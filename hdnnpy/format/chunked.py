@@ -0,0 +1,277 @@
+# coding: utf-8
+
+"""Functions and classes to handle chunked compressed .npz file format.
+
+Each array is split into blocks of samples along the first axis
+(chunks), and each chunk is compressed separately and stored as a raw
+byte array in an uncompressed .npz file. Any block of samples can be
+read by decompressing only the chunks which contain it.
+
+Available codecs are ``zlib`` and, if installed, ``zstd``
+(``zstandard`` package) and ``blosc`` (``blosc`` package).
+"""
+
+from collections import OrderedDict
+import threading
+import warnings
+import zlib
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import blosc
+except ImportError:
+    blosc = None
+
+
+def _zlib_codec():
+    return (lambda data, itemsize: zlib.compress(data, 1),
+            zlib.decompress)
+
+
+def _zstd_codec():
+    compressor = zstandard.ZstdCompressor(level=3)
+    decompressor = zstandard.ZstdDecompressor()
+    return (lambda data, itemsize: compressor.compress(data),
+            decompressor.decompress)
+
+
+def _blosc_codec():
+    return (lambda data, itemsize: blosc.compress(data, typesize=itemsize),
+            blosc.decompress)
+
+
+CODECS = OrderedDict([('zlib', _zlib_codec)])
+"""dict [function]: Available codecs. Each function returns a pair of
+compression and decompression functions."""
+if zstandard is not None:
+    CODECS['zstd'] = _zstd_codec
+if blosc is not None:
+    CODECS['blosc'] = _blosc_codec
+
+_CHUNKED_KEY = '__chunked__'
+
+
+def get_codec(name):
+    """Return the name of an available codec.
+
+    Args:
+        name (str): Name of codec you want to use.
+
+    Returns:
+        str: ``name`` if it is available, otherwise ``'zlib'``.
+    """
+    if name not in CODECS:
+        warnings.warn(f'Codec "{name}" is not available. Use "zlib" instead.')
+        return 'zlib'
+    return name
+
+
+def is_chunked(file_path):
+    """Check if a file is written by :func:`save_chunked`.
+
+    Args:
+        file_path (~pathlib.Path): File path to check.
+
+    Returns:
+        bool: True if the file is chunked compressed .npz format.
+    """
+    with np.load(str(file_path)) as ndarray:
+        return _CHUNKED_KEY in ndarray.files
+
+
+def load_chunked(file_path, max_cached=None):
+    """Open a chunked compressed .npz file.
+
+    Args:
+        file_path (~pathlib.Path): File path to open.
+        max_cached (int, optional):
+            Passed to `ChunkedArray` returned from the opened file.
+
+    Returns:
+        ChunkedNpzFile: Opened file.
+    """
+    return ChunkedNpzFile(file_path, max_cached=max_cached)
+
+
+def save_chunked(file_path, arrays, info=None, codec='zlib', chunk_size=64):
+    """Save arrays into a chunked compressed .npz file.
+
+    Args:
+        file_path (~pathlib.Path): File path to save arrays.
+        arrays (dict [~numpy.ndarray]): Arrays to split into chunks.
+        info (dict, optional):
+            Additional data stored as they are, such as metadata.
+        codec (str, optional): Name of codec in :obj:`CODECS`.
+        chunk_size (int, optional): Number of samples in a chunk.
+    """
+    codec = get_codec(codec)
+    compress, _ = CODECS[codec]()
+    data = {} if info is None else dict(info)
+    keys = []
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        keys.append(key)
+        data[f'{key}/dtype'] = np.lib.format.dtype_to_descr(array.dtype)
+        data[f'{key}/shape'] = np.array(array.shape, dtype=np.int64)
+        for i, start in enumerate(range(0, len(array), chunk_size)):
+            chunk = array[start:start+chunk_size].tobytes()
+            data[f'{key}/{i}'] = np.frombuffer(
+                compress(chunk, array.dtype.itemsize), dtype=np.uint8)
+    data[_CHUNKED_KEY] = np.array(keys)
+    data['__codec__'] = codec
+    data['__chunk_size__'] = chunk_size
+    np.savez(str(file_path), **data)
+
+
+class ChunkedArray(object):
+    """Array-like object which reads chunks of a compressed array."""
+    def __init__(self, ndarray, key, decompress, chunk_size,
+                 max_cached=None):
+        """
+        | It decompresses only the chunks which contain requested
+          samples, and caches the most recently used chunks.
+        | Indexing along the first axis with an integer, a slice or an
+          array of indices returns :obj:`~numpy.ndarray`.
+        | A shuffled mini-batch touches almost every chunk. If
+          ``max_cached`` is smaller than the number of chunks, most
+          chunks are decompressed again for every mini-batch, which is
+          much slower than reading an uncompressed array. Without the
+          limit, each chunk is decompressed only once, and memory grows
+          up to the size of the decompressed array.
+        | Converting it into :obj:`~numpy.ndarray`, e.g. to apply
+          pre-processing to the whole array, decompresses all chunks at
+          once.
+
+        Args:
+            ndarray (~numpy.lib.npyio.NpzFile): Opened .npz file.
+            key (str): Name of the array.
+            decompress (function): Decompression function of codec.
+            chunk_size (int): Number of samples in a chunk.
+            max_cached (int, optional):
+                Maximum number of cached decompressed chunks. If
+                ``None``, all decompressed chunks are cached.
+        """
+        self._ndarray = ndarray
+        self._key = key
+        self._decompress = decompress
+        self._chunk_size = chunk_size
+        self._max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.dtype = np.dtype(np.lib.format.descr_to_dtype(
+            ndarray[f'{key}/dtype'].item()))
+        self.shape = tuple(ndarray[f'{key}/shape'].tolist())
+
+    def __array__(self, dtype=None):
+        array = self[:]
+        return array if dtype is None else array.astype(dtype)
+
+    def __getitem__(self, item):
+        if isinstance(item, tuple):
+            return self[item[0]][(slice(None),) + item[1:]]
+        if isinstance(item, slice):
+            indices = np.arange(*item.indices(len(self)))
+        elif np.ndim(item) == 0:
+            return self[np.array([item])][0]
+        else:
+            indices = np.arange(len(self))[item]
+
+        result = np.empty((len(indices), *self.shape[1:]), dtype=self.dtype)
+        chunk_indices = indices // self._chunk_size
+        for chunk_index in np.unique(chunk_indices):
+            mask = chunk_indices == chunk_index
+            chunk = self._read_chunk(chunk_index)
+            result[mask] = chunk[indices[mask] - chunk_index*self._chunk_size]
+        return result
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        """int: Number of dimensions."""
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        """int: Number of bytes of decompressed array."""
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def _read_chunk(self, chunk_index):
+        """Decompress a chunk or return a cached one. It may be called
+        from a prefetching thread."""
+        with self._lock:
+            if chunk_index in self._cache:
+                self._cache.move_to_end(chunk_index)
+                return self._cache[chunk_index]
+            data = self._decompress(
+                self._ndarray[f'{self._key}/{chunk_index}'].tobytes())
+            chunk = np.frombuffer(data, dtype=self.dtype).reshape(
+                -1, *self.shape[1:])
+            self._cache[chunk_index] = chunk
+            if (self._max_cached is not None
+                    and len(self._cache) > self._max_cached):
+                self._cache.popitem(last=False)
+            return chunk
+
+
+class ChunkedNpzFile(object):
+    """Opened chunked compressed .npz file."""
+    def __init__(self, file_path, max_cached=None):
+        """
+        | Chunked arrays are returned as `ChunkedArray`, and other data
+          are returned as they are.
+        | The file is kept open while returned `ChunkedArray` instances
+          are used.
+
+        Args:
+            file_path (~pathlib.Path): File path to open.
+            max_cached (int, optional):
+                Passed to returned `ChunkedArray`.
+        """
+        self._ndarray = np.load(str(file_path))
+        self._keys = self._ndarray[_CHUNKED_KEY].tolist()
+        self._codec = self._ndarray['__codec__'].item()
+        self._chunk_size = self._ndarray['__chunk_size__'].item()
+        _, self._decompress = CODECS[self._codec]()
+        self._max_cached = max_cached
+
+    def __contains__(self, key):
+        return key in self.files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def __getitem__(self, key):
+        if key in self._keys:
+            return ChunkedArray(self._ndarray, key, self._decompress,
+                                self._chunk_size, self._max_cached)
+        return self._ndarray[key]
+
+    def __iter__(self):
+        return iter(self.files)
+
+    @property
+    def codec(self):
+        """str: Name of codec of the file."""
+        return self._codec
+
+    @property
+    def files(self):
+        """list [str]: Names of chunked arrays and other data."""
+        return self._keys + [
+            key for key in self._ndarray.files
+            if not key.startswith('__')
+            and key.rsplit('/', 1)[0] not in self._keys]
+
+    def close(self):
+        """Close the file."""
+        self._ndarray.close()
@@ -0,0 +1,199 @@
+# coding: utf-8
+
+"""Functions to handle binary potential file format for LAMMPS.
+
+All values are little-endian. A file consists of following blocks.
+
+* header: magic ``HDNNPBIN``, format version (uint32) and byte size
+  of floating point values in following blocks (uint32, 4 or 8)
+* element table: number of elements and their symbols
+* descriptor: name, and for each function, its name, number of
+  parameter sets, number of parameters and parameters (float64)
+* pre-processing: for each pre-processing, its name and named arrays
+  (name, number of dimensions, shape and values)
+* neural network: number of layers, and for each element and layer,
+  input size, output size, name of activation function, weight
+  in ``(output, input)`` order and bias
+
+A string is stored as its byte length (uint32) followed by UTF-8
+encoded bytes.
+"""
+
+import struct
+
+import numpy as np
+
+
+MAGIC = b'HDNNPBIN'
+"""bytes: Magic number at the beginning of a file."""
+VERSION = 1
+"""int: Version of binary potential file format."""
+
+_UINT32 = struct.Struct('<I')
+_FLOAT_TYPES = {4: np.dtype('<f4'), 8: np.dtype('<f8')}
+
+
+def read_binary_potential(file_path):
+    """Read a binary potential file written by
+    :func:`write_binary_potential`.
+
+    Args:
+        file_path (~pathlib.Path): File path to read.
+
+    Returns:
+        dict: Potential data with the same keys as arguments of
+        :func:`write_binary_potential`.
+
+    Raises:
+        ValueError: If the file is not a binary potential file or its
+            version is not supported.
+    """
+    with open(str(file_path), 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{file_path} is not a binary potential file.')
+        version = _read_uint32(f)
+        if version != VERSION:
+            raise ValueError(f'Unsupported binary potential version:'
+                             f' {version}')
+        float_type = _FLOAT_TYPES[_read_uint32(f)]
+
+        elements = [_read_str(f) for _ in range(_read_uint32(f))]
+
+        descriptor = _read_str(f)
+        parameters = {}
+        for _ in range(_read_uint32(f)):
+            name = _read_str(f)
+            n_set = _read_uint32(f)
+            n_param = _read_uint32(f)
+            params = _read_array(f, np.dtype('<f8'), (n_set, n_param))
+            parameters[name] = [tuple(row) for row in params.tolist()]
+
+        preprocesses = []
+        for _ in range(_read_uint32(f)):
+            name = _read_str(f)
+            arrays = {}
+            for _ in range(_read_uint32(f)):
+                key = _read_str(f)
+                shape = tuple(_read_uint32(f) for _ in range(_read_uint32(f)))
+                arrays[key] = _read_array(f, float_type, shape)
+            preprocesses.append((name, arrays))
+
+        n_layer = _read_uint32(f)
+        layers = {}
+        for element in elements:
+            layers[element] = []
+            for _ in range(n_layer):
+                in_size = _read_uint32(f)
+                out_size = _read_uint32(f)
+                activation = _read_str(f)
+                weight = _read_array(f, float_type, (out_size, in_size))
+                bias = _read_array(f, float_type, (out_size,))
+                layers[element].append((weight, bias, activation))
+
+    return {
+        'elements': elements,
+        'descriptor': descriptor,
+        'parameters': parameters,
+        'preprocesses': preprocesses,
+        'layers': layers,
+        'dtype': float_type.newbyteorder('='),
+        }
+
+
+def write_binary_potential(file_path, elements, descriptor, parameters,
+                           preprocesses, layers, dtype=np.float32):
+    """Write a potential into a binary file.
+
+    Args:
+        file_path (~pathlib.Path): File path to write.
+        elements (list [str]): Element symbols.
+        descriptor (str): Name of descriptor.
+        parameters (dict [list [tuple]]):
+            Mapping from function name of descriptor to its parameters.
+        preprocesses (list [tuple [str, dict [~numpy.ndarray]]]):
+            Name and parameters of each pre-processing in order.
+        layers (dict [list [tuple]]):
+            Mapping from element to ``(weight, bias, activation)`` of
+            each layer of its neural network. ``weight`` has the shape
+            ``(output, input)``.
+        dtype (~numpy.dtype, optional):
+            Floating point type of pre-processing and neural network
+            parameters. ``float32`` or ``float64``.
+    """
+    float_type = np.dtype(dtype).newbyteorder('<')
+    assert float_type.itemsize in _FLOAT_TYPES
+    depths = {len(layers[element]) for element in elements}
+    assert len(depths) == 1
+
+    with open(str(file_path), 'wb') as f:
+        f.write(MAGIC)
+        _write_uint32(f, VERSION)
+        _write_uint32(f, float_type.itemsize)
+
+        _write_uint32(f, len(elements))
+        for element in elements:
+            _write_str(f, element)
+
+        _write_str(f, descriptor)
+        _write_uint32(f, len(parameters))
+        for name, params in parameters.items():
+            # an empty list of parameters has no axis of parameters,
+            # and the size of the axis cannot be inferred from it
+            params = np.array(params, dtype='<f8').reshape(
+                len(params), -1 if len(params) else 0)
+            _write_str(f, name)
+            _write_uint32(f, params.shape[0])
+            _write_uint32(f, params.shape[1])
+            f.write(params.tobytes())
+
+        _write_uint32(f, len(preprocesses))
+        for name, arrays in preprocesses:
+            _write_str(f, name)
+            _write_uint32(f, len(arrays))
+            for key, array in arrays.items():
+                array = np.asarray(array, dtype=float_type)
+                _write_str(f, key)
+                _write_uint32(f, array.ndim)
+                for size in array.shape:
+                    _write_uint32(f, size)
+                f.write(array.tobytes())
+
+        _write_uint32(f, depths.pop())
+        for element in elements:
+            for weight, bias, activation in layers[element]:
+                weight = np.asarray(weight, dtype=float_type)
+                bias = np.asarray(bias, dtype=float_type)
+                _write_uint32(f, weight.shape[1])
+                _write_uint32(f, weight.shape[0])
+                _write_str(f, activation)
+                f.write(weight.tobytes())
+                f.write(bias.tobytes())
+
+
+def _read_array(f, dtype, shape):
+    """Read an array of given type and shape."""
+    count = int(np.prod(shape))
+    array = np.frombuffer(f.read(dtype.itemsize * count), dtype=dtype)
+    return array.astype(dtype.newbyteorder('=')).reshape(shape)
+
+
+def _read_str(f):
+    """Read a length-prefixed UTF-8 string."""
+    return f.read(_read_uint32(f)).decode('utf-8')
+
+
+def _read_uint32(f):
+    """Read an unsigned 32-bit integer."""
+    return _UINT32.unpack(f.read(_UINT32.size))[0]
+
+
+def _write_str(f, string):
+    """Write a length-prefixed UTF-8 string."""
+    data = string.encode('utf-8')
+    _write_uint32(f, len(data))
+    f.write(data)
+
+
+def _write_uint32(f, value):
+    """Write an unsigned 32-bit integer."""
+    f.write(_UINT32.pack(value))
@@ -0,0 +1,96 @@
+# coding: utf-8
+
+"""Functions and classes to handle .npz file format."""
+
+from pathlib import Path
+import shutil
+from tempfile import TemporaryFile
+import zipfile
+
+import numpy as np
+
+
+class NpzStreamWriter(object):
+    """Write arrays into a .npz format file incrementally."""
+    def __init__(self, file_path):
+        """
+        | Arrays appended with the same key are concatenated along the
+          first axis.
+        | Each appended array is flushed into a temporary file, so that
+          memory usage does not grow with the number of appended arrays.
+        | The .npz file is written when :meth:`close` is called, and it
+          can be read by :func:`numpy.load` as usual.
+        | Used as a context manager, it is closed at the end of the
+          block, or aborted if an exception is raised in it.
+
+        Args:
+            file_path (~pathlib.Path): File path to write arrays.
+        """
+        self._file_path = file_path
+        self._buffers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        if type_ is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, key, array):
+        """Append an array to the data stored with ``key``.
+
+        Args:
+            key (str): Name of the array in the .npz file.
+            array (~numpy.ndarray):
+                Array to append. Its dtype and shape except for the
+                first axis have to equal to those appended before.
+        """
+        array = np.ascontiguousarray(array)
+        if key not in self._buffers:
+            self._buffers[key] = {
+                'file': TemporaryFile(),
+                'dtype': array.dtype,
+                'shape': array.shape[1:],
+                'length': 0,
+                }
+        buffer = self._buffers[key]
+        assert array.dtype == buffer['dtype']
+        assert array.shape[1:] == buffer['shape']
+        buffer['file'].write(array.tobytes())
+        buffer['length'] += len(array)
+
+    def abort(self):
+        """Remove temporary files without writing the .npz file."""
+        for buffer in self._buffers.values():
+            buffer['file'].close()
+        self._buffers.clear()
+
+    def close(self):
+        """Write all appended arrays into the .npz file and remove
+        temporary files.
+
+        If writing fails, the incomplete .npz file is also removed.
+        """
+        try:
+            with zipfile.ZipFile(str(self._file_path), 'w',
+                                 allowZip64=True) as zip_file:
+                for key, buffer in self._buffers.items():
+                    header = {
+                        'descr': np.lib.format.dtype_to_descr(
+                            buffer['dtype']),
+                        'fortran_order': False,
+                        'shape': (buffer['length'], *buffer['shape']),
+                        }
+                    with zip_file.open(f'{key}.npy', 'w',
+                                       force_zip64=True) as f:
+                        np.lib.format.write_array_header_2_0(f, header)
+                        buffer['file'].seek(0)
+                        shutil.copyfileobj(buffer['file'], f)
+        except BaseException:
+            if Path(self._file_path).exists():
+                Path(self._file_path).unlink()
+            raise
+        finally:
+            self.abort()
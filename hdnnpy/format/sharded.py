@@ -0,0 +1,165 @@
+# coding: utf-8
+
+"""Functions and classes to handle sharded dataset store.
+
+A sharded store is a directory which contains shards and a manifest.
+Each shard is a .npz file (optionally chunked compressed, see
+:mod:`hdnnpy.format.chunked`) holding a contiguous block of samples of
+all arrays. The manifest ``manifest.json`` describes the blocks of
+samples of shards and additional information of the dataset.
+
+Every MPI process writes and reads its own block of samples, and only
+the small manifest is written by root MPI process.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from hdnnpy.format.chunked import (is_chunked, load_chunked, save_chunked)
+
+
+MANIFEST = 'manifest.json'
+"""str: File name of manifest in a sharded store."""
+
+
+def is_sharded(dir_path):
+    """Check if a path is a sharded store.
+
+    Args:
+        dir_path (~pathlib.Path): Path to check.
+
+    Returns:
+        bool: True if the path is a directory which has a manifest.
+    """
+    return (Path(dir_path) / MANIFEST).is_file()
+
+
+def save_sharded(dir_path, arrays, start, comm, info=None,
+                 codec=None, chunk_size=64):
+    """Save a block of samples of arrays into a sharded store.
+
+    This function has to be called by all MPI processes of ``comm``.
+    Each process writes its own shard in parallel, and root process
+    writes the manifest after all shards are written.
+    Shards which are not listed in the new manifest are removed.
+
+    Args:
+        dir_path (~pathlib.Path): Directory path of sharded store.
+        arrays (dict [~numpy.ndarray]):
+            Block of samples of arrays this process has. It can be
+            empty if this process has no sample.
+        start (int): Index of the first sample of the block.
+        comm (~mpi4py.MPI.Comm): MPI communicator to use.
+        info (dict, optional):
+            Additional JSON serializable information of the dataset.
+        codec (str, optional):
+            If specified, shards are chunked compressed with this codec.
+        chunk_size (int, optional): Number of samples in a chunk.
+    """
+    dir_path = Path(dir_path)
+    dir_path.mkdir(parents=True, exist_ok=True)
+
+    shard = None
+    if arrays and len(next(iter(arrays.values()))) > 0:
+        stop = start + len(next(iter(arrays.values())))
+        file_name = f'shard-{start:010d}-{stop:010d}.npz'
+        if codec is None:
+            np.savez(str(dir_path / file_name), **arrays)
+        else:
+            save_chunked(dir_path / file_name, arrays,
+                         codec=codec, chunk_size=chunk_size)
+        shard = {'file': file_name, 'start': start, 'stop': stop,
+                 'keys': list(arrays)}
+
+    shards = comm.gather(shard, root=0)
+    if comm.rank == 0:
+        shards = sorted([shard for shard in shards if shard is not None],
+                        key=lambda shard: shard['start'])
+        manifest = {
+            'length': shards[-1]['stop'] if shards else 0,
+            'keys': shards[0]['keys'] if shards else [],
+            'shards': [{key: shard[key] for key in ['file', 'start', 'stop']}
+                       for shard in shards],
+            'codec': codec,
+            'info': {} if info is None else info,
+            }
+        temporary = dir_path / f'{MANIFEST}.tmp'
+        temporary.write_text(json.dumps(manifest, indent=2))
+        temporary.replace(dir_path / MANIFEST)
+        files = {shard['file'] for shard in shards}
+        for path in dir_path.glob('shard-*.npz'):
+            if path.name not in files:
+                path.unlink()
+    comm.Barrier()
+
+
+class ShardedStore(object):
+    """Opened sharded dataset store."""
+    def __init__(self, dir_path):
+        """
+        Only the manifest is read at initialization, and shards are
+        opened when a block of samples is read from them.
+
+        Args:
+            dir_path (~pathlib.Path): Directory path of sharded store.
+        """
+        self._dir_path = Path(dir_path)
+        manifest = json.loads((self._dir_path / MANIFEST).read_text())
+        self._codec = manifest['codec']
+        self._length = manifest['length']
+        self._keys = manifest['keys']
+        self._shards = manifest['shards']
+        self._info = manifest['info']
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def codec(self):
+        """str or None: Name of codec of shards."""
+        return self._codec
+
+    @property
+    def info(self):
+        """dict: Additional information of the dataset."""
+        return self._info
+
+    @property
+    def keys(self):
+        """list [str]: Names of stored arrays."""
+        return self._keys
+
+    def read(self, keys, start, stop):
+        """Read a block of samples from shards which overlap it.
+
+        Args:
+            keys (list [str]): Names of arrays to read.
+            start (int): Index of the first sample to read.
+            stop (int): Index of the sample next to the last one.
+                It has to be larger than ``start``.
+
+        Returns:
+            list [~numpy.ndarray]: Block of samples of each array.
+        """
+        blocks = [[] for _ in keys]
+        for shard in self._shards:
+            s = max(start, shard['start'])
+            e = min(stop, shard['stop'])
+            if s >= e:
+                continue
+            path = self._dir_path / shard['file']
+            ndarray = (load_chunked(path) if is_chunked(path)
+                       else np.load(str(path)))
+            with ndarray:
+                for block, key in zip(blocks, keys):
+                    block.append(ndarray[key][s-shard['start']
+                                              :e-shard['start']])
+        return [np.concatenate(block) for block in blocks]
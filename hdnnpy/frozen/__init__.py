@@ -0,0 +1,9 @@
+# coding: utf-8
+
+"""Frozen HDNNP subpackage which depends only on NumPy."""
+
+__all__ = [
+    'FrozenHDNNP',
+    ]
+
+from hdnnpy.frozen.evaluator import FrozenHDNNP
@@ -0,0 +1,320 @@
+# coding: utf-8
+
+"""Pure NumPy evaluator of a frozen HDNNP."""
+
+from itertools import (combinations_with_replacement, product)
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+"""int: Version of frozen HDNNP file format."""
+
+
+def _identity(z):
+    return z, np.ones_like(z)
+
+
+def _elu(z):
+    h = np.where(z > 0.0, z, np.expm1(np.minimum(z, 0.0)))
+    return h, np.where(z > 0.0, 1.0, h + 1.0)
+
+
+def _relu(z):
+    return np.maximum(z, 0.0), (z > 0.0).astype(z.dtype)
+
+
+def _sigmoid(z):
+    h = 0.5 * np.tanh(0.5 * z) + 0.5
+    return h, h * (1.0 - h)
+
+
+def _softplus(z):
+    return np.logaddexp(0.0, z), 0.5 * np.tanh(0.5 * z) + 0.5
+
+
+def _tanh(z):
+    h = np.tanh(z)
+    return h, 1.0 - h**2
+
+
+ACTIVATIONS = {
+    'elu': _elu,
+    'identity': _identity,
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'softplus': _softplus,
+    'tanh': _tanh,
+    }
+"""dict [function]: Activation functions available in frozen HDNNP.
+Each function returns its value and derivative."""
+
+
+class FrozenHDNNP(object):
+    """Pure NumPy evaluator of a frozen HDNNP."""
+    def __init__(self, file_path):
+        """
+        | It loads a self-contained .npz file written by
+          ``hdnnpy convert --format=numpy``, which contains descriptor
+          parameters and neural network parameters of each element.
+        | Pre-processing is already folded into the first layer of each
+          neural network, so that descriptors are fed as they are.
+        | It depends only on NumPy, and it does not import chainer,
+          mpi4py nor sklearn.
+
+        Args:
+            file_path (~pathlib.Path): File path of frozen HDNNP.
+        """
+        with np.load(str(file_path), allow_pickle=False) as ndarray:
+            bundle = {key: ndarray[key] for key in ndarray.files}
+        version = bundle['version'].item()
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported frozen HDNNP version: {version}')
+
+        self._descriptor = bundle['descriptor'].item()
+        self._elements = bundle['elements'].tolist()
+        self._properties = bundle['properties'].tolist()
+        self._coefficients = bundle['coefficients'].tolist()
+        self._functions = [
+            (name, params)
+            for name in bundle['function_names'].tolist()
+            for params in bundle[f'parameters/{name}'].tolist()]
+        self._cutoff = max(params[0] for _, params in self._functions)
+
+        n_element = len(self._elements)
+        combinations = list(
+            combinations_with_replacement(range(n_element), 2))
+        self._combination_index = np.zeros((n_element, n_element), dtype=int)
+        for k, (e1, e2) in enumerate(combinations):
+            self._combination_index[e1, e2] = k
+            self._combination_index[e2, e1] = k
+        if self._descriptor == 'symmetry_function':
+            self._widths = {'type1': n_element, 'type2': n_element,
+                            'type4': len(combinations)}
+        elif self._descriptor == 'weighted_symmetry_function':
+            self._widths = {'type1': 1, 'type2': 1, 'type4': 1}
+        else:
+            raise ValueError(f'Unsupported descriptor: {self._descriptor}')
+        self._n_feature = sum(self._widths[name]
+                              for name, _ in self._functions)
+
+        self._layers = {}
+        for element in self._elements:
+            activations = bundle[f'{element}/activations'].tolist()
+            self._layers[element] = [
+                (bundle[f'{element}/W{i}'].astype(np.float64),
+                 bundle[f'{element}/b{i}'].astype(np.float64),
+                 ACTIVATIONS[activation])
+                for i, activation in enumerate(activations)]
+
+    @property
+    def elements(self):
+        """list [str]: Elements the frozen HDNNP can deal with."""
+        return self._elements
+
+    @property
+    def n_feature(self):
+        """int: Number of descriptor dimensions."""
+        return self._n_feature
+
+    def evaluate(self, atoms, order=1):
+        """Predict properties of an atomic structure.
+
+        Args:
+            atoms (~ase.Atoms): Atomic structure to predict.
+            order (int, optional):
+                Derivative order of prediction. It accepts 0 or 1.
+                ex.) 0: energy, 1: force, for interatomic potential
+
+        Returns:
+            dict [~numpy.ndarray]:
+            Predicted properties. The same values as
+            :meth:`hdnnpy.inference.Predictor.predict` are returned,
+            but atoms in derivative properties are in the given order.
+        """
+        assert 0 <= order <= 1
+        symbols = atoms.get_chemical_symbols()
+        element_indices = np.array(
+            [self._elements.index(symbol) for symbol in symbols])
+        pairs = self._neighbor_list(
+            atoms.get_positions(), np.array(atoms.get_cell()),
+            atoms.get_pbc(), self._cutoff)
+        pairs['e'] = element_indices[pairs['j']]
+        pairs['z'] = atoms.get_atomic_numbers()[pairs['j']].astype(np.float64)
+
+        n_atom = len(symbols)
+        G = np.zeros((n_atom, self._n_feature))
+        terms = list(self._terms(pairs))
+        for rows, columns, value, _ in terms:
+            np.add.at(G, (rows, columns), value)
+
+        y, dy = self._feedforward(G, symbols)
+        result = {self._properties[0]: self._coefficients[0] * y.mean(axis=0)}
+        if order == 0:
+            return result
+
+        # chain rule through descriptors, whose derivatives are
+        # accumulated to each neighboring atom as descriptor datasets do
+        force = np.zeros((y.shape[1], n_atom, 3))
+        for rows, columns, _, gradients in terms:
+            weight = dy[rows, :, columns]
+            for atom_indices, gradient in gradients:
+                for o in range(y.shape[1]):
+                    np.add.at(force[o], atom_indices,
+                              weight[:, o, None] * gradient)
+        result[self._properties[1]] = (self._coefficients[1]
+                                       * force.reshape(y.shape[1], -1))
+        return result
+
+    def predict(self, structures, order=1):
+        """Predict properties of atomic structures.
+
+        Args:
+            structures (list [~ase.Atoms]): Atomic structures to predict.
+            order (int, optional): Derivative order of prediction.
+
+        Returns:
+            list [dict [~numpy.ndarray]]:
+            Predicted properties for each structure in the given order.
+        """
+        return [self.evaluate(atoms, order) for atoms in structures]
+
+    def _feedforward(self, G, symbols):
+        """Calculate output of neural networks and its derivative
+        w.r.t. descriptors for each atom."""
+        symbols = np.array(symbols)
+        n_property = self._layers[self._elements[0]][-1][1].shape[0]
+        y = np.zeros((len(symbols), n_property))
+        dy = np.zeros((len(symbols), n_property, G.shape[1]))
+        for element in set(symbols):
+            mask = symbols == element
+            h = G[mask]
+            derivatives = []
+            for W, b, activation in self._layers[element]:
+                h, dh = activation(h @ W.T + b)
+                derivatives.append(dh)
+            y[mask] = h
+            layers = self._layers[element]
+            jacobian = derivatives[-1][:, :, None] * layers[-1][0]
+            for (W, _, _), dh in zip(layers[-2::-1], derivatives[-2::-1]):
+                jacobian = (jacobian * dh[:, None, :]) @ W
+            dy[mask] = jacobian
+        return y, dy
+
+    def _terms(self, pairs):
+        """Yield contributions of each symmetry function to descriptors.
+
+        Each item is a tuple of row (atom) indices, column (feature)
+        indices, values and a list of pairs of atom indices and
+        gradients w.r.t. positions of the atoms."""
+        weighted = self._descriptor == 'weighted_symmetry_function'
+        column = 0
+        for name, params in self._functions:
+            Rc, *params = params
+            mask = pairs['R'] < Rc
+            i, j, e, z = (pairs[key][mask] for key in 'ijez')
+            D, R = pairs['D'][mask], pairs['R'][mask]
+            t = np.tanh(1.0 - R/Rc)
+            fc = t ** 3
+            dfc = -3.0 * t**2 * (1.0 - t**2) / Rc
+
+            if name in ['type1', 'type2']:
+                if name == 'type1':
+                    g, dg = fc, dfc
+                else:
+                    eta, Rs = params
+                    gauss = np.exp(-eta * (R-Rs)**2)
+                    g = gauss * fc
+                    dg = gauss * (dfc - 2.0*eta*(R-Rs)*fc)
+                if weighted:
+                    g, dg, columns = z * g, z * dg, column
+                else:
+                    columns = column + e
+                yield (i, columns + np.zeros_like(i), g,
+                       [(j, (dg / R)[:, None] * D)])
+
+            elif name == 'type4':
+                eta, lambda_, zeta = params
+                a, b = self._triplets(i)
+                gauss = np.exp(-eta * R**2)
+                f = gauss * fc
+                df = gauss * (dfc - 2.0*eta*R*fc)
+                cos = (np.sum(D[a] * D[b], axis=1) / (R[a] * R[b]))
+                ang = 1.0 + lambda_*cos
+                coefficient = 2.0 ** (1-zeta)
+                if weighted:
+                    coefficient = coefficient * z[a] * z[b]
+                    columns = column + np.zeros_like(a)
+                else:
+                    columns = column + self._combination_index[e[a], e[b]]
+                g = coefficient * ang**zeta * f[a] * f[b]
+                dang = coefficient * zeta * ang**(zeta-1) * lambda_
+                gradients = []
+                for p, q in [(a, b), (b, a)]:
+                    dcos = (D[q] / (R[p] * R[q])[:, None]
+                            - (cos / R[p]**2)[:, None] * D[p])
+                    gradient = ((dang * f[p] * f[q])[:, None] * dcos
+                                + (coefficient * ang**zeta * df[p] * f[q]
+                                   / R[p])[:, None] * D[p])
+                    gradients.append((j[p], gradient))
+                yield i[a], columns, g, gradients
+
+            else:
+                raise ValueError(f'Unsupported symmetry function: {name}')
+            column += self._widths[name]
+
+    @staticmethod
+    def _neighbor_list(positions, cell, pbc, cutoff):
+        """Make a list of neighboring atom pairs in the same way as
+        :func:`ase.neighborlist.neighbor_list`, sorted by ``(i, j)``."""
+        repeats = [0, 0, 0]
+        if np.any(pbc):
+            # wrap atoms into the cell along periodic directions
+            scaled = positions @ np.linalg.inv(cell)
+            scaled[:, pbc] %= 1.0
+            positions = scaled @ cell
+            volume = abs(np.linalg.det(cell))
+            for k in range(3):
+                if pbc[k]:
+                    normal = np.cross(cell[(k+1) % 3], cell[(k+2) % 3])
+                    height = volume / np.linalg.norm(normal)
+                    repeats[k] = int(np.ceil(cutoff / height))
+
+        i_list, j_list, D_list = [], [], []
+        for shift in product(*[range(-n, n+1) for n in repeats]):
+            D = (positions[None, :, :] - positions[:, None, :]
+                 + np.array(shift) @ cell)
+            mask = np.sum(D**2, axis=2) < cutoff**2
+            if not any(shift):
+                np.fill_diagonal(mask, False)
+            i, j = np.nonzero(mask)
+            i_list.append(i)
+            j_list.append(j)
+            D_list.append(D[i, j])
+        i_list = np.concatenate(i_list)
+        j_list = np.concatenate(j_list)
+        D_list = np.concatenate(D_list)
+
+        sort_indices = np.lexsort((j_list, i_list))
+        D_list = D_list[sort_indices]
+        return {
+            'i': i_list[sort_indices],
+            'j': j_list[sort_indices],
+            'D': D_list,
+            'R': np.linalg.norm(D_list, axis=1),
+            }
+
+    @staticmethod
+    def _triplets(i):
+        """Indices of all pairs of neighbors ``(a, b)`` with ``a < b``
+        which share the same center atom, for a list sorted by
+        center atom ``i``."""
+        _, starts, counts = np.unique(i, return_index=True, return_counts=True)
+        a_list, b_list = [], []
+        for start, count in zip(starts, counts):
+            a, b = np.triu_indices(count, k=1)
+            a_list.append(start + a)
+            b_list.append(start + b)
+        if not a_list:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        return np.concatenate(a_list), np.concatenate(b_list)
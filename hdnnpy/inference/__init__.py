@@ -0,0 +1,14 @@
+# coding: utf-8
+
+"""Inference tools subpackage for trained HDNNP."""
+
+__all__ = [
+    'HDNNPCalculator',
+    'PredictionClient',
+    'PredictionServer',
+    'Predictor',
+    ]
+
+from hdnnpy.inference.calculator import HDNNPCalculator
+from hdnnpy.inference.predictor import Predictor
+from hdnnpy.inference.server import (PredictionClient, PredictionServer)
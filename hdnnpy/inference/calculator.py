@@ -0,0 +1,84 @@
+# coding: utf-8
+
+"""ASE calculator interface backed by a trained HDNNP."""
+
+from ase.calculators.calculator import (Calculator, all_changes)
+import numpy as np
+
+from hdnnpy.dataset import AtomicStructure
+from hdnnpy.inference.predictor import Predictor
+
+
+class HDNNPCalculator(Calculator):
+    """ASE calculator interface backed by a trained HDNNP."""
+    implemented_properties = ['energy', 'free_energy', 'forces']
+    """list [str]: Properties this calculator can calculate."""
+
+    def __init__(self, load_dir=None, skin=0.5, predictor=None, **kwargs):
+        """
+        | A trained HDNNP is loaded only once at initialization, and
+          energy and forces are calculated in memory.
+        | Neighbor lists are built with a margin of ``skin`` and reused
+          between calculations while atoms move slightly, e.g. during
+          MD simulation or structure relaxation.
+
+        Args:
+            load_dir (~pathlib.Path, optional):
+                Path to directory to load training output files.
+                Required unless ``predictor`` is given.
+            skin (float, optional):
+                Margin of cutoff distance of reusable neighbor lists.
+                If 0.0, neighbor lists are built for every calculation.
+            predictor (Predictor, optional):
+                If specified, it is used instead of loading a new one
+                from ``load_dir``.
+            **kwargs: Other keyword arguments passed to
+                :class:`~ase.calculators.calculator.Calculator`.
+        """
+        assert load_dir is not None or predictor is not None
+        super().__init__(**kwargs)
+        if predictor is None:
+            predictor = Predictor(load_dir)
+        self._predictor = predictor
+        self._skin = skin
+        self._structure = None
+        self._sort_indices = None
+
+    def calculate(self, atoms=None, properties=('energy',),
+                  system_changes=all_changes):
+        """Calculate energy and forces of ``atoms``.
+
+        Args:
+            atoms (~ase.Atoms, optional): Atomic structure to calculate.
+            properties (list [str], optional): Properties to calculate.
+            system_changes (list [str], optional):
+                Changes of ``atoms`` from the last calculation.
+        """
+        super().calculate(atoms, properties, system_changes)
+        symbols = self.atoms.get_chemical_symbols()
+
+        if (self._structure is None
+                or 'numbers' in system_changes
+                or 'pbc' in system_changes):
+            atoms = self.atoms.copy()
+            atoms.info['tag'] = atoms.get_chemical_formula()
+            self._structure = AtomicStructure(atoms, skin=self._skin)
+            self._sort_indices = [
+                i for _, i
+                in sorted((tag, i) for i, tag in enumerate(symbols))]
+        else:
+            self._structure.set_cell(self.atoms.get_cell())
+            self._structure.set_positions(
+                self.atoms.get_positions()[self._sort_indices])
+
+        order = 1 if 'forces' in properties else 0
+        result, = self._predictor.predict_structures(
+            [self._structure], order)
+
+        energy = result['energy'].item() * len(self.atoms)
+        self.results['energy'] = energy
+        self.results['free_energy'] = energy
+        if order >= 1:
+            forces = np.empty((len(self.atoms), 3))
+            forces[self._sort_indices] = result['force'].reshape(-1, 3)
+            self.results['forces'] = forces
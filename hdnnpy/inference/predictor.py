@@ -0,0 +1,189 @@
+# coding: utf-8
+
+"""Predict properties with a trained HDNNP kept in memory."""
+
+import chainer
+import numpy as np
+import yaml
+
+from hdnnpy.dataset import (AtomicStructure, HDNNPDataset)
+from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+from hdnnpy.dataset.property import PROPERTY_DATASET
+from hdnnpy.model import (MasterNNP, ModelCache)
+from hdnnpy.preprocess import PREPROCESS
+from hdnnpy.utils import (Precision, pprint, pyyaml_path_constructor)
+
+
+class Predictor(object):
+    """Predict properties with a trained HDNNP kept in memory."""
+    def __init__(self, load_dir, verbose=False, max_cache_size=None,
+                 fold_preprocesses=False):
+        """
+        | It loads training result, parameters of pre-processing and
+          parameters of `MasterNNP` from ``load_dir`` only once at
+          initialization.
+        | `HighDimensionalNNP` instances are built lazily and cached for
+          each elemental composition, so that repeated predictions for
+          the same composition skip model construction and parameter
+          synchronization.
+
+        Args:
+            load_dir (~pathlib.Path):
+                Path to directory to load training output files.
+            verbose (bool, optional): Print log to stdout.
+            max_cache_size (int, optional):
+                Maximum number of cached `HighDimensionalNNP` instances.
+                If ``None``, all of them are cached.
+            fold_preprocesses (bool, optional):
+                If True, pre-processing is folded into the first layer
+                of `MasterNNP` and descriptors are fed without it.
+        """
+        yaml.add_constructor('Path', pyyaml_path_constructor)
+        training_result = yaml.load(
+            (load_dir / 'training_result.yaml').open())
+        self._dataset_config = training_result['dataset']
+        self._model_config = training_result['model']
+        self._elements = training_result['training']['elements']
+
+        dc = self._dataset_config
+        mc = self._model_config
+        Precision.set(dc.get('precision', 'float32'))
+
+        self._preprocesses = []
+        for (name, args, kwargs) in dc['preprocesses']:
+            preprocess = PREPROCESS[name](*args, **kwargs)
+            preprocess.load(
+                load_dir / 'preprocess' / f'{name}.npz', verbose=verbose)
+            self._preprocesses.append(preprocess)
+
+        master_nnp = MasterNNP(
+            self._elements,
+            mc['n_input'], mc['hidden_layers'], mc['n_output'])
+        chainer.serializers.load_npz(load_dir / 'master_nnp.npz', master_nnp)
+        if fold_preprocesses:
+            master_nnp = master_nnp.fold_preprocesses(self._preprocesses)
+            self._preprocesses = []
+        n_input = master_nnp[0].fc_layer0.W.shape[1]
+        self._model_cache = ModelCache(
+            master_nnp, n_input, mc['hidden_layers'], mc['n_output'],
+            max_size=max_cache_size)
+
+        if verbose:
+            pprint(f'Loaded trained HDNNP from {load_dir}.')
+
+    @property
+    def elements(self):
+        """list [str]: Elements the loaded HDNNP can deal with."""
+        return self._elements
+
+    def get_model(self, elemental_composition):
+        """Get a `HighDimensionalNNP` for an elemental composition.
+
+        Args:
+            elemental_composition (list [str]):
+                Elemental composition of atomic structures.
+
+        Returns:
+            HighDimensionalNNP:
+            Cached instance whose parameters are synchronized with the
+            loaded `MasterNNP`.
+        """
+        return self._model_cache.get(elemental_composition)
+
+    def predict(self, structures, order=1):
+        """Predict properties of atomic structures.
+
+        Args:
+            structures (list [~ase.Atoms]): Atomic structures to predict.
+            order (int, optional):
+                Derivative order of prediction.
+                ex.) 0: energy, 1: force, for interatomic potential
+
+        Returns:
+            list [dict [~numpy.ndarray]]:
+            Predicted properties for each structure in the given order.
+            Atoms in derivative properties are in the same order as
+            those in the given structure.
+        """
+        wrapped = []
+        for atoms in structures:
+            atoms = atoms.copy()
+            atoms.info.setdefault('tag', atoms.get_chemical_formula())
+            wrapped.append(AtomicStructure(atoms))
+
+        results = self.predict_structures(wrapped, order)
+        for atoms, result in zip(structures, results):
+            unsort_indices = self._unsort_indices(atoms)
+            for k, name in enumerate(list(result)):
+                value = result[name]
+                for axis in range(value.ndim - k, value.ndim):
+                    value = np.take(value, unsort_indices, axis=axis)
+                result[name] = value
+        return results
+
+    def predict_structures(self, structures, order=1):
+        """Predict properties of wrapped atomic structures.
+
+        Structures which have the same elemental composition are
+        predicted together as a batch.
+
+        Args:
+            structures (list [AtomicStructure]):
+                Atomic structures to predict. Each of them has to have a
+                tag in its ``info``.
+            order (int, optional):
+                Derivative order of prediction.
+
+        Returns:
+            list [dict [~numpy.ndarray]]:
+            Predicted properties for each structure in the given order.
+            Atoms in derivative properties are sorted by element in the
+            same way as `AtomicStructure`.
+        """
+        dc = self._dataset_config
+
+        grouped = {}
+        for i, structure in enumerate(structures):
+            key = tuple(structure.get_chemical_symbols())
+            grouped.setdefault(key, []).append((i, structure))
+
+        results = [None] * len(structures)
+        for elemental_composition, group in grouped.items():
+            indices, structure_list = zip(*group)
+
+            descriptor = DESCRIPTOR_DATASET[dc['descriptor']](
+                order, list(structure_list), **dc['parameters'])
+            descriptor.make(verbose=False)
+            property_ = PROPERTY_DATASET[dc['property_']](
+                order, list(structure_list))
+            dataset = HDNNPDataset(descriptor, property_)
+            dataset.construct(
+                all_elements=self._elements,
+                preprocesses=self._preprocesses,
+                shuffle=False, verbose=False)
+
+            hdnnp = self.get_model(elemental_composition)
+            batch = dataset.get_batch(slice(None))
+            inputs = [batch[f'inputs/{i}'] for i in range(order + 1)]
+            with chainer.using_config('train', False), \
+                 chainer.using_config('enable_backprop', False):
+                predictions = hdnnp.predict(inputs, order)
+
+            for j, index in enumerate(indices):
+                results[index] = {
+                    name: coefficient * prediction.data[j]
+                    for name, coefficient, prediction
+                    in zip(property_.properties, property_.coefficients,
+                           predictions)}
+
+        return results
+
+    @staticmethod
+    def _unsort_indices(atoms):
+        """Indices to restore the order of atoms sorted in
+        `AtomicStructure` along a ``3 * n_atom`` derivative axis."""
+        symbols = atoms.get_chemical_symbols()
+        sort_indices = [i for _, i
+                        in sorted((tag, i) for i, tag in enumerate(symbols))]
+        inverse = np.argsort(sort_indices)
+        return (3 * inverse[:, None] + np.arange(3)).ravel()
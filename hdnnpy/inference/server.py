@@ -0,0 +1,226 @@
+# coding: utf-8
+
+"""Long-lived prediction server and its client."""
+
+import io
+from pathlib import Path
+import socket
+import socketserver
+import struct
+
+import ase
+import numpy as np
+
+from hdnnpy.utils import pprint
+
+
+HEADER = struct.Struct('!Q')
+
+
+def parse_address(address):
+    """Parse an address of prediction server.
+
+    Args:
+        address (str or ~pathlib.Path):
+            ``<host>:<port>`` for TCP socket, otherwise a file path of
+            Unix domain socket.
+
+    Returns:
+        tuple [int, str or tuple [str, int]]:
+        Socket family and address passed to :mod:`socket`.
+    """
+    address = str(address)
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def recv_message(sock):
+    """Receive arrays sent by :func:`send_message`.
+
+    Args:
+        sock (~socket.socket): Connected socket.
+
+    Returns:
+        dict [~numpy.ndarray] or None:
+        Received arrays. ``None`` if the connection is closed.
+    """
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exactly(sock, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    with np.load(io.BytesIO(payload), allow_pickle=False) as ndarray:
+        return {key: ndarray[key] for key in ndarray.files}
+
+
+def send_message(sock, arrays):
+    """Send arrays as a length-prefixed .npz format binary.
+
+    Args:
+        sock (~socket.socket): Connected socket.
+        arrays (dict [~numpy.ndarray]): Arrays to send.
+    """
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    payload = buffer.getvalue()
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, n_bytes):
+    """Receive exactly ``n_bytes`` bytes, or ``None`` if the connection
+    is closed."""
+    buffer = bytearray()
+    while len(buffer) < n_bytes:
+        chunk = sock.recv(n_bytes - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Answer prediction requests until the client closes connection."""
+    def handle(self):
+        predictor = self.server.predictor
+        while True:
+            request = recv_message(self.request)
+            if request is None:
+                break
+            try:
+                n_structure = request['n_structure'].item()
+                order = request['order'].item()
+                structures = [ase.Atoms(numbers=request[f'{i}/numbers'],
+                                        positions=request[f'{i}/positions'],
+                                        cell=request[f'{i}/cell'],
+                                        pbc=request[f'{i}/pbc'])
+                              for i in range(n_structure)]
+                results = predictor.predict(structures, order)
+                response = {f'{i}/{key}': value
+                            for i, result in enumerate(results)
+                            for key, value in result.items()}
+            except Exception as error:
+                response = {'error': np.array(f'{type(error).__name__}:'
+                                              f' {error}')}
+                if self.server.verbose:
+                    pprint(f'Failed to answer a request: {error}')
+            send_message(self.request, response)
+
+
+class _TCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class PredictionServer(object):
+    """Long-lived server which answers prediction requests."""
+    def __init__(self, predictor, address, verbose=False):
+        """
+        | It serves a :class:`~hdnnpy.inference.Predictor` which keeps a
+          trained HDNNP in memory, so that clients can get predictions
+          without reloading the model.
+        | Requests are processed one by one in a single thread, and a
+          connection is kept open until the client closes it.
+
+        Args:
+            predictor (Predictor): Predictor to serve.
+            address (str or ~pathlib.Path):
+                ``<host>:<port>`` for TCP socket, otherwise a file path
+                of Unix domain socket.
+            verbose (bool, optional): Print log to stdout.
+        """
+        family, address = parse_address(address)
+        if family == socket.AF_UNIX:
+            if Path(address).exists():
+                Path(address).unlink()
+            self._server = socketserver.UnixStreamServer(
+                address, _RequestHandler)
+        else:
+            self._server = _TCPServer(address, _RequestHandler)
+        self._server.predictor = predictor
+        self._server.verbose = verbose
+        self._family = family
+        self._address = address
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the server socket."""
+        self._server.server_close()
+        if self._family == socket.AF_UNIX and Path(self._address).exists():
+            Path(self._address).unlink()
+
+    def serve_forever(self):
+        """Handle requests until :meth:`shutdown` is called."""
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop :meth:`serve_forever` loop."""
+        self._server.shutdown()
+
+
+class PredictionClient(object):
+    """Client of `PredictionServer`."""
+    def __init__(self, address, timeout=None):
+        """
+        Args:
+            address (str or ~pathlib.Path):
+                Address of `PredictionServer`. ``<host>:<port>`` for TCP
+                socket, otherwise a file path of Unix domain socket.
+            timeout (float, optional): Timeout of socket operations.
+        """
+        family, address = parse_address(address)
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def close(self):
+        """Close connection to the server."""
+        self._socket.close()
+
+    def predict(self, structures, order=1):
+        """Request prediction of atomic structures.
+
+        Args:
+            structures (list [~ase.Atoms]): Atomic structures to predict.
+            order (int, optional):
+                Derivative order of prediction.
+                ex.) 0: energy, 1: force, for interatomic potential
+
+        Returns:
+            list [dict [~numpy.ndarray]]:
+            Predicted properties for each structure in the given order.
+
+        Raises:
+            RuntimeError: If the server fails to predict.
+        """
+        request = {'n_structure': np.array(len(structures)),
+                   'order': np.array(order)}
+        for i, atoms in enumerate(structures):
+            request[f'{i}/numbers'] = atoms.get_atomic_numbers()
+            request[f'{i}/positions'] = atoms.get_positions()
+            request[f'{i}/cell'] = np.array(atoms.get_cell())
+            request[f'{i}/pbc'] = atoms.get_pbc()
+        send_message(self._socket, request)
+
+        response = recv_message(self._socket)
+        if response is None:
+            raise RuntimeError('Connection is closed by the server.')
+        if 'error' in response:
+            raise RuntimeError(response['error'].item())
+        results = [{} for _ in structures]
+        for key, value in response.items():
+            i, name = key.split('/', 1)
+            results[int(i)][name] = value
+        return results
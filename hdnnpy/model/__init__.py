@@ -3,8 +3,15 @@
 """Neural network structure models subpackage."""
 
 __all__ = [
+    'AtomListNNP',
     'HighDimensionalNNP',
     'MasterNNP',
+    'ModelCache',
+    'MultiCompositionNNP',
     ]
 
-from hdnnpy.model.models import (HighDimensionalNNP, MasterNNP)
+from hdnnpy.model.cache import (ModelCache, MultiCompositionNNP)
+from hdnnpy.model.models import (AtomListNNP,
+                                 HighDimensionalNNP,
+                                 MasterNNP,
+                                 )
@@ -0,0 +1,193 @@
+# coding: utf-8
+
+"""Cache of HDNNP models built for each elemental composition."""
+
+from collections import OrderedDict
+
+import chainer
+
+from hdnnpy.model.models import HighDimensionalNNP
+
+
+class ModelCache(object):
+    """LRU cache of `HighDimensionalNNP` keyed by elemental
+    composition."""
+    def __init__(self, master_nnp, n_feature, hidden_layers, n_property,
+                 max_size=None):
+        """
+        | A `HighDimensionalNNP` is built and its parameters are
+          synchronized with ``master_nnp`` only when an elemental
+          composition is requested for the first time.
+        | If the number of cached models exceeds ``max_size``, the least
+          recently used one is discarded.
+
+        Notes:
+            Cached models are not synchronized again, so that it is
+            intended to be used with fixed parameters, i.e. prediction.
+
+        Args:
+            master_nnp (MasterNNP):
+                `MasterNNP` instance which has trained parameters.
+            n_feature (int): Number of nodes of input layer.
+            hidden_layers (list [tuple [int, str]]):
+                A neural network structure passed to `SubNNP`.
+            n_property (int): Number of nodes of output layer.
+            max_size (int, optional):
+                Maximum number of cached models. If ``None``, the cache
+                can grow without bound.
+        """
+        assert max_size is None or max_size > 0
+        self._master_nnp = master_nnp
+        self._args = (n_feature, hidden_layers, n_property)
+        self._max_size = max_size
+        self._models = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __contains__(self, elemental_composition):
+        return tuple(elemental_composition) in self._models
+
+    def __len__(self):
+        """Number of cached models."""
+        return len(self._models)
+
+    @property
+    def hits(self):
+        """int: Number of requests answered by a cached model."""
+        return self._hits
+
+    @property
+    def master_nnp(self):
+        """MasterNNP: `MasterNNP` instance which has parameters."""
+        return self._master_nnp
+
+    @property
+    def misses(self):
+        """int: Number of requests which required to build a model."""
+        return self._misses
+
+    def clear(self):
+        """Discard all cached models."""
+        self._models.clear()
+
+    def get(self, elemental_composition):
+        """Get a model for an elemental composition.
+
+        Args:
+            elemental_composition (list [str]):
+                Elemental composition of atomic structures.
+
+        Returns:
+            HighDimensionalNNP:
+            Cached or newly built instance whose parameters are
+            synchronized with `MasterNNP`.
+        """
+        key = tuple(elemental_composition)
+        if key in self._models:
+            self._hits += 1
+            self._models.move_to_end(key)
+            return self._models[key]
+
+        self._misses += 1
+        hdnnp = HighDimensionalNNP(elemental_composition, *self._args)
+        hdnnp.sync_param_with(self._master_nnp)
+        self._models[key] = hdnnp
+        if self._max_size is not None and len(self._models) > self._max_size:
+            self._models.popitem(last=False)
+        return hdnnp
+
+
+class MultiCompositionNNP(chainer.Link):
+    """HDNNP which switches `HighDimensionalNNP` by elemental
+    composition."""
+    def __init__(self, master_nnp, n_feature, hidden_layers, n_property):
+        """
+        | It keeps a `HighDimensionalNNP` for each elemental composition
+          in `ModelCache`, and forwards :meth:`predict` to the one
+          chosen by :meth:`select`.
+        | It is used to train with mini-batches of different elemental
+          compositions in a single trainer.
+        | Parameters of a cached model are synchronized with
+          ``master_nnp`` lazily when it is selected after
+          :meth:`sync_param_with` is called.
+
+        Args:
+            master_nnp (MasterNNP):
+                `MasterNNP` instance where you manage parameters.
+            n_feature (int): Number of nodes of input layer.
+            hidden_layers (list [tuple [int, str]]):
+                A neural network structure passed to `SubNNP`.
+            n_property (int): Number of nodes of output layer.
+        """
+        super().__init__()
+        self._cache = ModelCache(
+            master_nnp, n_feature, hidden_layers, n_property)
+        self._synced = set()
+        self._current = None
+
+    @property
+    def current(self):
+        """HighDimensionalNNP: Currently selected model."""
+        return self._current
+
+    def cleargrads(self):
+        """Clear gradients of the selected model."""
+        if self._current is not None:
+            self._current.cleargrads()
+
+    def predict(self, inputs, order):
+        """Get prediction of the selected model.
+
+        Args:
+            inputs (list [~numpy.ndarray]):
+                Passed to :meth:`HighDimensionalNNP.predict`.
+            order (int):
+                Passed to :meth:`HighDimensionalNNP.predict`.
+
+        Returns:
+            list [~chainer.Variable]: Predicted values.
+        """
+        return self._current.predict(inputs, order)
+
+    def reduce_grad_to(self, master_nnp):
+        """Collect calculated gradient of parameters of the selected
+        model into `MasterNNP`.
+
+        Args:
+            master_nnp (MasterNNP):
+                `MasterNNP` instance where you manage parameters.
+        """
+        self._current.reduce_grad_to(master_nnp)
+
+    def select(self, elemental_composition):
+        """Select a model for an elemental composition.
+
+        Gradients of the selected model are cleared, because they are
+        left from its last backward computation, which may be before
+        :meth:`cleargrads` is called for another model.
+
+        Args:
+            elemental_composition (list [str]):
+                Elemental composition of the next mini-batch.
+        """
+        key = tuple(elemental_composition)
+        is_cached = key in self._cache
+        hdnnp = self._cache.get(elemental_composition)
+        if is_cached and key not in self._synced:
+            hdnnp.sync_param_with(self._cache.master_nnp)
+        self._synced.add(key)
+        hdnnp.cleargrads()
+        self._current = hdnnp
+
+    def sync_param_with(self, master_nnp):
+        """Synchronize the parameters of the selected model with
+        `MasterNNP`, and mark the others as outdated.
+
+        Args:
+            master_nnp (MasterNNP):
+                `MasterNNP` instance where you manage parameters.
+        """
+        self._synced.clear()
+        if self._current is not None:
+            self._current.sync_param_with(master_nnp)
+            self._synced.add(tuple(self._current.elemental_composition))
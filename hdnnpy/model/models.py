@@ -2,10 +2,13 @@
 
 """Neural network potential models."""
 
+import copy
+
 import chainer
 import chainer.functions as F
 import chainer.links as L
 from chainer import Variable
+import numpy as np
 
 
 class HighDimensionalNNP(chainer.ChainList):
@@ -188,6 +191,132 @@ class HighDimensionalNNP(chainer.ChainList):
                     for nnp, dx, d2x in zip(self, dxs, d2xs)])
 
 
+class AtomListNNP(chainer.ChainList):
+    """HDNNP which processes a flattened list of atoms.
+
+    Unlike `HighDimensionalNNP`, it has only one `SubNNP` for each
+    element, and it is not bound to an elemental composition.
+    A mini-batch made by `AtomListDataset` contains structures which
+    have different numbers of atoms and elements, and all of them are
+    processed in a single feed-forward and back-propagation pass.
+    """
+    def __init__(self, elements, *args):
+        """
+        Args:
+            elements (list [str]):
+                Element symbols in the same order as `MasterNNP`.
+            *args: Positional arguments that is passed to `SubNNP`.
+        """
+        super().__init__(*[SubNNP(element, *args) for element in elements])
+        self._atom_elements = None
+        self._atom_structures = None
+
+    def get_by_element(self, element):
+        """Get the `SubNNP` instance that represents an element.
+
+        Args:
+            element (str): Element symbol that you want to get.
+
+        Returns:
+            list [SubNNP]: `SubNNP` instance of ``element``.
+        """
+        return [nnp for nnp in self if nnp.element == element]
+
+    def predict(self, inputs, order):
+        """Get prediction from input data in a feed-forward way.
+
+        It accepts 0 or 1 for ``order``. :meth:`set_atoms` has to be
+        called before with the same mini-batch.
+
+        Notes:
+            0th-order predicted value is not total value, but per-atom
+            value.
+
+        Args:
+            inputs (list [~numpy.ndarray]):
+                Length have to equal to ``order + 1``. The shapes are
+                ``(n_atom, n_input)`` and ``(n_atom, n_input, n_deriv)``.
+            order (int):
+                Derivative order of prediction by this model.
+
+        Returns:
+            list [~chainer.Variable]:
+                Predicted values for each structure. The shapes are
+                ``(n_structure, n_output)`` and
+                ``(n_structure, n_output, n_deriv)``.
+        """
+        assert 0 <= order <= 1
+        elements = self._atom_elements
+        structures = self._atom_structures
+        bounds = np.searchsorted(elements, np.arange(len(self) + 1))
+        segments = [(nnp, slice(start, end)) for nnp, start, end
+                    in zip(self, bounds[:-1], bounds[1:]) if start < end]
+        n_structure = structures.max() + 1
+        dtype = inputs[0].dtype
+        # segment-sum matrix from atoms to structures
+        summation = np.zeros((n_structure, len(structures)), dtype=dtype)
+        summation[structures, np.arange(len(structures))] = 1.0
+        n_atoms = summation.sum(axis=1, keepdims=True)
+        for nnp in self:
+            nnp.results.clear()
+
+        xs = [Variable(inputs[0][segment]) for _, segment in segments]
+        with chainer.force_backprop_mode():
+            for (nnp, _), x in zip(segments, xs):
+                nnp.feedforward(x)
+            y_atom = F.concat([nnp.results['y'] for nnp, _ in segments],
+                              axis=0)
+            y_pred = F.matmul(summation / n_atoms, y_atom)
+        if order == 0:
+            return [y_pred]
+
+        dxs = [Variable(inputs[1][segment]) for _, segment in segments]
+        differentiate_more = chainer.config.train or order > 1
+        with chainer.force_backprop_mode():
+            for (nnp, _), x in zip(segments, xs):
+                nnp.differentiate(x, differentiate_more)
+            dy_atom = F.concat(
+                [F.einsum('aoi,aix->aox', nnp.results['dy'], dx)
+                 for (nnp, _), dx in zip(segments, dxs)], axis=0)
+            dy_pred = F.einsum('sa,aox->sox', summation, dy_atom)
+        return [y_pred, dy_pred]
+
+    def reduce_grad_to(self, master_nnp):
+        """Collect calculated gradient of parameters into `MasterNNP`
+        for each element.
+
+        Args:
+            master_nnp (MasterNNP):
+                `MasterNNP` instance where you manage parameters.
+        """
+        for master in master_nnp.children():
+            for nnp in self.get_by_element(master.element):
+                master.addgrads(nnp)
+
+    def set_atoms(self, elements, structures):
+        """Set the atom list of the next mini-batch.
+
+        Args:
+            elements (~numpy.ndarray):
+                Element index of each atom, sorted in ascending order.
+            structures (~numpy.ndarray):
+                Index of structure in a mini-batch of each atom.
+        """
+        self._atom_elements = elements
+        self._atom_structures = structures
+
+    def sync_param_with(self, master_nnp):
+        """Synchronize the parameters with `MasterNNP` for each element.
+
+        Args:
+            master_nnp (MasterNNP):
+                `MasterNNP` instance where you manage parameters.
+        """
+        for master in master_nnp.children():
+            for nnp in self.get_by_element(master.element):
+                nnp.copyparams(master)
+
+
 class MasterNNP(chainer.ChainList):
     """Responsible for managing the parameters of each element."""
     def __init__(self, elements, *args):
@@ -201,6 +330,39 @@ class MasterNNP(chainer.ChainList):
         """
         super().__init__(*[SubNNP(element, *args) for element in elements])
 
+    def fold_preprocesses(self, preprocesses):
+        """Make a copy whose first layers absorb pre-processing.
+
+        | Each pre-processing is an affine map for each element, so that
+          the composition of them can be folded into weight and bias of
+          the first layer of each `SubNNP`.
+        | The returned instance takes descriptors without
+          pre-processing, which makes pre-processing pass unnecessary
+          in prediction.
+
+        Notes:
+            Input dimension of the returned instance is that of
+            descriptors before pre-processing. If `PCA` reduces feature
+            dimension, the first layer becomes wider instead.
+
+        Args:
+            preprocesses (list [PreprocessBase]):
+                Pre-processing applied to descriptors in a given order.
+
+        Returns:
+            MasterNNP: New instance with pre-processing folded in.
+        """
+        master_nnp = copy.deepcopy(self)
+        if not preprocesses:
+            return master_nnp
+        for nnp in master_nnp:
+            matrix, offset = preprocesses[0].affine_params(nnp.element)
+            for preprocess in preprocesses[1:]:
+                matrix_, offset_ = preprocess.affine_params(nnp.element)
+                matrix, offset = matrix @ matrix_, offset @ matrix_ + offset_
+            nnp.fold_affine(matrix, offset)
+        return master_nnp
+
     def dump_params(self):
         """Dump its own parameters as :obj:`str`.
 
@@ -272,6 +434,32 @@ class SubNNP(chainer.Chain):
         """Return the number of hidden_layers."""
         return self._n_layer
 
+    def fold_affine(self, matrix, offset):
+        """Fold an affine map of input data into the first layer.
+
+        After folding, it outputs the same value for ``x`` as the
+        original one does for ``x @ matrix + offset``.
+
+        Args:
+            matrix (~numpy.ndarray):
+                Matrix of affine map which has the shape
+                ``(n_feature, n_input)``.
+            offset (~numpy.ndarray):
+                Offset of affine map which has the shape
+                ``(n_input,)``.
+        """
+        layer = self.fc_layer0
+        dtype = layer.W.dtype
+        weight = layer.W.data.astype(np.float64)
+        bias = layer.b.data.astype(np.float64)
+        new_weight = (weight @ matrix.T).astype(dtype)
+        new_bias = (bias + weight @ offset).astype(dtype)
+        del self.fc_layer0
+        with self.init_scope():
+            self.fc_layer0 = L.Linear(
+                new_weight.shape[1], new_weight.shape[0],
+                initialW=new_weight, initial_bias=new_bias)
+
     def feedforward(self, x):
         """Propagate input data in a feed-forward way.
 
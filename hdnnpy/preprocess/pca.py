@@ -47,6 +47,21 @@ class PCA(PreprocessBase):
         each feature dimension and each element."""
         return self._transform
 
+    def affine_params(self, element):
+        """Get an affine map equivalent to this pre-processing.
+
+        Args:
+            element (str): Element symbol whose parameters are used.
+
+        Returns:
+            tuple [~numpy.ndarray, ~numpy.ndarray]:
+            Matrix ``A`` and offset ``c`` which satisfy
+            ``x @ A + c == apply(x)`` for a feature vector ``x``.
+        """
+        mean = self._mean[element]
+        transform = self._transform[element]
+        return transform, - mean @ transform
+
     def apply(self, dataset, elemental_composition, verbose=True):
         """Apply the same pre-processing for each element to dataset.
 
@@ -83,6 +98,18 @@ class PCA(PreprocessBase):
 
         return dataset
 
+    def dump_arrays(self):
+        """Dump its own parameters as :obj:`dict` of arrays.
+
+        Returns:
+            dict [~numpy.ndarray]: Parameters for each element.
+        """
+        arrays = {}
+        for element in self.elements:
+            arrays[f'transform:{element}'] = self._transform[element]
+            arrays[f'mean:{element}'] = self._mean[element]
+        return arrays
+
     def dump_params(self):
         """Dump its own parameters as :obj:`str`.
 
@@ -159,8 +186,8 @@ class PCA(PreprocessBase):
             if self._n_components is None:
                 self._n_components = pca.n_components_
             self._elements.add(element)
-            self._mean[element] = pca.mean_.astype(np.float32)
-            self._transform[element] = pca.components_.T.astype(np.float32)
+            self._mean[element] = pca.mean_.astype(X.dtype)
+            self._transform[element] = pca.components_.T.astype(X.dtype)
             if verbose:
                 pprint(f'''
 Initialized PCA parameters for {element}
@@ -26,6 +26,15 @@ class PreprocessBase(ABC):
         been initialized."""
         return sorted(self._elements)
 
+    @abstractmethod
+    def affine_params(self, element):
+        """Get an affine map equivalent to this pre-processing.
+
+        This is abstract method.
+        Subclass of this base class have to override.
+        """
+        pass
+
     @abstractmethod
     def apply(self, *args, **kwargs):
         """Apply the same pre-processing for each element to dataset.
@@ -35,6 +44,15 @@ class PreprocessBase(ABC):
         """
         pass
 
+    @abstractmethod
+    def dump_arrays(self):
+        """Dump its own parameters as :obj:`dict` of arrays.
+
+        This is abstract method.
+        Subclass of this base class have to override.
+        """
+        pass
+
     @abstractmethod
     def dump_params(self):
         """Dump its own parameters as :obj:`str`.
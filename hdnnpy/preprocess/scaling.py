@@ -45,6 +45,21 @@ class Scaling(PreprocessBase):
         """tuple [float, float]: Target min & max values of scaling."""
         return self._target_min, self._target_max
 
+    def affine_params(self, element):
+        """Get an affine map equivalent to this pre-processing.
+
+        Args:
+            element (str): Element symbol whose parameters are used.
+
+        Returns:
+            tuple [~numpy.ndarray, ~numpy.ndarray]:
+            Matrix ``A`` and offset ``c`` which satisfy
+            ``x @ A + c == apply(x)`` for a feature vector ``x``.
+        """
+        scale = ((self._target_max - self._target_min)
+                 / (self._max[element] - self._min[element]))
+        return np.diag(scale), self._target_min - self._min[element] * scale
+
     def apply(self, dataset, elemental_composition, verbose=True):
         """Apply the same pre-processing for each element to dataset.
 
@@ -88,6 +103,18 @@ class Scaling(PreprocessBase):
 
         return dataset
 
+    def dump_arrays(self):
+        """Dump its own parameters as :obj:`dict` of arrays.
+
+        Returns:
+            dict [~numpy.ndarray]: Parameters for each element.
+        """
+        arrays = {'target': np.array(self.target)}
+        for element in self.elements:
+            arrays[f'max:{element}'] = self._max[element]
+            arrays[f'min:{element}'] = self._min[element]
+        return arrays
+
     def dump_params(self):
         """Dump its own parameters as :obj:`str`.
 
@@ -30,6 +30,21 @@ class Standardization(PreprocessBase):
         in each feature dimension and each element."""
         return self._std
 
+    def affine_params(self, element):
+        """Get an affine map equivalent to this pre-processing.
+
+        Args:
+            element (str): Element symbol whose parameters are used.
+
+        Returns:
+            tuple [~numpy.ndarray, ~numpy.ndarray]:
+            Matrix ``A`` and offset ``c`` which satisfy
+            ``x @ A + c == apply(x)`` for a feature vector ``x``.
+        """
+        mean = self._mean[element]
+        std = self._std[element]
+        return np.diag(1.0 / std), - mean / std
+
     def apply(self, dataset, elemental_composition, verbose=True):
         """Apply the same pre-processing for each element to dataset.
 
@@ -67,6 +82,18 @@ class Standardization(PreprocessBase):
 
         return dataset
 
+    def dump_arrays(self):
+        """Dump its own parameters as :obj:`dict` of arrays.
+
+        Returns:
+            dict [~numpy.ndarray]: Parameters for each element.
+        """
+        arrays = {}
+        for element in self.elements:
+            arrays[f'mean:{element}'] = self._mean[element]
+            arrays[f'std:{element}'] = self._std[element]
+        return arrays
+
     def dump_params(self):
         """Dump its own parameters as :obj:`str`.
 
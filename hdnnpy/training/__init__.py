@@ -3,14 +3,30 @@
 """Training tools subpackage."""
 
 __all__ = [
+    'BatchIterator',
+    'BucketedMultiNodeOptimizer',
+    'COMMUNICATOR',
+    'FlatCommunicator',
+    'HierarchicalCommunicator',
+    'InterleavedIterator',
     'Manager',
     'Updater',
     'ScatterPlot',
+    'convert_batch',
     'set_log_scale',
     ]
 
+from hdnnpy.training.communicator import (COMMUNICATOR,
+                                          FlatCommunicator,
+                                          HierarchicalCommunicator,
+                                          )
 from hdnnpy.training.extensions import (ScatterPlot,
                                         set_log_scale,
                                         )
+from hdnnpy.training.iterator import (BatchIterator,
+                                      InterleavedIterator,
+                                      convert_batch,
+                                      )
 from hdnnpy.training.manager import Manager
+from hdnnpy.training.optimizer import BucketedMultiNodeOptimizer
 from hdnnpy.training.updater import Updater
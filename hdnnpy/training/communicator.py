@@ -0,0 +1,134 @@
+# coding: utf-8
+
+"""MPI communicators to allreduce flat gradient buffers on CPU."""
+
+from mpi4py import MPI as MPI4PY
+
+
+class FlatCommunicator(object):
+    """Allreduce flat buffers over all MPI processes at once."""
+    name = 'flat'
+    """str: Name of this communicator class."""
+
+    def __init__(self, mpi_comm):
+        """
+        Args:
+            mpi_comm (~mpi4py.MPI.Comm): MPI communicator to use.
+        """
+        self._mpi_comm = mpi_comm
+
+    @property
+    def size(self):
+        """int: Number of MPI processes."""
+        return self._mpi_comm.size
+
+    def finish(self, handles):
+        """Wait for allreduce started by :meth:`start`.
+
+        Args:
+            handles (list): Handles returned by :meth:`start`.
+
+        Returns:
+            Iterator [int]: Index of a handle whose allreduce is done,
+            in the order of completion.
+        """
+        requests = list(handles)
+        for _ in range(len(requests)):
+            yield MPI4PY.Request.Waitany(requests)
+
+    def start(self, buffer):
+        """Start non-blocking allreduce (sum) of a buffer in place.
+
+        Args:
+            buffer (~numpy.ndarray): Flat buffer to allreduce.
+
+        Returns:
+            object: Handle passed to :meth:`finish`.
+        """
+        return self._mpi_comm.Iallreduce(
+            MPI4PY.IN_PLACE, buffer, op=MPI4PY.SUM)
+
+
+class HierarchicalCommunicator(object):
+    """Allreduce flat buffers within each node first, and then among
+    nodes."""
+    name = 'hierarchical'
+    """str: Name of this communicator class."""
+
+    def __init__(self, mpi_comm):
+        """
+        | Processes which share memory form a node-local communicator,
+          and the first process of each node (leader) joins an
+          inter-node communicator.
+        | A buffer is reduced to the leader within each node, allreduced
+          among leaders, and then broadcast within each node, so that
+          only one process per node communicates across nodes.
+        | Each step is non-blocking and the steps of different buffers
+          are pipelined. Steps are posted in the order of buffers on all
+          processes, as required for non-blocking collectives.
+
+        Args:
+            mpi_comm (~mpi4py.MPI.Comm): MPI communicator to use.
+        """
+        self._mpi_comm = mpi_comm
+        self._intra_comm = mpi_comm.Split_type(
+            MPI4PY.COMM_TYPE_SHARED, key=mpi_comm.rank)
+        is_leader = self._intra_comm.rank == 0
+        self._inter_comm = mpi_comm.Split(
+            0 if is_leader else MPI4PY.UNDEFINED, key=mpi_comm.rank)
+
+    @property
+    def size(self):
+        """int: Number of MPI processes."""
+        return self._mpi_comm.size
+
+    def finish(self, handles):
+        """Wait for allreduce started by :meth:`start`.
+
+        Args:
+            handles (list): Handles returned by :meth:`start`.
+
+        Returns:
+            Iterator [int]: Index of a handle whose allreduce is done,
+            in the order of handles.
+        """
+        is_leader = self._intra_comm.rank == 0
+        # inter-node allreduce on leaders
+        if is_leader:
+            for handle in handles:
+                request, buffer = handle
+                request.Wait()
+                handle[0] = self._inter_comm.Iallreduce(
+                    MPI4PY.IN_PLACE, buffer, op=MPI4PY.SUM)
+        # node-local broadcast
+        for handle in handles:
+            request, buffer = handle
+            request.Wait()
+            handle[0] = self._intra_comm.Ibcast(buffer, root=0)
+        for i, (request, _) in enumerate(handles):
+            request.Wait()
+            yield i
+
+    def start(self, buffer):
+        """Start non-blocking node-local reduction (sum) of a buffer in
+        place.
+
+        Args:
+            buffer (~numpy.ndarray): Flat buffer to allreduce.
+
+        Returns:
+            object: Handle passed to :meth:`finish`.
+        """
+        if self._intra_comm.rank == 0:
+            request = self._intra_comm.Ireduce(
+                MPI4PY.IN_PLACE, buffer, op=MPI4PY.SUM, root=0)
+        else:
+            request = self._intra_comm.Ireduce(
+                buffer, None, op=MPI4PY.SUM, root=0)
+        return [request, buffer]
+
+
+COMMUNICATOR = {
+    FlatCommunicator.name: FlatCommunicator,
+    HierarchicalCommunicator.name: HierarchicalCommunicator,
+    }
@@ -68,7 +68,7 @@ class ScatterPlot(Extension):
         self._properties = dataset.property.properties
         self._coefficients = dataset.property.coefficients
         self._units = dataset.property.units
-        batch = chainer.dataset.concat_examples(dataset)
+        batch = dataset.get_batch(slice(None))
         self._inputs = [batch[f'inputs/{i}'] for i in range(self._order + 1)]
         labels = [batch[f'labels/{i}'] for i in range(self._order + 1)]
         self._count = np.array(self._comm.gather(len(labels[0]), root=0))
@@ -0,0 +1,325 @@
+# coding: utf-8
+
+"""Mini-batch iterator for HDNNP dataset."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import chainer
+import numpy as np
+
+
+class BatchIterator(chainer.dataset.Iterator):
+    """Mini-batch iterator for HDNNP dataset."""
+    def __init__(self, dataset, batch_size,
+                 repeat=True, shuffle=True, prefetch=True):
+        """
+        | It behaves like :class:`~chainer.iterators.SerialIterator`,
+          but it returns a mini-batch as :obj:`dict` of stacked arrays
+          sliced directly from ``dataset`` by indices, instead of a list
+          of per-sample :obj:`dict`. Use it with :func:`convert_batch`.
+        | The order of data is shuffled by an index permutation, so that
+          no data is moved.
+        | If ``prefetch`` is True, the next mini-batch is fetched in a
+          background thread while the current one is processed.
+
+        Args:
+            dataset (HDNNPDataset): Dataset to iterate.
+            batch_size (int): Number of data in a mini-batch.
+            repeat (bool, optional):
+                If True, it iterates over the dataset infinitely.
+            shuffle (bool, optional):
+                If True, the order of data is shuffled at every epoch.
+            prefetch (bool, optional):
+                If True, the next mini-batch is fetched in background.
+        """
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self._repeat = repeat
+        self._shuffle = shuffle
+        self._executor = (ThreadPoolExecutor(max_workers=1)
+                          if prefetch else None)
+        self._pending = None
+        self.reset()
+
+    def __next__(self):
+        if self._pending is not None:
+            future, state = self._pending
+            self._pending = None
+            batch = future.result()
+        else:
+            if not self._repeat and self.epoch > 0:
+                raise StopIteration
+            indices, state = self._advance(self._state)
+            batch = self.dataset.get_batch(indices)
+
+        self._previous_epoch_detail = self.epoch_detail
+        self._state = state
+
+        if self._executor is not None and (self._repeat or self.epoch == 0):
+            indices, state = self._advance(self._state)
+            future = self._executor.submit(self.dataset.get_batch, indices)
+            self._pending = (future, state)
+        return batch
+
+    next = __next__
+
+    @property
+    def current_position(self):
+        """int: Index of the first data of the next mini-batch in the
+        current order."""
+        return self._state['position']
+
+    @property
+    def epoch(self):
+        """int: Number of completed sweeps over the dataset."""
+        return self._state['epoch']
+
+    @property
+    def epoch_detail(self):
+        """float: Floating point version of :attr:`epoch`."""
+        return self.epoch + self.current_position / len(self.dataset)
+
+    @property
+    def is_new_epoch(self):
+        """bool: True if the epoch is incremented at the last update."""
+        return self._state['is_new_epoch']
+
+    @property
+    def previous_epoch_detail(self):
+        """float: :attr:`epoch_detail` at the previous update."""
+        if self._previous_epoch_detail < 0:
+            return None
+        return self._previous_epoch_detail
+
+    @property
+    def repeat(self):
+        """bool: Whether it iterates over the dataset infinitely."""
+        return self._repeat
+
+    def finalize(self):
+        """Stop the background thread."""
+        self._pending = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def reset(self):
+        """Reset the iterator to the beginning of the first epoch."""
+        self._pending = None
+        self._previous_epoch_detail = -1.0
+        self._state = {
+            'position': 0,
+            'epoch': 0,
+            'is_new_epoch': False,
+            'order': self._new_order(),
+            }
+
+    def serialize(self, serializer):
+        """Serialize or deserialize the state of the iterator."""
+        state = self._state
+        state['position'] = serializer('current_position', state['position'])
+        state['epoch'] = serializer('epoch', state['epoch'])
+        state['is_new_epoch'] = serializer(
+            'is_new_epoch', state['is_new_epoch'])
+        if state['order'] is not None:
+            serializer('order', state['order'])
+        self._previous_epoch_detail = serializer(
+            'previous_epoch_detail', self._previous_epoch_detail)
+        # discard a mini-batch fetched with the old state
+        self._pending = None
+
+    def _advance(self, state):
+        """Return indices of the next mini-batch and the state after
+        it without modifying the given state."""
+        n_data = len(self.dataset)
+        order = state['order']
+        start = state['position']
+        end = start + self.batch_size
+        indices = self._take(order, start, min(end, n_data))
+        epoch = state['epoch']
+        if end >= n_data:
+            epoch += 1
+            if self._repeat:
+                rest = end - n_data
+                order = self._new_order()
+                if rest > 0:
+                    indices = np.concatenate(
+                        [indices, self._take(order, 0, rest)])
+                position = rest
+            else:
+                position = 0
+            is_new_epoch = True
+        else:
+            position = end
+            is_new_epoch = False
+        new_state = {
+            'position': position,
+            'epoch': epoch,
+            'is_new_epoch': is_new_epoch,
+            'order': order,
+            }
+        return indices, new_state
+
+    def _new_order(self):
+        """Make an index permutation, or ``None`` if not shuffled."""
+        if self._shuffle:
+            return np.random.permutation(len(self.dataset))
+        return None
+
+    @staticmethod
+    def _take(order, start, end):
+        """Indices of data from ``start`` to ``end`` in the order."""
+        if order is None:
+            return np.arange(start, end)
+        return order[start:end]
+
+
+class InterleavedIterator(chainer.dataset.Iterator):
+    """Mini-batch iterator interleaving datasets of several tags."""
+    def __init__(self, iterators, repeat=True, shuffle=True, seed=0):
+        """
+        | It wraps a `BatchIterator` for each tag, and returns
+          mini-batches of all tags in an interleaved order. Each
+          mini-batch comes from a single tag, so that it contains
+          structures of the same elemental composition.
+        | The schedule of an epoch contains each tag as many times as
+          the number of mini-batches of its dataset, and it is shuffled
+          at every epoch if ``shuffle`` is True. One epoch is a sweep
+          over the datasets of all tags.
+        | The schedule is shuffled by its own random state, so that all
+          MPI processes follow the same schedule regardless of other
+          random numbers they draw.
+        | A returned mini-batch has an additional item ``'tag'``.
+
+        Args:
+            iterators (list [BatchIterator]):
+                Iterators of datasets of each tag. They have to repeat
+                infinitely if ``repeat`` is True.
+            repeat (bool, optional):
+                If True, it iterates over the datasets infinitely.
+            shuffle (bool, optional):
+                If True, the order of tags is shuffled at every epoch.
+            seed (int, optional):
+                Seed of random state to shuffle the order of tags. It
+                has to be the same in all MPI processes.
+        """
+        self._iterators = iterators
+        self._repeat = repeat
+        self._shuffle = shuffle
+        self._seed = seed
+        self._n_batches = [
+            -(-len(iterator.dataset) // iterator.batch_size)
+            for iterator in iterators]
+        self.reset()
+
+    def __next__(self):
+        if not self._repeat and self.epoch > 0:
+            raise StopIteration
+
+        self._previous_epoch_detail = self.epoch_detail
+        iterator = self._iterators[self._schedule[self._position]]
+        batch = dict(iterator.next())
+        batch['tag'] = iterator.dataset.tag
+
+        self._position += 1
+        if self._position == len(self._schedule):
+            self._epoch += 1
+            self._is_new_epoch = True
+            self._position = 0
+            if self._repeat:
+                self._schedule = self._new_schedule()
+        else:
+            self._is_new_epoch = False
+        return batch
+
+    next = __next__
+
+    @property
+    def current_position(self):
+        """int: Number of mini-batches returned in the current epoch."""
+        return self._position
+
+    @property
+    def epoch(self):
+        """int: Number of completed sweeps over the datasets."""
+        return self._epoch
+
+    @property
+    def epoch_detail(self):
+        """float: Floating point version of :attr:`epoch`."""
+        return self._epoch + self._position / len(self._schedule)
+
+    @property
+    def is_new_epoch(self):
+        """bool: True if the epoch is incremented at the last update."""
+        return self._is_new_epoch
+
+    @property
+    def previous_epoch_detail(self):
+        """float: :attr:`epoch_detail` at the previous update."""
+        if self._previous_epoch_detail < 0:
+            return None
+        return self._previous_epoch_detail
+
+    @property
+    def repeat(self):
+        """bool: Whether it iterates over the datasets infinitely."""
+        return self._repeat
+
+    def finalize(self):
+        """Finalize iterators of each tag."""
+        for iterator in self._iterators:
+            iterator.finalize()
+
+    def reset(self):
+        """Reset the iterator to the beginning of the first epoch."""
+        for iterator in self._iterators:
+            iterator.reset()
+        self._position = 0
+        self._epoch = 0
+        self._is_new_epoch = False
+        self._previous_epoch_detail = -1.0
+        self._random = np.random.RandomState(self._seed)
+        self._schedule = self._new_schedule()
+
+    def serialize(self, serializer):
+        """Serialize or deserialize the state of the iterator."""
+        self._position = serializer('current_position', self._position)
+        self._epoch = serializer('epoch', self._epoch)
+        self._is_new_epoch = serializer('is_new_epoch', self._is_new_epoch)
+        serializer('schedule', self._schedule)
+        self._previous_epoch_detail = serializer(
+            'previous_epoch_detail', self._previous_epoch_detail)
+        for i, iterator in enumerate(self._iterators):
+            iterator.serialize(serializer[f'iterator{i}'])
+
+    def _new_schedule(self):
+        """Make an order of tags of mini-batches in an epoch."""
+        schedule = np.repeat(np.arange(len(self._iterators)), self._n_batches)
+        if self._shuffle:
+            self._random.shuffle(schedule)
+        return schedule
+
+
+def convert_batch(batch, device=None):
+    """Pass a mini-batch made by `BatchIterator` to a device.
+
+    It is a converter used instead of
+    :func:`chainer.dataset.concat_examples`, since mini-batch arrays are
+    already stacked.
+
+    Args:
+        batch (dict [~numpy.ndarray]): Mini-batch to convert.
+        device (int, optional):
+            Device ID to which each array is sent. If ``None`` or
+            negative, arrays are not sent. Items other than arrays,
+            such as ``'tag'`` added by `InterleavedIterator`, are kept
+            as they are.
+
+    Returns:
+        dict [~numpy.ndarray]: Converted mini-batch.
+    """
+    if device is None or device < 0:
+        return batch
+    return {key: (chainer.dataset.to_device(device, data)
+                  if isinstance(data, np.ndarray) else data)
+            for key, data in batch.items()}
@@ -6,6 +6,7 @@ import warnings
 
 import chainer
 import chainer.functions as F
+import numpy as np
 
 from hdnnpy.training.loss_function.loss_functions_base import (
     LossFunctionBase)
@@ -22,7 +23,8 @@ class First(LossFunctionBase):
     """dict: Required orders of each dataset to calculate loss function.
     """
 
-    def __init__(self, model, properties, mixing_beta, **_):
+    def __init__(self, model, properties, mixing_beta, force_fraction=1.0,
+                 **_):
         """
         Args:
             model (HighDimensionalNNP):
@@ -34,12 +36,22 @@ class First(LossFunctionBase):
                 0th order property and it is equal to loss function
                 ``Zeroth``. If 1.0 it optimizes HDNNP by only 1st order
                 property.
+            force_fraction (float, optional):
+                Fraction of atoms whose 1st order property is evaluated
+                in training. It accepts 0.0 (exclusive) to 1.0. If less
+                than 1.0, atoms are sampled randomly for each
+                mini-batch, and only derivative columns of sampled atoms
+                are used. Mean squared error of sampled atoms is an
+                unbiased estimate of that of all atoms. In evaluation,
+                all atoms are used.
         """
         assert 0.0 <= mixing_beta <= 1.0
+        assert 0.0 < force_fraction <= 1.0
         super().__init__(model)
         self._observation_keys = [
             f'RMSE/{properties[0]}', f'RMSE/{properties[1]}', 'total']
         self._mixing_beta = mixing_beta
+        self._force_fraction = force_fraction
 
         if mixing_beta == 0.0:
             warnings.warn(
@@ -53,7 +65,8 @@ class First(LossFunctionBase):
             **dataset (~numpy.ndarray):
                 Datasets passed as kwargs. Name of each key is in the
                 format 'inputs/N' or 'labels/N'. 'N' is the order of
-                the dataset.
+                the dataset. If 'masks/1' is given, only its non-zero
+                elements of 1st order property are evaluated.
 
         Returns:
             ~chainer.Variable:
@@ -63,9 +76,21 @@ class First(LossFunctionBase):
                   in range(self.order['descriptor'] + 1)]
         labels = [dataset[f'labels/{i}'] for i
                   in range(self.order['property'] + 1)]
+        mask = dataset.get('masks/1')
+        if chainer.config.train and self._force_fraction < 1.0:
+            columns = self._sample_columns(labels[1].shape[-1])
+            inputs[1] = np.take(inputs[1], columns, axis=-1)
+            labels[1] = np.take(labels[1], columns, axis=-1)
+            if mask is not None:
+                mask = np.take(mask, columns, axis=-1)
         predictions = self._model.predict(inputs, self.order['descriptor'])
         loss0 = F.mean_squared_error(predictions[0], labels[0])
-        loss1 = F.mean_squared_error(predictions[1], labels[1])
+        if mask is not None:
+            mask = mask[:, None, :]
+            loss1 = (F.sum(F.square(predictions[1] - labels[1]) * mask)
+                     / float(mask.sum() * labels[1].shape[1]))
+        else:
+            loss1 = F.mean_squared_error(predictions[1], labels[1])
         total_loss = ((1.0 - self._mixing_beta) * loss0
                       + self._mixing_beta * loss1)
 
@@ -81,3 +106,11 @@ class First(LossFunctionBase):
             }
         chainer.report(observation, observer=self._model)
         return total_loss
+
+    def _sample_columns(self, n_deriv):
+        """Sample atoms randomly and return indices of their derivative
+        columns."""
+        n_atom = n_deriv // 3
+        n_sample = max(1, int(round(self._force_fraction * n_atom)))
+        atoms = np.sort(np.random.choice(n_atom, n_sample, replace=False))
+        return (3 * atoms[:, None] + np.arange(3)).ravel()
@@ -0,0 +1,146 @@
+# coding: utf-8
+
+"""Multi-node optimizer with bucketed non-blocking gradient allreduce."""
+
+import numpy as np
+
+
+class BucketedMultiNodeOptimizer(object):
+    """Multi-node optimizer with bucketed non-blocking gradient
+    allreduce."""
+    def __init__(self, actual_optimizer, communicator,
+                 bucket_size=4 * 1024 * 1024):
+        """
+        | It wraps an optimizer in the same way as
+          :func:`chainermn.create_multi_node_optimizer`, and averages
+          gradients over all MPI processes before each update.
+        | Gradients are packed into flat buffers (buckets) per child
+          link, i.e. per element of `MasterNNP`, instead of being
+          allreduced parameter by parameter. Children smaller than
+          ``bucket_size`` are merged into one bucket.
+        | Allreduce of each bucket is started with non-blocking
+          communication as soon as it is packed, so that communication
+          overlaps with packing of the following buckets and unpacking
+          of the preceding ones.
+        | A parameter whose gradient is ``None`` in all processes is not
+          updated, as is the case with a single process.
+
+        Args:
+            actual_optimizer (~chainer.Optimizer):
+                Optimizer which updates parameters with the averaged
+                gradients.
+            communicator (FlatCommunicator or HierarchicalCommunicator):
+                Communicator used for allreduce of buckets.
+            bucket_size (int, optional):
+                Maximum size of a bucket in bytes. A child link larger
+                than this makes its own bucket.
+        """
+        super().__setattr__('actual_optimizer', actual_optimizer)
+        super().__setattr__('communicator', communicator)
+        super().__setattr__('bucket_size', bucket_size)
+        super().__setattr__('_buckets', None)
+
+    def __getattr__(self, name):
+        return getattr(self.actual_optimizer, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.actual_optimizer, name, value)
+
+    def allreduce_grad(self, link):
+        """Average gradients of parameters over all MPI processes.
+
+        Args:
+            link (~chainer.Link): Link whose gradients are averaged.
+        """
+        if self._buckets is None:
+            super().__setattr__('_buckets', self._make_buckets(link))
+        communicator = self.communicator
+
+        handles = []
+        buffers = []
+        for params in self._buckets:
+            buffer = self._pack(params)
+            handles.append(communicator.start(buffer))
+            buffers.append(buffer)
+        for i in communicator.finish(handles):
+            self._unpack(self._buckets[i], buffers[i], communicator.size)
+
+    def setup(self, link):
+        """Set up the actual optimizer with a link.
+
+        Args:
+            link (~chainer.Link): Link to optimize.
+
+        Returns:
+            BucketedMultiNodeOptimizer: This instance.
+        """
+        self.actual_optimizer.setup(link)
+        super().__setattr__('_buckets', None)
+        return self
+
+    def update(self, lossfun=None, *args, **kwds):
+        """Average gradients over all MPI processes and update
+        parameters.
+
+        Arguments are the same as :meth:`chainer.Optimizer.update`.
+        """
+        target = self.target
+        if lossfun is not None:
+            loss = lossfun(*args, **kwds)
+            target.cleargrads()
+            loss.backward()
+            del loss
+        self.allreduce_grad(target)
+        self.actual_optimizer.update(None, *args, **kwds)
+
+    def _make_buckets(self, link):
+        """Group parameters into buckets in the same order on all MPI
+        processes."""
+        groups = [[param for _, param in sorted(child.namedparams())]
+                  for child in link.children()]
+        if not groups:
+            groups = [[param for _, param in sorted(link.namedparams())]]
+
+        buckets = []
+        bucket = []
+        n_bytes = 0
+        for params in groups:
+            size = sum(param.size * param.dtype.itemsize for param in params)
+            if bucket and n_bytes + size > self.bucket_size:
+                buckets.append(bucket)
+                bucket = []
+                n_bytes = 0
+            bucket.extend(params)
+            n_bytes += size
+        if bucket:
+            buckets.append(bucket)
+        return buckets
+
+    @staticmethod
+    def _pack(params):
+        """Pack gradients and flags whether each of them exists into a
+        flat buffer. ``None`` gradient is packed as zeros."""
+        dtype = params[0].dtype
+        buffer = np.zeros(sum(param.size for param in params) + len(params),
+                          dtype=dtype)
+        offset = 0
+        for k, param in enumerate(params):
+            if param.grad is not None:
+                buffer[offset:offset+param.size] = param.grad.ravel()
+                buffer[-len(params) + k] = 1.0
+            offset += param.size
+        return buffer
+
+    @staticmethod
+    def _unpack(params, buffer, n_process):
+        """Unpack averaged gradients from a flat buffer."""
+        offset = 0
+        for k, param in enumerate(params):
+            if buffer[-len(params) + k] > 0.0:
+                grad = (buffer[offset:offset+param.size] / n_process
+                        ).reshape(param.shape)
+                if param.grad is None:
+                    param.grad = grad.astype(param.dtype)
+                else:
+                    param.grad[...] = grad
+            offset += param.size
@@ -4,6 +4,7 @@
 
 __all__ = [
     'MPI',
+    'Precision',
     'pprint',
     'pyyaml_path_constructor',
     'pyyaml_path_representer',
@@ -17,7 +18,9 @@ from pprint import pprint as pretty_print
 import sys
 import textwrap
 
+import chainer
 from mpi4py import MPI as MPI4PY
+import numpy as np
 
 
 INT_MAX = 2147483647
@@ -30,6 +33,51 @@ class MPI:
     size = MPI4PY.COMM_WORLD.Get_size()
 
 
+class Precision:
+    """Precision policy of arrays and aliases.
+
+    | ``compute``: neighbor geometry, descriptor calculation and
+      statistics of pre-processing.
+    | ``storage``: stored descriptor and property datasets.
+    | ``derivative``: stored derivative descriptor datasets.
+    | ``model``: parameters of neural networks and mini-batches fed to
+      them. Stored arrays of lower precision are cast when fetched.
+    """
+    POLICIES = {
+        'float32': (np.float32, np.float32, np.float32, np.float32),
+        'float64': (np.float64, np.float64, np.float64, np.float64),
+        'mixed': (np.float64, np.float32, np.float32, np.float32),
+        'mixed_half': (np.float64, np.float32, np.float16, np.float32),
+        }
+    name = 'float32'
+    compute, storage, derivative, model = POLICIES[name]
+
+    @classmethod
+    def set(cls, name):
+        """Set precision policy, and default dtype of chainer.
+
+        Args:
+            name (str): Name of precision policy in :attr:`POLICIES`.
+        """
+        cls.name = name
+        cls.compute, cls.storage, cls.derivative, cls.model = (
+            cls.POLICIES[name])
+        chainer.global_config.dtype = np.dtype(cls.model)
+
+    @classmethod
+    def storage_dtype(cls, order):
+        """Return dtype to store descriptor dataset of given order.
+
+        Args:
+            order (int): Derivative order of descriptor dataset.
+
+        Returns:
+            type: :attr:`storage` for 0th order, otherwise
+            :attr:`derivative`.
+        """
+        return cls.storage if order == 0 else cls.derivative
+
+
 def pprint(data=None, flush=True, **options):
     """Pretty print function.
 
@@ -19,6 +19,8 @@ setup(
         'hdnnpy.dataset.descriptor',
         'hdnnpy.dataset.property',
         'hdnnpy.format',
+        'hdnnpy.frozen',
+        'hdnnpy.inference',
         'hdnnpy.model',
         'hdnnpy.preprocess',
         'hdnnpy.training',
@@ -0,0 +1,45 @@
+# coding: utf-8
+
+"""Common fixtures of tests."""
+
+import ase
+import numpy as np
+import pytest
+
+from hdnnpy.dataset import AtomicStructure
+from hdnnpy.utils import Precision
+
+
+def make_atoms(seed=0, symbols='GaNGaNNGaNGa', lattice=2.5, rattle=0.2):
+    """Make a periodic atomic structure of atoms placed on a rattled
+    cubic lattice of 2x2x2 points."""
+    random = np.random.RandomState(seed)
+    grid = np.array([[x, y, z] for x in range(2)
+                     for y in range(2) for z in range(2)], dtype=float)
+    positions = lattice * grid + rattle * random.randn(*grid.shape)
+    atoms = ase.Atoms(symbols, positions=positions,
+                      cell=np.eye(3) * 2 * lattice, pbc=True)
+    atoms.info['tag'] = f'Test{atoms.get_chemical_formula()}'
+    return atoms
+
+
+@pytest.fixture
+def atoms():
+    """~ase.Atoms: A structure whose atoms are not sorted by element."""
+    return make_atoms(seed=1)
+
+
+@pytest.fixture
+def structures():
+    """list [AtomicStructure]: Structures of the same elemental
+    composition."""
+    return [AtomicStructure(make_atoms(seed)) for seed in range(3)]
+
+
+@pytest.fixture
+def float64():
+    """Use float64 precision policy during a test."""
+    name = Precision.name
+    Precision.set('float64')
+    yield
+    Precision.set(name)
@@ -0,0 +1,53 @@
+# coding: utf-8
+
+import numpy as np
+import pytest
+
+from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+
+
+PARAMETERS = {
+    'type2': [(4.0, 0.01, 0.0), (4.0, 0.1, 1.0), (4.0, 1.0, 2.0)],
+    'type4': [(4.0, 0.01, 1.0, 1.0)],
+    }
+SUBSET = {
+    'type2': [(4.0, 1.0, 2.0), (4.0, 0.01, 0.0)],
+    }
+
+
+def make_dataset(structures, **func_param_map):
+    return DESCRIPTOR_DATASET['symmetry_function'](
+        1, structures, **func_param_map)
+
+
+@pytest.mark.parametrize('codec, sharded', [
+    (None, False), ('zlib', False), (None, True), ('zlib', True)])
+@pytest.mark.parametrize('columnar', [False, True])
+def test_save_and_load_feature_subset(tmp_path, structures,
+                                      codec, sharded, columnar):
+    file_path = tmp_path / ('descriptor' if sharded else 'descriptor.npz')
+    dataset = make_dataset(structures, **PARAMETERS)
+    dataset.make(verbose=False, keep_partial=sharded)
+    dataset.save(file_path, verbose=False, codec=codec, chunk_size=2,
+                 sharded=sharded, columnar=columnar)
+
+    reference = make_dataset(structures, **SUBSET)
+    reference.make(verbose=False)
+    loaded = make_dataset(structures, **SUBSET)
+    loaded.load(file_path, verbose=False)
+    assert loaded.feature_keys == reference.feature_keys
+    for descriptor in loaded.descriptors:
+        np.testing.assert_allclose(
+            np.asarray(loaded[descriptor]), reference[descriptor],
+            rtol=1e-6)
+
+
+def test_load_lacking_feature_keys(tmp_path, structures):
+    file_path = tmp_path / 'descriptor.npz'
+    dataset = make_dataset(structures, **SUBSET)
+    dataset.make(verbose=False)
+    dataset.save(file_path, verbose=False, columnar=True)
+
+    loaded = make_dataset(structures, **PARAMETERS)
+    with pytest.raises(ValueError):
+        loaded.load(file_path, verbose=False)
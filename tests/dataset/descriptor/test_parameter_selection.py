@@ -0,0 +1,61 @@
+# coding: utf-8
+
+import numpy as np
+import pytest
+
+from hdnnpy.dataset.descriptor import (DESCRIPTOR_DATASET, select_parameters)
+
+
+INFORMATIVE = (4.0, 0.01, 0.0)
+DUPLICATED = (4.0, 0.0100001, 0.0)
+CONSTANT = (4.0, 50.0, 20.0)
+PARAMETERS = {
+    'type2': [INFORMATIVE, (4.0, 1.0, 2.5), DUPLICATED, CONSTANT],
+    'type4': [(4.0, 0.01, 1.0, 1.0)],
+    }
+
+
+@pytest.fixture
+def descriptors(structures):
+    dataset = DESCRIPTOR_DATASET['symmetry_function'](
+        0, structures, **PARAMETERS)
+    dataset.make(verbose=False)
+    return [dataset]
+
+
+def test_select_drops_duplicated_and_constant_sets(descriptors):
+    func_param_map, report = select_parameters(
+        descriptors, ['Ga', 'N'], threshold=0.999)
+
+    type2 = func_param_map['type2']
+    assert INFORMATIVE in type2
+    assert DUPLICATED not in type2
+    assert CONSTANT not in type2
+    # selected sets are kept in the original order
+    assert type2 == [params for params in PARAMETERS['type2']
+                     if params in type2]
+
+    n_selected = sum(len(params_set) for params_set in func_param_map.values())
+    assert report['n_parameter_set'] == (5, n_selected)
+    assert report['per_function']['type2'] == (4, len(type2))
+    # 2 columns of each type2 set and 3 of each type4 set for Ga and N
+    assert report['n_feature'] == (
+        11, 2 * len(type2) + 3 * len(func_param_map.get('type4', [])))
+    assert report['cost'] == (5.0, float(n_selected))
+    memory, kept = report['memory']
+    assert kept * report['n_feature'][0] == memory * report['n_feature'][1]
+
+
+def test_select_at_most_n_select_sets(descriptors):
+    func_param_map, report = select_parameters(
+        descriptors, ['Ga', 'N'], n_select=1, costs={'type4': 3.0})
+    assert func_param_map == {'type2': [INFORMATIVE]}
+    assert report['n_parameter_set'] == (5, 1)
+    assert report['cost'] == (7.0, 1.0)
+
+
+def test_select_with_sampled_atoms(descriptors):
+    func_param_map, report = select_parameters(
+        descriptors, ['Ga', 'N'], threshold=0.999, max_rows=16, seed=1)
+    assert DUPLICATED not in func_param_map['type2']
+    assert CONSTANT not in func_param_map['type2']
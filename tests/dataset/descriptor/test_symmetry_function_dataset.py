@@ -0,0 +1,51 @@
+# coding: utf-8
+
+from itertools import combinations_with_replacement
+
+import numpy as np
+import pytest
+
+from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+
+
+TYPE4 = [(Rc, eta, lambda_, zeta)
+         for Rc, eta in [(3.5, 0.1), (4.5, 0.01)]
+         for lambda_ in [-1.0, 1.0] for zeta in [1.0, 4.0]]
+
+
+def dense_type4(structure, Rc, eta, lambda_, zeta):
+    """Reference type4 summed over all pairs of neighbors in loops."""
+    elements = structure.elements
+    combinations = list(combinations_with_replacement(elements, 2))
+    symbols = structure.get_chemical_symbols()
+    G = np.zeros((len(structure), len(combinations)))
+    for i, (r, j_indices) in enumerate(structure.get_neighbor_info(
+            Rc, ['distance_vector', 'j_indices'])):
+        r = r.data
+        j_list = np.repeat(np.arange(len(j_indices)),
+                           np.diff([*j_indices, len(r)]))
+        for j in range(len(r)):
+            for k in range(j + 1, len(r)):
+                R_j = np.linalg.norm(r[j])
+                R_k = np.linalg.norm(r[k])
+                cos = r[j] @ r[k] / (R_j * R_k)
+                radial = [np.exp(-eta * R**2) * np.tanh(1.0 - R/Rc)**3
+                          for R in [R_j, R_k]]
+                pair = tuple(sorted([symbols[j_list[j]], symbols[j_list[k]]]))
+                G[i, combinations.index(pair)] += (
+                    2.0 ** (1-zeta) * (1.0 + lambda_*cos) ** zeta
+                    * radial[0] * radial[1])
+    return G
+
+
+@pytest.mark.parametrize('order', [0, 1])
+def test_type4_agrees_with_dense_reference(structures, float64, order):
+    dataset = DESCRIPTOR_DATASET['symmetry_function'](
+        order, structures, type4=TYPE4)
+    for structure in structures:
+        sym_func = dataset.calculate_descriptors(structure)[0]
+        reference = np.concatenate(
+            [dense_type4(structure, *params) for params in TYPE4], axis=1)
+        assert sym_func.shape == reference.shape
+        np.testing.assert_allclose(sym_func, reference,
+                                   rtol=1e-10, atol=1e-12)
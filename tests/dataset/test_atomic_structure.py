@@ -0,0 +1,59 @@
+# coding: utf-8
+
+from itertools import combinations_with_replacement
+
+import numpy as np
+import pytest
+
+from hdnnpy.dataset.atomic_structure import (TRIPLET_KEYS, neighbor_triplets)
+
+
+@pytest.mark.parametrize('n_neighbor, element_indices', [
+    (0, (0, 0)), (1, (0, 1)), (5, (0, 2)), (6, (0, 0, 4)), (7, (0, 1, 3))])
+def test_neighbor_triplets(n_neighbor, element_indices):
+    j, k, element_pair, pair_sum = neighbor_triplets(
+        n_neighbor, element_indices, np.float64)
+
+    pairs = [(a, b) for a in range(n_neighbor)
+             for b in range(a + 1, n_neighbor)]
+    assert list(zip(j.tolist(), k.tolist())) == pairs
+
+    n_element = len(element_indices)
+    bounds = [*element_indices, n_neighbor]
+    element = [e for e in range(n_element)
+               for _ in range(bounds[e], bounds[e+1])]
+    combinations = list(
+        combinations_with_replacement(range(n_element), 2))
+    assert element_pair.tolist() == [
+        combinations.index((element[a], element[b])) for a, b in pairs]
+    assert pair_sum.shape == (len(pairs), len(combinations))
+    assert pair_sum.dtype == np.float64
+    np.testing.assert_array_equal(
+        pair_sum, np.eye(len(combinations))[element_pair])
+
+
+def test_neighbor_triplets_are_shared():
+    assert (neighbor_triplets(4, (0, 2), np.float64)
+            is neighbor_triplets(4, (0, 2), np.float64))
+
+
+def test_triplet_geometry(structures, float64):
+    structure = structures[0]
+    Rc = 4.0
+    for (r, R, j, k, cos, distance_ij, distance_ik, distance_jk) \
+            in structure.get_neighbor_info(
+                Rc, ['distance_vector', 'distance', 'triplet_j',
+                     'triplet_k', 'triplet_cos', 'triplet_distance_ij',
+                     'triplet_distance_ik', 'triplet_distance_jk']):
+        r, R = r.data, R.data
+        np.testing.assert_allclose(
+            cos.data, np.sum(r[j] * r[k], axis=1) / (R[j] * R[k]))
+        np.testing.assert_allclose(distance_ij.data, R[j])
+        np.testing.assert_allclose(distance_ik.data, R[k])
+        np.testing.assert_allclose(
+            distance_jk.data, np.linalg.norm(r[k] - r[j], axis=1))
+
+    nbytes = structure.cache_nbytes()[Rc]
+    assert set(TRIPLET_KEYS) <= set(nbytes)
+    structure.clear_cache()
+    assert structure.cache_nbytes() == {}
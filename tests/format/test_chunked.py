@@ -0,0 +1,63 @@
+# coding: utf-8
+
+import numpy as np
+import pytest
+
+from hdnnpy.format import (CODECS, load_chunked, save_chunked)
+from hdnnpy.format.chunked import is_chunked
+
+
+@pytest.fixture
+def arrays():
+    random = np.random.RandomState(0)
+    return {
+        'sym_func': random.randn(10, 4, 6).astype(np.float32),
+        'derivative': random.randn(10, 4, 6, 12).astype(np.float16),
+        }
+
+
+@pytest.mark.parametrize('codec', list(CODECS))
+def test_chunked_round_trip(tmp_path, arrays, codec):
+    file_path = tmp_path / 'descriptor.npz'
+    info = {'tag': 'TestGa2N2', 'elements': ['Ga', 'N']}
+    save_chunked(file_path, arrays, info=info, codec=codec, chunk_size=3)
+
+    assert is_chunked(file_path)
+    with load_chunked(file_path) as ndarray:
+        assert ndarray.codec == codec
+        assert sorted(ndarray.files) == sorted([*arrays, *info])
+        assert str(ndarray['tag']) == 'TestGa2N2'
+        assert list(ndarray['elements']) == ['Ga', 'N']
+        for key, array in arrays.items():
+            chunked = ndarray[key]
+            assert chunked.dtype == array.dtype
+            assert chunked.shape == array.shape
+            np.testing.assert_array_equal(np.asarray(chunked), array)
+
+
+def test_chunked_array_indexing(tmp_path, arrays):
+    file_path = tmp_path / 'descriptor.npz'
+    save_chunked(file_path, arrays, chunk_size=3)
+    array = arrays['sym_func']
+    with load_chunked(file_path) as ndarray:
+        chunked = ndarray['sym_func']
+        np.testing.assert_array_equal(chunked[4], array[4])
+        np.testing.assert_array_equal(chunked[2:8], array[2:8])
+        np.testing.assert_array_equal(chunked[::-3], array[::-3])
+        indices = np.array([9, 0, 5, 5, 3])
+        np.testing.assert_array_equal(chunked[indices], array[indices])
+        np.testing.assert_array_equal(chunked[indices, 1:3],
+                                      array[indices, 1:3])
+
+
+def test_chunked_array_keeps_limited_cache(tmp_path, arrays):
+    file_path = tmp_path / 'descriptor.npz'
+    save_chunked(file_path, arrays, chunk_size=3)
+    array = arrays['sym_func']
+    with load_chunked(file_path, max_cached=2) as ndarray:
+        chunked = ndarray['sym_func']
+        for indices in np.random.RandomState(0).permutation(10).reshape(5, 2):
+            np.testing.assert_array_equal(chunked[indices], array[indices])
+            assert len(chunked._cache) <= 2
+        np.testing.assert_array_equal(chunked[:], array)
+        assert len(chunked._cache) == 2
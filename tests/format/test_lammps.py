@@ -0,0 +1,56 @@
+# coding: utf-8
+
+import numpy as np
+import pytest
+
+from hdnnpy.format import (read_binary_potential, write_binary_potential)
+
+
+def make_potential():
+    random = np.random.RandomState(0)
+    elements = ['Ga', 'N']
+    parameters = {
+        'type2': [(5.0, 0.01, 0.0), (5.0, 0.1, 2.0)],
+        'type4': [(5.0, 0.01, -1.0, 1.0)],
+        'type1': [],
+        }
+    preprocesses = [('standardization', {
+        **{f'mean:{element}': random.randn(7) for element in elements},
+        **{f'std:{element}': random.rand(7) for element in elements},
+        })]
+    layers = {element: [(random.randn(4, 7), random.randn(4), 'tanh'),
+                        (random.randn(1, 4), random.randn(1), 'identity')]
+              for element in elements}
+    return elements, parameters, preprocesses, layers
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_binary_potential_round_trip(tmp_path, dtype):
+    elements, parameters, preprocesses, layers = make_potential()
+    file_path = tmp_path / 'lammps.nnp.bin'
+    write_binary_potential(file_path, elements, 'symmetry_function',
+                           parameters, preprocesses, layers, dtype=dtype)
+    potential = read_binary_potential(file_path)
+
+    assert potential['dtype'] == np.dtype(dtype)
+    assert potential['elements'] == elements
+    assert potential['descriptor'] == 'symmetry_function'
+    assert potential['parameters'] == parameters
+    (name, arrays), = potential['preprocesses']
+    assert name == 'standardization'
+    for key, array in preprocesses[0][1].items():
+        assert arrays[key].dtype == np.dtype(dtype)
+        np.testing.assert_array_equal(arrays[key], array.astype(dtype))
+    for element in elements:
+        for (weight, bias, activation), (W, b, act) in zip(
+                layers[element], potential['layers'][element]):
+            assert act == activation
+            np.testing.assert_array_equal(W, weight.astype(dtype))
+            np.testing.assert_array_equal(b, bias.astype(dtype))
+
+
+def test_read_rejects_other_file(tmp_path):
+    file_path = tmp_path / 'lammps.nnp'
+    file_path.write_bytes(b'# not a binary potential')
+    with pytest.raises(ValueError):
+        read_binary_potential(file_path)
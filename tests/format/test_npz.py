@@ -0,0 +1,30 @@
+# coding: utf-8
+
+import numpy as np
+import pytest
+
+from hdnnpy.format import NpzStreamWriter
+
+
+def test_stream_writer_concatenates_appended_arrays(tmp_path):
+    file_path = tmp_path / 'result.npz'
+    energy = np.random.RandomState(0).randn(7, 1)
+    force = np.random.RandomState(1).randn(7, 24)
+    with NpzStreamWriter(file_path) as writer:
+        for block in np.array_split(range(7), 3):
+            writer.append('Tag/energy', energy[block])
+            writer.append('Tag/force', force[block])
+
+    with np.load(str(file_path)) as ndarray:
+        assert sorted(ndarray.files) == ['Tag/energy', 'Tag/force']
+        np.testing.assert_array_equal(ndarray['Tag/energy'], energy)
+        np.testing.assert_array_equal(ndarray['Tag/force'], force)
+
+
+def test_stream_writer_is_aborted_by_exception(tmp_path):
+    file_path = tmp_path / 'result.npz'
+    with pytest.raises(RuntimeError):
+        with NpzStreamWriter(file_path) as writer:
+            writer.append('Tag/energy', np.zeros((2, 1)))
+            raise RuntimeError
+    assert not file_path.exists()
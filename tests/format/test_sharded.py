@@ -0,0 +1,56 @@
+# coding: utf-8
+
+from mpi4py import MPI
+import numpy as np
+import pytest
+
+from hdnnpy.format import (ShardedStore, save_sharded)
+from hdnnpy.format.sharded import is_sharded
+
+
+@pytest.fixture
+def arrays():
+    random = np.random.RandomState(0)
+    return {
+        'sym_func': random.randn(10, 4, 6),
+        'derivative': random.randn(10, 4, 6, 12),
+        }
+
+
+@pytest.mark.parametrize('codec', [None, 'zlib'])
+def test_sharded_round_trip(tmp_path, arrays, codec):
+    dir_path = tmp_path / 'descriptor'
+    info = {'tag': 'TestGa2N2'}
+    save_sharded(dir_path, arrays, 0, MPI.COMM_SELF, info=info,
+                 codec=codec, chunk_size=3)
+
+    assert is_sharded(dir_path)
+    store = ShardedStore(dir_path)
+    assert len(store) == 10
+    assert store.codec == codec
+    assert store.info == info
+    assert sorted(store) == sorted(arrays)
+    sym_func, derivative = store.read(['sym_func', 'derivative'], 2, 7)
+    np.testing.assert_array_equal(sym_func, arrays['sym_func'][2:7])
+    np.testing.assert_array_equal(derivative, arrays['derivative'][2:7])
+
+
+def test_sharded_removes_stale_shards(tmp_path, arrays):
+    dir_path = tmp_path / 'descriptor'
+    save_sharded(dir_path, arrays, 0, MPI.COMM_SELF)
+    arrays = {key: array[:6] for key, array in arrays.items()}
+    save_sharded(dir_path, arrays, 0, MPI.COMM_SELF)
+
+    assert len(list(dir_path.glob('shard-*.npz'))) == 1
+    store = ShardedStore(dir_path)
+    assert len(store) == 6
+    sym_func, = store.read(['sym_func'], 0, 6)
+    np.testing.assert_array_equal(sym_func, arrays['sym_func'])
+
+
+def test_sharded_store_of_no_sample(tmp_path):
+    dir_path = tmp_path / 'descriptor'
+    save_sharded(dir_path, {}, 0, MPI.COMM_SELF)
+    store = ShardedStore(dir_path)
+    assert len(store) == 0
+    assert store.keys == []
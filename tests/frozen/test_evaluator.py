@@ -0,0 +1,67 @@
+# coding: utf-8
+
+import chainer
+import numpy as np
+import pytest
+
+from hdnnpy.cli.configurables import DatasetConfig
+from hdnnpy.cli.conversion_application import ConversionApplication
+from hdnnpy.dataset import (AtomicStructure, HDNNPDataset)
+from hdnnpy.dataset.descriptor import DESCRIPTOR_DATASET
+from hdnnpy.dataset.property import PROPERTY_DATASET
+from hdnnpy.frozen import FrozenHDNNP
+from hdnnpy.inference.predictor import Predictor
+from hdnnpy.model import (HighDimensionalNNP, MasterNNP)
+
+
+PARAMETERS = {
+    'type1': [(3.0,)],
+    'type2': [(4.0, 0.1, 0.0), (4.0, 1.0, 2.0)],
+    'type4': [(4.0, 0.01, -1.0, 1.0), (3.5, 0.1, 1.0, 4.0)],
+    }
+HIDDEN_LAYERS = [(8, 'tanh'), (8, 'softplus')]
+
+
+def chainer_predict(master_nnp, atoms, descriptor, elements):
+    """Predict energy and force in the same way as `Predictor`."""
+    structures = [AtomicStructure(atoms)]
+    descriptor_dataset = DESCRIPTOR_DATASET[descriptor](
+        1, structures, **PARAMETERS)
+    descriptor_dataset.make(verbose=False)
+    property_dataset = PROPERTY_DATASET['interatomic_potential'](
+        1, structures)
+    dataset = HDNNPDataset(descriptor_dataset, property_dataset)
+    dataset.construct(all_elements=elements, shuffle=False, verbose=False)
+
+    hdnnp = HighDimensionalNNP(
+        dataset.elemental_composition, dataset.n_input, HIDDEN_LAYERS, 1)
+    hdnnp.sync_param_with(master_nnp)
+    batch = dataset.get_batch(slice(None))
+    with chainer.using_config('train', False), \
+         chainer.using_config('enable_backprop', False):
+        energy, force = hdnnp.predict(
+            [batch['inputs/0'], batch['inputs/1']], 1)
+    force = np.take(force.data[0], Predictor._unsort_indices(atoms), axis=1)
+    return energy.data[0], -force
+
+
+@pytest.mark.parametrize('descriptor', [
+    'symmetry_function', 'weighted_symmetry_function'])
+def test_frozen_hdnnp_agrees_with_chainer(tmp_path, float64, atoms,
+                                         descriptor):
+    elements = ['Ga', 'N']
+    n_input = DESCRIPTOR_DATASET[descriptor](
+        0, [AtomicStructure(atoms)], **PARAMETERS).n_feature
+    master_nnp = MasterNNP(elements, n_input, HIDDEN_LAYERS, 1)
+
+    conversion = ConversionApplication(load_dir=tmp_path)
+    conversion.training_result = {'training': {'elements': elements}}
+    conversion.dataset_config = DatasetConfig(
+        descriptor=descriptor, parameters=PARAMETERS)
+    conversion.dump_for_numpy([], master_nnp)
+    frozen = FrozenHDNNP(tmp_path / 'frozen_nnp.npz')
+
+    energy, force = chainer_predict(master_nnp, atoms, descriptor, elements)
+    result = frozen.evaluate(atoms, order=1)
+    np.testing.assert_allclose(result['energy'], energy, atol=1e-10)
+    np.testing.assert_allclose(result['force'], force, atol=1e-10)
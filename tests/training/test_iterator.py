@@ -0,0 +1,58 @@
+# coding: utf-8
+
+import numpy as np
+
+from hdnnpy.training import (BatchIterator, InterleavedIterator)
+
+
+class Dataset(object):
+    """Minimal dataset which returns indices of a mini-batch."""
+    def __init__(self, tag, length):
+        self.tag = tag
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def get_batch(self, index):
+        return {'index': np.asarray(index)}
+
+
+def make_iterator(lengths, batch_size=4, **kwargs):
+    iterators = [BatchIterator(Dataset(f'Tag{i}', length), batch_size,
+                               prefetch=False)
+                 for i, length in enumerate(lengths)]
+    return InterleavedIterator(iterators, **kwargs)
+
+
+def test_epoch_contains_all_mini_batches_of_each_tag():
+    iterator = make_iterator([10, 3, 8])
+    tags = []
+    while not iterator.is_new_epoch:
+        tags.append(iterator.next()['tag'])
+    assert iterator.epoch == 1
+    assert sorted(tags) == ['Tag0']*3 + ['Tag1']*1 + ['Tag2']*2
+
+
+def test_schedule_does_not_depend_on_global_random_state():
+    schedules = []
+    for seed in range(2):
+        np.random.seed(seed)
+        iterator = make_iterator([10, 3, 8], seed=1)
+        np.random.rand(seed + 1)
+        schedules.append([iterator.next()['tag'] for _ in range(18)])
+    assert schedules[0] == schedules[1]
+
+
+def test_reset_restarts_the_same_schedule():
+    iterator = make_iterator([10, 3, 8], shuffle=True)
+    tags = [iterator.next()['tag'] for _ in range(12)]
+    iterator.reset()
+    assert [iterator.next()['tag'] for _ in range(12)] == tags
+
+
+def test_no_repeat_stops_after_an_epoch():
+    iterator = make_iterator([5, 6], repeat=False, shuffle=False)
+    batches = list(iterator)
+    assert len(batches) == 4
+    assert [batch['tag'] for batch in batches] == ['Tag0']*2 + ['Tag1']*2